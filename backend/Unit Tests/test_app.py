@@ -0,0 +1,153 @@
+import datetime
+
+import pytest
+
+import app as web
+from controllers.grid.grid_store import content_hash
+
+
+AVAIL = [{"DayId": 2, "DayRanges": [{"start_time": datetime.time(8), "end_time": datetime.time(10)}]}]
+
+
+@pytest.fixture
+def client():
+    web.app.config["TESTING"] = True
+    web.grid_store.clear()
+    return web.app.test_client()
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    """Every availability lookup succeeds; returns the (external_id, force_refresh) of each one"""
+    calls = []
+
+    def get_availability(external_id, force_refresh=False):
+        calls.append((external_id, force_refresh))
+        return AVAIL
+    monkeypatch.setattr(web, "get_availability", get_availability)
+    return calls
+
+
+#------------------------------------------------------------------------ Force Refresh ------------------------------------------------------------------------#
+@pytest.mark.parametrize("value, expected", [
+    (True, True), ("true", True), ("1", True), (1, True),
+    (False, False), ("false", False), ("0", False), (0, False), (None, False),
+])
+def test_generate_parses_force_refresh(client, fetches, value, expected):
+    response = client.post("/generate", json={"external_id": "1", "force_refresh": value, "wait": True})
+
+    assert response.status_code == 200
+    assert fetches == [("1", expected)]
+
+
+@pytest.mark.parametrize("value, expected", [("true", True), ("false", False)])
+def test_heatmap_parses_force_refresh(client, monkeypatch, value, expected):
+    calls = []
+
+    def generate_heatmap(external_ids, show_counts=False, force_refresh=False, spec=None):
+        calls.append((show_counts, force_refresh))
+        return web.load_template(spec), {}, {}
+    monkeypatch.setattr(web, "generate_heatmap", generate_heatmap)
+
+    client.post("/heatmap", json={"external_ids": ["1"], "force_refresh": value, "show_counts": value})
+
+    assert calls == [(expected, expected)]
+
+
+#------------------------------------------------------------------------ Download ------------------------------------------------------------------------#
+DATA = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def stored(client):
+    """A grid in the store, as /generate leaves it; returns its download URL"""
+    web.grid_store.put("170600001", DATA)
+    return "/download/170600001"
+
+
+def test_download_carries_validators(client, stored):
+    response = client.get(stored)
+
+    assert response.status_code == 200
+    assert response.data == DATA
+    assert response.headers["ETag"] == f'"{content_hash(DATA)}"'
+    assert response.headers["Last-Modified"]
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert "attachment; filename=schedule_170600001.xlsx" in response.headers["Content-Disposition"]
+
+
+def test_unchanged_download_is_a_304(client, stored):
+    first = client.get(stored)
+
+    by_etag = client.get(stored, headers={"If-None-Match": first.headers["ETag"]})
+    by_date = client.get(stored, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    changed = client.get(stored, headers={"If-None-Match": '"something else"'})
+
+    assert by_etag.status_code == 304 and by_etag.data == b""
+    assert by_date.status_code == 304
+    assert changed.status_code == 200
+
+
+def test_regenerated_identical_grid_keeps_its_etag(client, stored):
+    etag = client.get(stored).headers["ETag"]
+    web.grid_store.put("170600001", DATA)
+
+    assert client.get(stored, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_range_request_is_a_206(client, stored):
+    response = client.get(stored, headers={"Range": "bytes=100-199"})
+
+    assert response.status_code == 206
+    assert response.data == DATA[100:200]
+    assert response.headers["Content-Range"] == f"bytes 100-199/{len(DATA)}"
+
+
+def test_resumed_download_with_a_stale_if_range_gets_the_whole_file(client, stored):
+    etag = client.get(stored).headers["ETag"]
+
+    current = client.get(stored, headers={"Range": "bytes=100-", "If-Range": etag})
+    stale = client.get(stored, headers={"Range": "bytes=100-", "If-Range": '"old"'})
+
+    assert current.status_code == 206 and current.data == DATA[100:]
+    assert stale.status_code == 200 and stale.data == DATA
+
+
+def test_range_outside_the_file_is_a_416(client, stored):
+    response = client.get(stored, headers={"Range": f"bytes={len(DATA) + 10}-"})
+
+    assert response.status_code == 416
+
+
+def test_missing_grid_is_a_404(client):
+    assert client.get("/download/nobody").status_code == 404
+
+
+@pytest.fixture
+def generated(client, fetches):
+    """A grid generated through /generate; returns its download URL"""
+    assert client.post("/generate", json={"external_id": "170600002", "wait": True}).status_code == 200
+    return "/download/170600002"
+
+
+def test_rendered_format_is_validated_by_its_render_key(client, generated, fetches):
+    first = client.get(generated + "?format=html")
+    again = client.get(generated + "?format=html", headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200 and first.mimetype == "text/html"
+    assert again.status_code == 304
+    assert len(fetches) == 1
+
+
+def test_renders_show_the_availability_the_grid_was_generated_from(client, generated, monkeypatch):
+    before = client.get(generated + "?format=svg")
+    monkeypatch.setattr(web, "get_availability", lambda external_id, force_refresh=False: [])
+
+    after = client.get(generated + "?format=svg")
+
+    assert after.status_code == 200
+    assert after.data == before.data and after.headers["ETag"] == before.headers["ETag"]
+
+
+def test_grid_stored_without_masks_cannot_be_rendered(client, stored):
+    assert client.get(stored + "?format=png").status_code == 409
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from controllers.auth.session_manager import SessionManager
+from controllers.api.async_schedule_source_api import AsyncScheduleSourceAPI
+
+
+CREDENTIALS = {"code": "c", "user": "u", "password": "p"}
+
+
+class LoginResponse:
+    def __init__(self, number):
+        self.number = number
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"Response": {"SessionId": f"s{self.number}", "APIToken": f"t{self.number}"}}
+
+
+class LoginTransport:
+    """Blocking transport of the session manager, answering every login"""
+
+    def __init__(self):
+        self.logins = 0
+
+    def post(self, url, **kwargs):
+        self.logins += 1
+        return LoginResponse(self.logins)
+
+
+def availability_client(valid_tokens):
+    """httpx client answering availability requests carrying one of `valid_tokens`, 401 otherwise"""
+    def handler(request):
+        if request.headers.get("x-api-token") not in valid_tokens:
+            return httpx.Response(401, json={"error": "Invalid token"})
+        employee_id = request.url.params["EmployeeExternalId"]
+        return httpx.Response(200, json=[{"EmployeeExternalId": employee_id, "DayId": 2, "AvailableRanges": ""}])
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def fetch_many(api, ids):
+    async def run():
+        async with api:
+            return await api.get_global_availability_many(ids)
+    return asyncio.run(run())
+
+
+def test_async_client_uses_the_session_manager():
+    transport = LoginTransport()
+    manager = SessionManager("http://auth.invalid", CREDENTIALS, transport=transport)
+    manager.get_tokens()    # e.g. logged in by a synchronous client
+
+    api = AsyncScheduleSourceAPI("http://auth.invalid", CREDENTIALS, base_url="http://api.invalid",
+                                 session_manager=manager, client=availability_client({"t1"}))
+    results, errors = fetch_many(api, [str(i) for i in range(20)])
+
+    assert len(results) == 20 and errors == {}
+    assert transport.logins == 1
+
+
+def test_rejected_session_is_refreshed_once():
+    transport = LoginTransport()
+    manager = SessionManager("http://auth.invalid", CREDENTIALS, transport=transport)
+    manager.get_tokens()
+
+    # The held token t1 is rejected: every request gets a 401, and all of them share one new login
+    api = AsyncScheduleSourceAPI("http://auth.invalid", CREDENTIALS, base_url="http://api.invalid",
+                                 session_manager=manager, client=availability_client({"t2"}))
+    results, errors = fetch_many(api, [str(i) for i in range(20)])
+
+    assert len(results) == 20 and errors == {}
+    assert transport.logins == 2
+    assert manager.get_tokens() == ("s2", "t2")
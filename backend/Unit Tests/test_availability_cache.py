@@ -0,0 +1,109 @@
+import time
+import datetime
+
+import pytest
+
+from controllers.grid.helper_classes import availability_cache
+from controllers.grid.helper_classes.availability_cache import AvailabilityCache, get_availability, get_availability_many
+from controllers.grid.helper_classes.availability_store import configure_availability_store
+
+
+ROWS = [{"DayId": 2, "AvailableRanges": "8am-10am"}]
+AVAIL = [{"DayId": 2, "DayRanges": [{"start_time": datetime.time(8), "end_time": datetime.time(10)}]}]
+
+
+#------------------------------------------------------------------------ Store Fallback ------------------------------------------------------------------------#
+@pytest.fixture
+def store():
+    """An in-memory availability store configured as the process-wide one for the test"""
+    yield configure_availability_store(":memory:")
+    configure_availability_store(None)
+
+
+@pytest.fixture
+def failing_fetch(monkeypatch):
+    """Every Schedule Source fetch fails"""
+    monkeypatch.setattr(availability_cache, "parse_availability", lambda studentId, session_manager=None: None)
+    monkeypatch.setattr(availability_cache, "parse_availability_many",
+                        lambda ids, session_manager=None, strategy="auto": ({}, {i: RuntimeError("down") for i in ids}))
+
+
+def test_fallback_keeps_the_store_fetch_time(store, failing_fetch):
+    store.save("1", ROWS, fetched_at=time.time() - 3600)
+    cache = AvailabilityCache(ttl=6 * 3600)
+
+    assert get_availability("1", cache=cache) == AVAIL
+    assert cache.age("1") == pytest.approx(3600, abs=5)
+
+
+def test_fallback_older_than_the_ttl_is_not_cached(store, failing_fetch):
+    store.save("1", ROWS, fetched_at=time.time() - 7 * 3600)
+    store.save("2", ROWS, fetched_at=time.time() - 7 * 3600)
+    cache = AvailabilityCache(ttl=6 * 3600)
+
+    assert get_availability("1", cache=cache) == AVAIL
+    found, errors = get_availability_many(["2", "3"], cache=cache)
+
+    assert found == {"2": AVAIL} and list(errors) == ["3"]
+    assert cache.age("1") is None and cache.age("2") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_offline_many_keeps_the_store_fetch_time(store):
+    store.offline = True
+    store.save("1", ROWS, fetched_at=time.time() - 600)
+    cache = AvailabilityCache()
+
+    found, errors = get_availability_many(["1", "2"], cache=cache)
+
+    assert found == {"1": AVAIL}
+    assert isinstance(errors["2"], LookupError)
+    assert cache.age("1") == pytest.approx(600, abs=5)
+
+
+#------------------------------------------------------------------------ TTL and LRU ------------------------------------------------------------------------#
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(availability_cache.time, "time", lambda: now[0])
+    cache = AvailabilityCache(ttl=60)
+
+    cache.put("1", AVAIL)
+    now[0] += 59
+    assert cache.get("1") == AVAIL
+    now[0] += 1
+    assert cache.get("1") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"], stats["size"]) == (1, 1, 1, 0)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AvailabilityCache(max_entries=2)
+    cache.put("1", AVAIL)
+    cache.put("2", AVAIL)
+
+    assert cache.get("1") == AVAIL     # "2" is now the least recently used
+    cache.put("3", AVAIL)
+
+    assert cache.get("2") is None
+    assert cache.get("1") == AVAIL and cache.get("3") == AVAIL
+    assert cache.stats()["evictions"] == 1
+
+
+def test_evicted_entries_are_read_back_from_disk(tmp_path):
+    cache = AvailabilityCache(max_entries=1, db_path=tmp_path / "cache.db")
+    cache.put("1", AVAIL)
+    cache.put("2", AVAIL)
+
+    assert cache.get("1") == AVAIL
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_force_refresh_skips_the_cache(monkeypatch):
+    monkeypatch.setattr(availability_cache, "parse_availability", lambda studentId, session_manager=None: AVAIL)
+    cache = AvailabilityCache()
+    cache.put("1", [])
+
+    assert get_availability("1", cache=cache) == []
+    assert get_availability("1", force_refresh=True, cache=cache) == AVAIL
+    assert get_availability("1", cache=cache) == AVAIL
@@ -0,0 +1,142 @@
+import random
+import datetime
+
+import pytest
+
+from controllers.grid.availability_index import AvailabilityIndex, parse_day_id, parse_clock
+from controllers.grid.grid_generator import is_available
+from controllers.grid.grid_spec import GRID_SPECS
+
+
+def clock(minute):
+    return datetime.time(minute // 60, minute % 60)
+
+
+def random_avail(rng):
+    """A week of up to three ranges per day, some days missing"""
+    avail = []
+    for dayId in range(1, 8):
+        if rng.random() < 0.1:
+            continue
+        ranges = []
+        for _ in range(rng.randint(0, 3)):
+            start = rng.randrange(5 * 60, 22 * 60, 5) + rng.choice((0, 0, 2))
+            end = min(start + rng.randrange(5, 6 * 60), 23 * 60 + 59)
+            ranges.append({"start_time": clock(start), "end_time": clock(end)})
+        avail.append({"DayId": dayId, "DayRanges": ranges})
+    return avail
+
+
+def brute_force(roster, spec, dayId, start, end, min_minutes=None, contiguous=False):
+    """Students answering a query, checking every slot of the window with is_available"""
+    window = [spec.slot_start_minute(slot) for slot in range(spec.num_slots)
+              if start <= spec.slot_start_minute(slot) < end]
+    matches = []
+    for studentId, avail in roster.items():
+        ranges = next((day["DayRanges"] for day in avail if day["DayId"] == dayId), [])
+        available = [is_available(clock(minute), ranges) for minute in window]
+        if not window:
+            continue
+        if min_minutes is None:
+            matched = all(available)
+        else:
+            needed = max(1, -(-min_minutes // spec.step_minutes))
+            if contiguous:
+                longest = run = 0
+                for slot in available:
+                    run = run + 1 if slot else 0
+                    longest = max(longest, run)
+                matched = longest >= needed
+            else:
+                matched = sum(available) >= needed
+        if matched:
+            matches.append(studentId)
+    return matches
+
+
+def random_queries(rng, count):
+    for _ in range(count):
+        start = rng.randrange(6 * 60, 22 * 60, rng.choice((1, 5, 15)))
+        end = min(start + rng.randrange(1, 5 * 60), 22 * 60)
+        min_minutes = rng.choice((None, None, 5, 7, 30, 60, 90))
+        yield rng.randint(1, 7), start, end, min_minutes, rng.random() < 0.5
+
+
+#------------------------------------------------------------------------ Against Brute Force ------------------------------------------------------------------------#
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_query_and_count_match_brute_force(step):
+    spec = GRID_SPECS[step]
+    rng = random.Random(step)
+    roster = {str(170600000 + i): random_avail(rng) for i in range(150)}
+    index = AvailabilityIndex(spec)
+    index.update_many(roster)
+
+    for query in random_queries(rng, 300):
+        expected = brute_force(roster, spec, *query)
+        assert index.query(*query) == expected, query
+        assert index.count(*query) == len(expected), query
+
+
+def test_updates_and_removals_match_brute_force():
+    spec = GRID_SPECS[5]
+    rng = random.Random(21)
+    roster = {str(i): random_avail(rng) for i in range(100)}
+    index = AvailabilityIndex()
+    index.update_many(roster)
+
+    for studentId in rng.sample(sorted(roster), 30):
+        del roster[studentId]
+        assert index.remove(studentId)
+    for studentId in rng.sample(sorted(roster), 20):
+        roster[studentId] = random_avail(rng)
+        index.update(studentId, roster[studentId])
+    for i in range(100, 120):     # reuse the freed lanes
+        roster[str(i)] = random_avail(rng)
+        index.update(str(i), roster[str(i)])
+
+    assert len(index) == len(roster)
+    for query in random_queries(rng, 200):
+        assert sorted(index.query(*query)) == sorted(brute_force(roster, spec, *query)), query
+
+    assert index.retain(list(roster)[:10]) == len(roster) - 10
+    assert len(index) == 10
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_windows_crossing_the_grid_edge_are_rejected(step):
+    index = AvailabilityIndex(GRID_SPECS[step])
+    index.update("early", [{"DayId": 3, "DayRanges": [{"start_time": datetime.time(6), "end_time": datetime.time(7)}]}])
+    index.update("late", [{"DayId": 3, "DayRanges": [{"start_time": datetime.time(21), "end_time": datetime.time(22)}]}])
+
+    for start, end in (("5:00", "7:00"), ("4:00", "5:00"), ("21:00", "23:00"), ("5:00", "23:00")):
+        with pytest.raises(ValueError):
+            index.query(3, start, end)
+        with pytest.raises(ValueError):
+            index.count(3, start, end, min_minutes=60)
+
+    assert index.query(3, "6:00", "7:00") == ["early"]
+    assert index.query(3, "21:00", "22:00") == ["late"]
+    assert index.query(3, "6:00", "22:00", min_minutes=60) == ["early", "late"]
+
+
+#------------------------------------------------------------------------ Parsing ------------------------------------------------------------------------#
+@pytest.mark.parametrize("day, dayId", [(1, 1), ("7", 7), ("tue", 3), ("Tuesday", 3), (" SAT ", 7)])
+def test_parse_day_id(day, dayId):
+    assert parse_day_id(day) == dayId
+
+
+@pytest.mark.parametrize("value, minute", [
+    ("11:00", 660), ("1:30pm", 810), ("11am", 660), ("12am", 0), ("12pm", 720), (90, 90),
+    (datetime.time(13, 30), 810), ("24:00", 1440),
+])
+def test_parse_clock(value, minute):
+    assert parse_clock(value) == minute
+
+
+@pytest.mark.parametrize("bad", [lambda index: index.query(8, "9am", "10am"),
+                                 lambda index: index.query("someday", "9am", "10am"),
+                                 lambda index: index.query(2, "13pm", "2pm"),
+                                 lambda index: index.query(2, "10am", "9am")])
+def test_invalid_queries_raise(bad):
+    with pytest.raises(ValueError):
+        bad(AvailabilityIndex())
@@ -0,0 +1,99 @@
+import random
+import datetime
+
+import pytest
+
+from controllers.grid.grid_generator import is_available
+from controllers.grid.grid_spec import GRID_SPECS
+from controllers.grid.helper_classes.availability_mask import (
+    availability_to_masks, masks_to_availability, ranges_to_mask, is_slot_available, unavailable_runs,
+    slot_counts, count_available, union, intersection
+)
+
+
+SPECS = [GRID_SPECS[step] for step in sorted(GRID_SPECS)]
+
+
+def clock(minute):
+    return datetime.time(minute // 60, minute % 60)
+
+
+def rng_range(start, end):
+    return {"start_time": clock(start), "end_time": clock(end) if end < 24 * 60 else datetime.time.max}
+
+
+def random_day(rng):
+    """Up to four ranges anywhere in the day, unaligned, possibly overlapping or outside the grid"""
+    ranges = []
+    for _ in range(rng.randint(0, 4)):
+        start = rng.randrange(0, 24 * 60)
+        ranges.append(rng_range(start, rng.randint(start + 1, 24 * 60)))
+    return ranges
+
+
+EDGE_DAYS = [
+    [],
+    [rng_range(0, 24 * 60)],                            # the whole day
+    [rng_range(6 * 60, 22 * 60)],                       # exactly the grid
+    [rng_range(8 * 60 + 3, 8 * 60 + 7)],                # inside one slot: no slot starts in it
+    [rng_range(8 * 60, 8 * 60 + 5)],                    # exactly one 5-minute slot
+    [rng_range(5 * 60, 6 * 60 + 1)],                    # starts before the grid
+    [rng_range(21 * 60 + 59, 23 * 60)],                 # ends after the grid
+    [rng_range(9 * 60, 12 * 60), rng_range(11 * 60, 13 * 60)],  # overlapping
+]
+
+
+def slot_time(spec, slot):
+    return clock(spec.slot_start_minute(slot))
+
+
+def assert_matches_is_available(avail, spec):
+    masks = availability_to_masks(avail, spec)
+    for day in avail:
+        for slot in range(spec.num_slots):
+            assert is_slot_available(masks[day["DayId"]], slot) == \
+                is_available(slot_time(spec, slot), day["DayRanges"]), (spec.name, day, slot)
+
+
+#------------------------------------------------------------------------ Against is_available ------------------------------------------------------------------------#
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.name)
+@pytest.mark.parametrize("day", EDGE_DAYS)
+def test_edge_days_match_is_available(spec, day):
+    assert_matches_is_available([{"DayId": 2, "DayRanges": day}], spec)
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.name)
+def test_random_weeks_match_is_available(spec):
+    rng = random.Random(6)
+    for _ in range(50):
+        assert_matches_is_available([{"DayId": dayId, "DayRanges": random_day(rng)} for dayId in range(1, 8)], spec)
+
+
+#------------------------------------------------------------------------ Conversions and Queries ------------------------------------------------------------------------#
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.name)
+def test_ranges_round_trip(spec):
+    rng = random.Random(7)
+    for _ in range(50):
+        masks = {dayId: ranges_to_mask(random_day(rng), spec) for dayId in range(1, 8)}
+        assert availability_to_masks(masks_to_availability(masks, spec), spec) == masks
+
+
+def test_unavailable_runs_cover_exactly_the_unavailable_slots():
+    rng = random.Random(8)
+    for _ in range(50):
+        mask = ranges_to_mask(random_day(rng))
+        painted = [slot for start, end in unavailable_runs(mask) for slot in range(start, end)]
+        assert painted == [slot for slot in range(192) if not is_slot_available(mask, slot)]
+
+
+def test_cross_student_operations_match_brute_force():
+    rng = random.Random(9)
+    masks = [ranges_to_mask(random_day(rng)) for _ in range(40)]
+
+    counts = slot_counts(masks)
+    for slot in range(192):
+        available = [is_slot_available(mask, slot) for mask in masks]
+        assert counts[slot] == sum(available)
+        assert is_slot_available(union(masks), slot) == any(available)
+        assert is_slot_available(intersection(masks), slot) == all(available)
+    assert sum(counts) == sum(count_available(mask) for mask in masks)
@@ -0,0 +1,102 @@
+import time
+import datetime
+
+import pytest
+
+from controllers.grid.helper_classes.availability_store import AvailabilityStore, merge_ranges
+
+
+def rows(**days):
+    """Schedule Source rows from DayId keywords, e.g. rows(d2="8am-10am")"""
+    return [{"DayId": int(day[1:]), "AvailableRanges": ranges} for day, ranges in days.items()]
+
+
+def day_ranges(*pairs):
+    return [{"start_time": datetime.time(*start), "end_time": datetime.time(*end)} for start, end in pairs]
+
+
+@pytest.fixture
+def store():
+    return AvailabilityStore(":memory:")
+
+
+#------------------------------------------------------------------------ Save and Load ------------------------------------------------------------------------#
+def test_save_many_replaces_earlier_rows(store):
+    store.save_many({"1": rows(d2="8am-10am", d3="1pm-5pm"), "2": rows(d4="9am-11am")})
+    store.save_many({"1": rows(d5="6am-7am")})
+
+    assert store.load("1") == [{"DayId": 5, "DayRanges": day_ranges(((6,), (7,)))}]
+    assert store.load("2") == [{"DayId": 4, "DayRanges": day_ranges(((9,), (11,)))}]
+    # The ranges of the replaced days are gone from the window index too
+    assert store.available_during(2, 8 * 60, 10 * 60) == []
+    assert store.available_during(5, 6 * 60, 7 * 60) == ["1"]
+    assert store.stats()["days"] == 2 and store.stats()["ranges"] == 2
+
+
+def test_load_many_returns_the_missing_ids(store):
+    store.save_many({"1": rows(d2="8am-10am"), "2": rows(d3="9am-10am")})
+
+    found, missing = store.load_many(["2", "404", "1", "2", "405"])
+
+    assert list(found) == ["1", "2"]
+    assert found["2"] == [{"DayId": 3, "DayRanges": day_ranges(((9,), (10,)))}]
+    assert missing == ["404", "405"]
+    assert store.load("404") is None
+
+
+def test_load_many_without_ids_reads_everything(store):
+    store.save_many({"2": rows(d2="8am-10am"), "1": rows(d3="9am-10am", d1="")})
+
+    found, missing = store.load_many()
+
+    assert list(found) == ["1", "2"] and missing == []
+    assert [day["DayId"] for day in found["1"]] == [1, 3]
+
+
+#------------------------------------------------------------------------ Window Queries ------------------------------------------------------------------------#
+def test_available_during_includes_the_window_edges(store):
+    store.save("1", rows(d3="11am-1:30pm"))
+
+    assert store.available_during(3, 11 * 60, 13 * 60 + 30) == ["1"]
+    assert store.available_during(3, 11 * 60 + 30, 13 * 60) == ["1"]
+    assert store.available_during(3, 10 * 60 + 59, 13 * 60 + 30) == []
+    assert store.available_during(3, 11 * 60, 13 * 60 + 31) == []
+    assert store.available_during(2, 11 * 60, 12 * 60) == []
+
+
+def test_touching_and_overlapping_ranges_cover_the_window_together(store):
+    store.save_many({"touching": rows(d3="8am-10am;10am-12pm"), "overlapping": rows(d3="10am-1pm;9am-11am"),
+                     "gap": rows(d3="8am-10am;10:05am-12pm")})
+
+    assert store.available_during(3, 9 * 60, 11 * 60) == ["overlapping", "touching"]
+    assert store.available_during(3, 8 * 60, 12 * 60) == ["touching"]
+    assert store.available_during(3, 9 * 60, 13 * 60) == ["overlapping"]
+    assert store.available_during(3, 8 * 60, 10 * 60) == ["gap", "touching"]
+
+
+def test_merge_ranges():
+    assert merge_ranges([(600, 720), (480, 600), (900, 960), (950, 1000)]) == [(480, 720), (900, 1000)]
+    assert merge_ranges([(480, 720), (500, 600)]) == [(480, 720)]
+    assert merge_ranges([]) == []
+
+
+#------------------------------------------------------------------------ Delete and Fetch Times ------------------------------------------------------------------------#
+def test_delete(store):
+    store.save_many({"1": rows(d2="8am-10am"), "2": rows(d2="8am-10am")})
+
+    assert store.delete("1")
+    assert not store.delete("1")
+    assert store.load("1") is None
+    assert store.available_during(2, 8 * 60, 10 * 60) == ["2"]
+    assert store.stats()["employees"] == 1 and store.stats()["ranges"] == 1
+
+
+def test_fetched_at_many(store):
+    now = time.time()
+    store.save_many({"1": rows(d2="8am-10am"), "2": rows(d2="8am-10am")}, fetched_at=now - 600)
+    store.save("3", rows(d2="8am-10am"), fetched_at=now - 60)
+
+    assert store.fetched_at_many(["3", "1", "404", "1"]) == {"1": now - 600, "3": now - 60}
+    assert store.fetched_at("2") == now - 600
+    assert store.fetched_at("404") is None
+    assert store.fetched_at_many([]) == {}
@@ -0,0 +1,79 @@
+import io
+import zipfile
+import datetime
+import threading
+
+from controllers.grid import batch_export
+from controllers.grid.batch_export import build_workbook_export, sheet_title
+
+
+AVAIL = [{"DayId": 2, "DayRanges": [{"start_time": datetime.time(8), "end_time": datetime.time(10)}]}]
+
+
+def fake_fetch(monkeypatch, missing=()):
+    """Every ID has the same availability, except the `missing` ones which fail"""
+    def get_availability_many(ids, force_refresh=False):
+        return ({i: AVAIL for i in ids if i not in missing},
+                {i: LookupError("not found") for i in ids if i in missing})
+    monkeypatch.setattr(batch_export, "get_availability_many", get_availability_many)
+
+
+def test_sheet_title_replaces_invalid_characters():
+    assert sheet_title("bad/id") == "bad_id"
+    assert sheet_title("a:b*c?d[e]f\\g") == "a_b_c_d_e_f_g"
+    assert sheet_title("x" * 40) == "x" * 31
+
+
+def test_workbook_export_names_every_sheet_after_its_id(monkeypatch):
+    fake_fetch(monkeypatch, missing={"gone"})
+
+    wb, report = build_workbook_export(["ok1", "bad/id", "bad:2", "gone"])
+
+    assert wb.sheetnames == ["ok1", "bad_id", "bad_2"]
+    assert report["succeeded"] == 3
+    assert list(report["failures"]) == ["gone"]
+
+
+def test_workbook_export_keeps_ids_that_collide_once_sanitized(monkeypatch):
+    fake_fetch(monkeypatch)
+
+    wb, report = build_workbook_export(["a/b", "a:b"])
+
+    assert len(wb.sheetnames) == len(set(wb.sheetnames)) == 2
+    assert report["succeeded"] == 2 and report["failed"] == 0
+
+
+def test_workbook_export_without_any_grid_keeps_the_template(monkeypatch):
+    fake_fetch(monkeypatch, missing={"gone"})
+
+    wb, report = build_workbook_export(["gone"])
+
+    assert len(wb.worksheets) == 1
+    assert report["succeeded"] == 0 and report["failed"] == 1
+
+
+#------------------------------------------------------------------------ Render Pool ------------------------------------------------------------------------#
+def test_render_workers_are_never_forked_from_the_caller():
+    assert batch_export._pool_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_pool_renders_the_same_grids_from_a_thread_holding_a_lock(monkeypatch):
+    fake_fetch(monkeypatch)
+    ids = [str(170600000 + i) for i in range(batch_export.MIN_GRIDS_FOR_POOL)]
+    held = threading.Lock()
+    results = {}
+
+    def export(workers):
+        with held:
+            archive = zipfile.ZipFile(io.BytesIO(b"".join(batch_export.iter_zip_export(ids, workers=workers))))
+        results[workers] = {name: archive.read(name) for name in archive.namelist() if name != "report.json"}
+
+    # A forked child would inherit `held` locked; a fresh worker never sees it
+    worker = threading.Thread(target=export, args=(2,))
+    worker.start()
+    worker.join(timeout=60)
+    export(0)
+
+    assert not worker.is_alive()
+    assert len(results[2]) == len(ids)
+    assert results[2] == results[0]
@@ -0,0 +1,136 @@
+import io
+import random
+import datetime
+
+import openpyxl
+import pytest
+
+from controllers.grid.grid_generator import (new_grid_workbook, load_template, clear_row, fill_in_day_mask,
+                                             GRID_FILL_COLOR)
+from controllers.grid.grid_spec import GRID_SPECS
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+
+
+def clock(minute):
+    return datetime.time(minute // 60, minute % 60)
+
+
+def random_avail(rng):
+    """A week of up to three ranges per day, some days missing"""
+    avail = []
+    for dayId in range(1, 8):
+        if rng.random() < 0.1:
+            continue
+        ranges = []
+        for _ in range(rng.randint(0, 3)):
+            start = rng.randrange(5 * 60, 22 * 60, 5) + rng.choice((0, 0, 2))
+            end = min(start + rng.randrange(5, 6 * 60), 23 * 60 + 59)
+            ranges.append({"start_time": clock(start), "end_time": clock(end)})
+        avail.append({"DayId": dayId, "DayRanges": ranges})
+    return avail
+
+
+def paint(ws, masks, spec):
+    for dayId, mask in masks.items():
+        fill_in_day_mask(ws, dayId, mask, GRID_FILL_COLOR, spec)
+
+
+def styles(ws):
+    """Value, fill, border and font of every cell of the sheet; painting never adds fonts or borders, so their ids are compared"""
+    return {cell.coordinate: (cell.value, cell.fill.fill_type, cell.fill.fgColor.rgb, cell.fill.bgColor.rgb,
+                              cell._style.borderId, cell._style.fontId, cell.number_format)
+            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=ws.max_column) for cell in row}
+
+
+#------------------------------------------------------------------------ Repaint ------------------------------------------------------------------------#
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_repainted_days_match_a_freshly_painted_grid(step):
+    spec = GRID_SPECS[step]
+    rng = random.Random(step)
+
+    for _ in range(3):
+        before, after = availability_to_masks(random_avail(rng), spec), availability_to_masks(random_avail(rng), spec)
+        ws = new_grid_workbook(spec).active
+        paint(ws, before, spec)
+
+        for dayId in spec.day_order:
+            clear_row(ws, dayId, spec)
+        paint(ws, after, spec)
+
+        fresh = new_grid_workbook(spec).active
+        paint(fresh, after, spec)
+        got, want = styles(ws), styles(fresh)
+        assert [coordinate for coordinate in want if got[coordinate] != want[coordinate]] == []
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_clearing_every_row_restores_the_template(step):
+    spec = GRID_SPECS[step]
+    ws = new_grid_workbook(spec).active
+    paint(ws, {dayId: 0 for dayId in spec.day_order}, spec)
+
+    for dayId in spec.day_order:
+        clear_row(ws, dayId, spec)
+
+    assert styles(ws) == styles(new_grid_workbook(spec).active)
+
+
+#------------------------------------------------------------------------ Template Clones ------------------------------------------------------------------------#
+def saved(wb):
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def layout(ws):
+    """Values, fill colors, merged cells, column widths and row heights, which survive a save and reload"""
+    return (
+        {cell.coordinate: (cell.value, cell.fill.fill_type, cell.fill.fgColor.rgb)
+         for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=ws.max_column) for cell in row},
+        sorted(map(str, ws.merged_cells.ranges)),
+        {key: dimension.width for key, dimension in ws.column_dimensions.items()},
+        {key: dimension.height for key, dimension in ws.row_dimensions.items()},
+    )
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_changing_a_clone_leaves_the_template_and_other_clones_alone(step):
+    spec = GRID_SPECS[step]
+    template = load_template(spec)
+    before, fills = styles(template.active), len(template._fills)
+    first, second = new_grid_workbook(spec), new_grid_workbook(spec)
+
+    ws = first.active
+    paint(ws, {dayId: 0 for dayId in spec.day_order}, spec)
+    fill_in_day_mask(ws, spec.day_order[0], 0, "123456", spec)
+    ws["A1"] = "changed"
+    ws.merge_cells(start_row=spec.first_row, start_column=spec.first_col, end_row=spec.first_row, end_column=spec.first_col + 1)
+    ws.column_dimensions["A"].width = 99
+    ws.row_dimensions[spec.first_row].height = 99
+    first.create_sheet("extra")
+
+    for wb in (template, second):
+        assert styles(wb.active) == before
+        assert len(wb._fills) == fills and wb.sheetnames == template.sheetnames
+        assert wb.active.column_dimensions["A"].width != 99
+        assert wb.active.row_dimensions[spec.first_row].height != 99
+    assert styles(new_grid_workbook(spec).active) == before
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_saved_clone_reloads_identically(step):
+    spec = GRID_SPECS[step]
+    wb = new_grid_workbook(spec)
+    paint(wb.active, availability_to_masks(random_avail(random.Random(step)), spec), spec)
+
+    reloaded = openpyxl.load_workbook(io.BytesIO(saved(wb)))
+
+    assert reloaded.sheetnames == wb.sheetnames
+    assert layout(reloaded.active) == layout(wb.active)
+
+
+def test_clone_dimensions_are_created_on_first_use():
+    ws = new_grid_workbook().active
+
+    assert ws.row_dimensions[200].height is None
+    assert ws.column_dimensions["ZZ"].width == 13
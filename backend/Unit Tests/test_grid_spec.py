@@ -0,0 +1,36 @@
+import pytest
+
+from controllers.grid.grid_spec import GridSpec, get_grid_spec
+
+
+def test_day_order_can_be_a_subset_in_any_order():
+    spec = GridSpec(day_order=[2, 3, 4, 5, 6])
+    assert spec.day_order == (2, 3, 4, 5, 6)
+    assert spec.row_of(2) == 3 and spec.row_of(6) == 7
+
+    assert GridSpec(day_order=(7, 1)).day_rows == {7: 3, 1: 4}
+
+
+@pytest.mark.parametrize("day_order", [
+    (1, 2, 2),          # duplicate
+    (0, 1, 2),          # below Sunday
+    (1, 8),             # above Saturday
+    ("1", "2"),         # not DayIds
+    (1.0, 2),
+    (True, 2),
+    (),
+])
+def test_invalid_day_order_is_rejected(day_order):
+    with pytest.raises(ValueError):
+        GridSpec(day_order=day_order)
+
+
+def test_day_order_from_a_generator_is_kept():
+    assert GridSpec(day_order=(d for d in (1, 2, 3))).day_order == (1, 2, 3)
+
+
+@pytest.mark.parametrize("step, slots", [(5, 192), (15, 64), (30, 32)])
+def test_registered_specs(step, slots):
+    spec = get_grid_spec(step)
+    assert spec.num_slots == slots
+    assert spec.column_of(0) == 2 and spec.last_col == 1 + slots
@@ -0,0 +1,188 @@
+import sqlite3
+
+import pytest
+
+from controllers.grid import grid_store
+from controllers.grid.grid_store import create_grid_store, content_hash, SqliteGridStore
+
+
+@pytest.fixture(params=["memory", "filesystem", "sqlite"])
+def make_store(request, tmp_path):
+    """Builds a store of each backend, with a fresh path per store"""
+    paths = iter(range(100))
+
+    def make(**options):
+        path = None
+        if request.param == "filesystem":
+            path = tmp_path / f"grids{next(paths)}"
+        elif request.param == "sqlite":
+            path = tmp_path / f"grids{next(paths)}.db"
+        return create_grid_store(request.param, path=path, **options)
+    return make
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Time seen by the stores, advanced by the tests"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(grid_store.time, "time", lambda: now[0])
+    return now
+
+
+#------------------------------------------------------------------------ Basics ------------------------------------------------------------------------#
+def test_put_get_delete(make_store):
+    store = make_store()
+
+    assert store.get("1") is None
+    store.put("1", b"grid")
+    store.put(2, b"other")
+
+    assert store.get("1") == b"grid"
+    assert store.get("2") == b"other"
+    assert store.delete("1") and not store.delete("1")
+    assert store.get("1") is None
+
+    store.clear()
+    stats = store.stats()
+    assert stats["entries"] == 0 and stats["bytes"] == 0
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+
+
+def test_put_replaces(make_store):
+    store = make_store()
+
+    store.put("1", b"old")
+    store.put("1", b"new grid")
+
+    assert store.get_entry("1").data == b"new grid"
+    assert store.get_entry("1").etag == content_hash(b"new grid")
+    assert store.stats()["entries"] == 1
+
+
+def test_grid_larger_than_the_store_is_not_kept(make_store):
+    store = make_store(max_bytes=10)
+
+    store.put("1", b"small")
+    store.put("1", b"x" * 11)
+
+    assert store.get("1") is None
+
+
+#------------------------------------------------------------------------ Expiry and Eviction ------------------------------------------------------------------------#
+def test_grids_expire_after_the_ttl(make_store, clock):
+    store = make_store(ttl=60)
+
+    store.put("1", b"grid")
+    clock[0] += 59
+    assert store.get_entry("1").stored_at == clock[0] - 59
+    clock[0] += 1
+    assert store.get("1") is None
+    assert store.stats()["expirations"] == 1
+
+
+def test_least_recently_read_grid_is_evicted(make_store, clock):
+    store = make_store(max_entries=2)
+
+    store.put("1", b"one")
+    clock[0] += 1
+    store.put("2", b"two")
+    clock[0] += 1
+    assert store.get("1") == b"one"     # "2" is now the least recently read
+    clock[0] += 1
+    store.put("3", b"three")
+
+    assert store.get("2") is None
+    assert store.get("1") == b"one" and store.get("3") == b"three"
+    assert store.stats()["evictions"] == 1
+
+
+def test_byte_limit_evicts(make_store, clock):
+    # Headers of the filesystem backend count towards its bytes, so leave room for them
+    store = make_store(max_bytes=1000)
+
+    for key in "abc":
+        store.put(key, key.encode() * 400)
+        clock[0] += 1
+
+    assert store.get("a") is None
+    assert store.get("c") is not None
+    assert store.stats()["bytes"] <= 1000
+
+
+#------------------------------------------------------------------------ Meta ------------------------------------------------------------------------#
+def test_meta_is_kept_in_the_grid_entry(make_store):
+    store = make_store(max_entries=1)
+
+    store.put("1", b"grid", meta={"days": {"2": "abc"}})
+    entry = store.get_entry("1")
+
+    assert entry.data == b"grid"
+    assert entry.etag == content_hash(b"grid")
+    assert entry.meta == {"days": {"2": "abc"}}
+    assert store.stats()["entries"] == 1
+
+
+def test_grid_without_meta(make_store):
+    store = make_store()
+
+    store.put("1", b"grid", meta={"a": 1})
+    store.put("1", b"grid 2")
+
+    assert store.get_entry("1").meta is None
+    assert store.get("1") == b"grid 2"
+
+
+#------------------------------------------------------------------------ Backends ------------------------------------------------------------------------#
+def test_memory_store_reports_spooled_grids():
+    store = create_grid_store("memory", spool_threshold=10)
+
+    store.put("small", b"x" * 10)
+    store.put("large", b"x" * 11)
+    stats = store.stats()
+
+    assert stats["spooled_entries"] == 1
+    assert stats["memory_bytes"] == 10 and stats["bytes"] == 21
+    assert store.get("large") == b"x" * 11
+
+
+@pytest.mark.parametrize("backend", ["filesystem", "sqlite"])
+def test_shared_backends_see_each_others_grids(backend, tmp_path):
+    path = tmp_path / ("grids" if backend == "filesystem" else "grids.db")
+    first = create_grid_store(backend, path=path)
+    second = create_grid_store(backend, path=path)
+
+    first.put("1", b"grid", meta={"a": 1})
+
+    assert second.get_entry("1").data == b"grid"
+    assert second.get_entry("1").meta == {"a": 1}
+
+
+def test_sqlite_store_migrates_old_databases(tmp_path):
+    path = tmp_path / "old.db"
+    db = sqlite3.connect(str(path))
+    db.execute("CREATE TABLE grids (grid_key TEXT PRIMARY KEY, data BLOB NOT NULL, size INTEGER NOT NULL,"
+               " stored_at REAL NOT NULL, accessed_at REAL NOT NULL)")
+    db.execute("INSERT INTO grids VALUES ('1', ?, 4, strftime('%s','now'), strftime('%s','now'))", (b"grid",))
+    db.commit()
+    db.close()
+
+    store = SqliteGridStore(path)
+
+    entry = store.get_entry("1")
+    assert entry.data == b"grid" and entry.etag == content_hash(b"grid") and entry.meta is None
+
+
+def test_filesystem_store_reads_files_without_a_header(tmp_path):
+    store = create_grid_store("filesystem", path=tmp_path)
+    store.put("1", b"grid")
+    store._path("1").write_bytes(b"PK legacy")
+
+    entry = store.get_entry("1")
+    assert entry.data == b"PK legacy" and entry.etag == content_hash(b"PK legacy")
+
+
+def test_unknown_backend_and_missing_path():
+    with pytest.raises(ValueError):
+        create_grid_store("redis")
+    with pytest.raises(ValueError):
+        create_grid_store("sqlite")
@@ -0,0 +1,109 @@
+import io
+import random
+import datetime
+
+import openpyxl
+import pytest
+
+from controllers.grid.grid_generator import new_grid_workbook, fill_in_schedule, load_template, GRID_FILL_COLOR
+from controllers.grid.grid_spec import GRID_SPECS
+from controllers.grid.grid_writer import GridXlsxWriter, get_grid_writer, write_schedule
+from controllers.grid.heatmap_generator import HEATMAP_COLORS, coverage_counts, fill_in_heatmap, heatmap_runs
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+
+
+def clock(minute):
+    return datetime.time(minute // 60, minute % 60)
+
+
+def random_avail(rng):
+    """A week of up to three ranges per day, some days missing"""
+    avail = []
+    for dayId in range(1, 8):
+        if rng.random() < 0.1:
+            continue
+        ranges = []
+        for _ in range(rng.randint(0, 3)):
+            start = rng.randrange(5 * 60, 22 * 60, 5) + rng.choice((0, 0, 2))
+            end = min(start + rng.randrange(5, 6 * 60), 23 * 60 + 59)
+            ranges.append({"start_time": clock(start), "end_time": clock(end)})
+        avail.append({"DayId": dayId, "DayRanges": ranges})
+    return avail
+
+
+def edge_avails():
+    """Whole days free, no ranges at all, and ranges touching the grid edges"""
+    whole = [{"start_time": datetime.time(6), "end_time": datetime.time(22)}]
+    edges = [{"start_time": datetime.time(6), "end_time": datetime.time(6, 30)},
+             {"start_time": datetime.time(21, 30), "end_time": datetime.time(22)}]
+    return [[{"DayId": dayId, "DayRanges": whole} for dayId in range(1, 8)],
+            [{"DayId": dayId, "DayRanges": []} for dayId in range(1, 8)],
+            [{"DayId": 2, "DayRanges": edges}, {"DayId": 6, "DayRanges": whole}]]
+
+
+def reload(data):
+    return openpyxl.load_workbook(io.BytesIO(data)).active
+
+
+def saved(wb):
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def cells(ws):
+    """Value and fill of every cell of the sheet"""
+    return {cell.coordinate: (cell.value, cell.fill.fill_type, cell.fill.fgColor.rgb)
+            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, max_col=ws.max_column) for cell in row}
+
+
+def assert_same_sheet(ws, expected):
+    assert (ws.max_row, ws.max_column) == (expected.max_row, expected.max_column)
+    assert sorted(map(str, ws.merged_cells.ranges)) == sorted(map(str, expected.merged_cells.ranges))
+    got, want = cells(ws), cells(expected)
+    assert [coordinate for coordinate in want if got[coordinate] != want[coordinate]] == []
+
+
+#------------------------------------------------------------------------ Against fill_in_schedule ------------------------------------------------------------------------#
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_streamed_grids_match_painted_workbooks(step):
+    spec = GRID_SPECS[step]
+    rng = random.Random(step)
+
+    for avail in edge_avails() + [random_avail(rng) for _ in range(2)]:
+        wb = new_grid_workbook(spec)
+        fill_in_schedule(wb.active, "1", GRID_FILL_COLOR, avail=avail, spec=spec)
+        expected = reload(saved(wb))
+
+        written = io.BytesIO()
+        assert write_schedule("1", written, avail=avail, spec=spec)
+        streamed = b"".join(get_grid_writer(spec).iter_xlsx(availability_to_masks(avail, spec)))
+
+        # A seekable file and a stream get different zip headers, the sheets must match all the same
+        assert_same_sheet(reload(written.getvalue()), expected)
+        assert_same_sheet(reload(streamed), expected)
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_blank_grid_matches_the_template(step):
+    spec = GRID_SPECS[step]
+
+    streamed = b"".join(get_grid_writer(spec).iter_xlsx({}))
+
+    assert_same_sheet(reload(streamed), reload(saved(new_grid_workbook(spec))))
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_several_colors_match_the_painted_heatmap(step):
+    spec = GRID_SPECS[step]
+    rng = random.Random(step + 1)
+    availabilities = [random_avail(rng) for _ in range(9)]
+    counts = coverage_counts(availabilities, spec)
+
+    wb = new_grid_workbook(spec)
+    fill_in_heatmap(wb.active, counts, len(availabilities), spec=spec)
+    wb.active.cell(row=spec.first_row - 2, column=spec.last_col + 1).value = None
+    writer = GridXlsxWriter(load_template(spec), colors=HEATMAP_COLORS, spec=spec)
+    streamed = b"".join(writer.iter_xlsx({}, runs=heatmap_runs(counts, len(availabilities))))
+
+    assert_same_sheet(reload(streamed), reload(saved(wb)))
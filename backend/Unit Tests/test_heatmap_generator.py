@@ -0,0 +1,92 @@
+import random
+import datetime
+from fractions import Fraction
+
+import pytest
+
+from controllers.grid.grid_generator import new_grid_workbook
+from controllers.grid.grid_spec import GRID_SPECS
+from controllers.grid.heatmap_generator import HEATMAP_COLORS, coverage_counts, fill_in_heatmap, heatmap_color
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+
+
+def clock(minute):
+    return datetime.time(minute // 60, minute % 60)
+
+
+def random_avail(rng):
+    """A week of up to three ranges per day, some days missing"""
+    avail = []
+    for dayId in range(1, 8):
+        if rng.random() < 0.1:
+            continue
+        ranges = []
+        for _ in range(rng.randint(0, 3)):
+            start = rng.randrange(5 * 60, 22 * 60, 5) + rng.choice((0, 0, 2))
+            end = min(start + rng.randrange(5, 6 * 60), 23 * 60 + 59)
+            ranges.append({"start_time": clock(start), "end_time": clock(end)})
+        avail.append({"DayId": dayId, "DayRanges": ranges})
+    return avail
+
+
+def brute_force_counts(availabilities, spec):
+    """Per-slot counts summing one bit of every employee's day mask at a time"""
+    counts = {dayId: [0] * spec.num_slots for dayId in spec.day_order}
+    for avail in availabilities:
+        for dayId, mask in availability_to_masks(avail, spec).items():
+            for slot in range(spec.num_slots):
+                counts[dayId][slot] += mask >> slot & 1
+    return counts
+
+
+def brute_force_bucket(count, total, levels=len(HEATMAP_COLORS) - 1):
+    """Index of the shade: 0 for nobody, else the first level whose upper share bound covers count / total"""
+    if count == 0:
+        return 0
+    share = Fraction(count, total)
+    return next(level for level in range(1, levels + 1) if share <= Fraction(level, levels))
+
+
+#------------------------------------------------------------------------ Against Brute Force ------------------------------------------------------------------------#
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_cells_match_brute_force_counts_and_shades(step):
+    spec = GRID_SPECS[step]
+    rng = random.Random(step)
+    availabilities = [random_avail(rng) for _ in range(23)]
+    counts = coverage_counts(availabilities, spec)
+    expected = brute_force_counts(availabilities, spec)
+    assert counts == expected
+
+    wb = new_grid_workbook(spec)
+    ws = wb.active
+    fill_in_heatmap(ws, counts, len(availabilities), show_counts=True, spec=spec)
+
+    for dayId in spec.day_order:
+        for slot in range(spec.num_slots):
+            cell = ws.cell(row=spec.row_of(dayId), column=spec.column_of(slot))
+            color = HEATMAP_COLORS[brute_force_bucket(expected[dayId][slot], len(availabilities))]
+            assert cell.value == expected[dayId][slot], (dayId, slot)
+            assert cell.fill.fgColor.rgb[-6:].lower() == color, (dayId, slot)
+
+
+@pytest.mark.parametrize("total", [1, 2, 3, 6, 7, 13, 100])
+def test_every_count_gets_its_brute_force_shade(total):
+    for count in range(total + 1):
+        assert heatmap_color(count, total) == HEATMAP_COLORS[brute_force_bucket(count, total)], count
+    assert heatmap_color(total, total) == HEATMAP_COLORS[-1]
+
+
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+def test_label_keeps_the_template_header(step):
+    spec = GRID_SPECS[step]
+    ws = new_grid_workbook(spec).active
+    labelCell = ws.cell(row=spec.first_row - 2, column=spec.last_col + 1)
+    header = {cell.coordinate: cell.value for cell in ws[spec.first_row - 2]}
+
+    fill_in_heatmap(ws, coverage_counts([], spec), 0, spec=spec)
+
+    assert header[labelCell.coordinate] is None
+    assert labelCell.value == "Coverage: 0 employees"
+    assert {coordinate: ws[coordinate].value for coordinate in header if coordinate != labelCell.coordinate} == \
+        {coordinate: value for coordinate, value in header.items() if coordinate != labelCell.coordinate}
+    assert ws.cell(row=spec.first_row - 2, column=spec.first_col).value == "Last: "
@@ -0,0 +1,146 @@
+import io
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from controllers.api import http_transport
+from controllers.api.http_transport import HttpTransport, backoff_delay
+
+
+def response(status, headers=None):
+    result = requests.Response()
+    result.status_code = status
+    result.headers.update(headers or {})
+    result.raw = io.BytesIO(b"")
+    return result
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Records the backoff delays instead of sleeping"""
+    delays = []
+    monkeypatch.setattr(http_transport.time, "sleep", delays.append)
+    return delays
+
+
+def scripted(monkeypatch, transport, outcomes):
+    """Makes the transport's session answer with `outcomes` in order (responses, or exceptions to raise)"""
+    outcomes = list(outcomes)
+
+    def request(method, url, **kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(transport.session, "request", request)
+
+
+#------------------------------------------------------------------------ Retries ------------------------------------------------------------------------#
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retryable_status_is_retried(monkeypatch, sleeps, status):
+    transport = HttpTransport(max_retries=3)
+    scripted(monkeypatch, transport, [response(status), response(status), response(200)])
+
+    assert transport.get("http://api.invalid").status_code == 200
+
+    stats = transport.stats()
+    assert (stats["requests"], stats["retries"], stats["failures"]) == (3, 2, 0)
+    assert len(sleeps) == 2
+
+
+def test_other_errors_are_not_retried(monkeypatch, sleeps):
+    transport = HttpTransport()
+    scripted(monkeypatch, transport, [response(404)])
+
+    assert transport.get("http://api.invalid").status_code == 404
+    assert transport.stats()["retries"] == 0 and sleeps == []
+
+
+def test_last_retryable_response_is_returned(monkeypatch, sleeps):
+    transport = HttpTransport(max_retries=2)
+    scripted(monkeypatch, transport, [response(503)] * 3)
+
+    assert transport.get("http://api.invalid").status_code == 503
+    stats = transport.stats()
+    assert (stats["requests"], stats["retries"]) == (3, 2)
+
+
+def test_timeouts_are_retried_then_raised(monkeypatch, sleeps):
+    transport = HttpTransport(max_retries=1)
+    scripted(monkeypatch, transport, [requests.exceptions.ReadTimeout(), requests.exceptions.ConnectTimeout()])
+
+    with pytest.raises(requests.exceptions.Timeout):
+        transport.get("http://api.invalid")
+
+    stats = transport.stats()
+    assert (stats["requests"], stats["retries"], stats["timeouts"], stats["failures"]) == (2, 1, 2, 1)
+
+
+def test_dropped_connection_is_retried(monkeypatch, sleeps):
+    transport = HttpTransport()
+    scripted(monkeypatch, transport, [requests.exceptions.ConnectionError(), response(200)])
+
+    assert transport.post("http://api.invalid").status_code == 200
+    assert transport.stats()["retries"] == 1
+
+
+def test_retry_after_is_honoured(monkeypatch, sleeps):
+    transport = HttpTransport(backoff_max=8)
+    scripted(monkeypatch, transport, [response(429, {"Retry-After": "3"}), response(429, {"Retry-After": "60"}),
+                                      response(200)])
+
+    transport.get("http://api.invalid")
+
+    assert sleeps == [3.0, 8]
+
+
+#------------------------------------------------------------------------ Backoff ------------------------------------------------------------------------#
+def test_backoff_ceiling_doubles_up_to_the_maximum(monkeypatch):
+    monkeypatch.setattr(http_transport.random, "uniform", lambda low, high: high)
+
+    assert [backoff_delay(attempt, base=0.5, maximum=3) for attempt in range(1, 6)] == [0.5, 1, 2, 3, 3]
+
+
+def test_backoff_is_jittered_below_the_ceiling():
+    delays = [backoff_delay(3, base=0.5, maximum=8) for _ in range(200)]
+
+    assert all(0 <= delay <= 2 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_retry_after_date_falls_back_to_the_backoff(monkeypatch):
+    monkeypatch.setattr(http_transport.random, "uniform", lambda low, high: high)
+
+    assert backoff_delay(2, base=1, maximum=8, retry_after="Wed, 21 Oct 2015 07:28:00 GMT") == 2
+
+
+#------------------------------------------------------------------------ Pool ------------------------------------------------------------------------#
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connections_are_reused():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = HttpTransport()
+    try:
+        for _ in range(5):
+            assert transport.get(f"http://127.0.0.1:{server.server_port}/").text == "ok"
+        stats = transport.stats()
+    finally:
+        transport.close()
+        server.shutdown()
+        server.server_close()
+
+    assert stats["connections_opened"] == 1 and stats["pool_hits"] == 4
@@ -0,0 +1,109 @@
+import re
+import zlib
+import struct
+import datetime
+
+import pytest
+
+from controllers.grid.grid_spec import GRID_SPECS, DEFAULT_GRID_SPEC
+from controllers.grid.image_renderer import (render_grid, render_key, RENDER_FORMATS, HOUR_WIDTH, LABEL_WIDTH,
+                                             TITLE_HEIGHT, HEADER_HEIGHT, ROW_HEIGHT, PDF_PAGE)
+from controllers.grid.helper_classes.availability_mask import availability_to_masks, runs_from_masks
+
+
+AVAIL = [{"DayId": 2, "DayRanges": [{"start_time": datetime.time(8), "end_time": datetime.time(10)}]},
+         {"DayId": 5, "DayRanges": [{"start_time": datetime.time(6), "end_time": datetime.time(22)}]}]
+MASKS = availability_to_masks(AVAIL)
+
+
+def png_chunks(data):
+    """(kind, payload) of every chunk, checking each CRC"""
+    chunks, position = [], 8
+    while position < len(data):
+        length, = struct.unpack(">I", data[position:position + 4])
+        kind, payload = data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        crc, = struct.unpack(">I", data[position + 8 + length:position + 12 + length])
+        assert crc == zlib.crc32(kind + payload)
+        chunks.append((kind, payload))
+        position += 12 + length
+    return chunks
+
+
+#------------------------------------------------------------------------ Formats ------------------------------------------------------------------------#
+@pytest.mark.parametrize("step", sorted(GRID_SPECS))
+@pytest.mark.parametrize("title", [None, "170600001"])
+def test_png_has_the_scene_size(step, title):
+    spec = GRID_SPECS[step]
+    data = render_grid("png", availability_to_masks(AVAIL, spec), spec=spec, title=title)
+
+    assert data.startswith(b"\x89PNG\r\n\x1a\n")
+    chunks = png_chunks(data)
+    assert [kind for kind, _ in chunks] == [b"IHDR", b"IDAT", b"IEND"]
+    width, height, depth, colorType = struct.unpack(">IIBB", chunks[0][1][:10])
+    assert width == LABEL_WIDTH + HOUR_WIDTH * (spec.end_hour - spec.start_hour) + 1
+    assert height == (TITLE_HEIGHT if title else 0) + HEADER_HEIGHT + ROW_HEIGHT * len(spec.day_order) + 1
+    assert (depth, colorType) == (8, 2)
+    assert len(zlib.decompress(chunks[1][1])) == height * (1 + width * 3)
+
+
+def test_pdf_is_one_letter_page_with_a_valid_xref():
+    data = render_grid("pdf", MASKS, title="170600001")
+
+    assert data.startswith(b"%PDF-1.4\n") and data.endswith(b"%%EOF\n")
+    assert f"/MediaBox [0 0 {PDF_PAGE[0]} {PDF_PAGE[1]}]".encode() in data
+    assert b"/Count 1" in data
+    xref = int(re.search(rb"startxref\n(\d+)\n", data).group(1))
+    assert data[xref:xref + 4] == b"xref"
+    offsets = [int(offset) for offset in re.findall(rb"(\d{10}) 00000 n", data)]
+    assert [data[offset:].split(b" ", 1)[0] for offset in offsets] == [str(n).encode() for n in range(1, 6)]
+
+
+@pytest.mark.parametrize("fmt", ["svg", "html"])
+def test_title_is_escaped(fmt):
+    data = render_grid(fmt, MASKS, title='<script>alert("x")</script> & co').decode("utf-8")
+
+    assert "<script>" not in data
+    assert "&lt;script&gt;" in data and "&amp; co" in data
+
+
+def test_svg_paints_every_run():
+    data = render_grid("svg", MASKS, color="ABCDEF").decode("utf-8")
+
+    runs = runs_from_masks(MASKS, "abcdef")
+    assert data.count('fill="#abcdef"') == sum(len(dayRuns) for dayRuns in runs.values())
+
+
+def test_html_cells_span_the_whole_day():
+    data = render_grid("html", MASKS).decode("utf-8")
+
+    for row in re.findall(r"<tr><th style=\"text-align:left;.*?</tr>", data):
+        assert sum(map(int, re.findall(r'<td colspan="(\d+)"', row))) == DEFAULT_GRID_SPEC.num_slots
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        render_grid("gif", MASKS)
+
+
+#------------------------------------------------------------------------ Render Key ------------------------------------------------------------------------#
+def test_render_key_is_stable():
+    key = render_key("png", MASKS, "8DB4E2", title="1")
+
+    assert key == render_key("png", dict(reversed(list(MASKS.items()))), "8db4e2", title="1")
+    assert key == render_key("png", runs=runs_from_masks(MASKS, "8db4e2"), title="1")
+    assert re.fullmatch(r"[0-9a-f]{32}", key)
+
+
+@pytest.mark.parametrize("change", [
+    {"fmt": "svg"}, {"title": "2"}, {"color": "ff0000"}, {"spec": GRID_SPECS[30]},
+    {"masks": {**MASKS, 2: MASKS[2] >> 1}},
+])
+def test_render_key_changes_with_every_input(change):
+    inputs = {"fmt": "png", "masks": MASKS, "color": "8db4e2", "title": "1", "spec": DEFAULT_GRID_SPEC, **change}
+
+    assert render_key(**inputs) != render_key("png", MASKS, "8db4e2", spec=DEFAULT_GRID_SPEC, title="1")
+
+
+@pytest.mark.parametrize("fmt", RENDER_FORMATS)
+def test_equal_keys_render_equal_bytes(fmt):
+    assert render_grid(fmt, MASKS, title="1") == render_grid(fmt, dict(MASKS), title="1")
@@ -0,0 +1,48 @@
+import datetime
+
+from controllers.grid.grid_store import create_grid_store
+from controllers.grid.incremental_render import IncrementalGridRenderer, stored_masks
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+
+
+def day(dayId, start, end):
+    return {"DayId": dayId, "DayRanges": [{"start_time": datetime.time(start), "end_time": datetime.time(end)}]}
+
+
+def test_fingerprints_live_in_the_grid_entry():
+    store = create_grid_store("memory", max_entries=1)
+    renderer = IncrementalGridRenderer(store)
+
+    data, changed = renderer.render("g", [day(2, 8, 10)])
+    assert len(changed) == 7
+
+    # One grid fills the store: the fingerprints take no entry of their own and nothing was evicted
+    stats = store.stats()
+    assert stats["entries"] == 1 and stats["evictions"] == 0
+    assert store.get("g.days") is None
+    assert store.get_entry("g").meta["days"]["2"]
+
+    assert renderer.render("g", [day(2, 8, 10)]) == (data, [])
+    assert renderer.render("g", [day(2, 8, 10), day(3, 9, 11)])[1] == [3]
+
+
+def test_forget_drops_the_grid():
+    store = create_grid_store("memory")
+    renderer = IncrementalGridRenderer(store)
+    renderer.render("g", [day(2, 8, 10)])
+
+    renderer.forget("g")
+
+    assert store.get("g") is None
+    assert len(renderer.render("g", [day(2, 8, 10)])[1]) == 7
+
+
+def test_masks_are_stored_with_the_grid():
+    store = create_grid_store("memory")
+    renderer = IncrementalGridRenderer(store)
+    avail = [day(2, 8, 10), day(6, 6, 22)]
+
+    renderer.render("g", avail)
+
+    assert stored_masks(store.get_entry("g").meta) == availability_to_masks(avail)
+    assert stored_masks(None) is None and stored_masks({"days": {}}) is None
@@ -0,0 +1,124 @@
+import threading
+
+import pytest
+
+from controllers.jobs import job_queue as job_module
+from controllers.jobs.job_queue import JobQueue, JobError, JOB_SUCCEEDED, JOB_FAILED, JOB_RUNNING
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=2)
+    yield queue
+    queue.shutdown()
+
+
+def gated(release, calls):
+    """Job function that records its call and blocks until `release` is set"""
+    def run(job, value):
+        calls.append(value)
+        job.update(0.5, "Halfway")
+        release.wait(5)
+        return value * 2
+    return run
+
+
+#------------------------------------------------------------------------ Deduplication ------------------------------------------------------------------------#
+def test_jobs_with_the_same_key_are_shared_while_active(queue):
+    release = threading.Event()
+    calls = []
+    run = gated(release, calls)
+
+    first = queue.submit(run, 1, key="grid:1")
+    same = [queue.submit(run, 1, key="grid:1") for _ in range(5)]
+    other = queue.submit(run, 2, key="grid:2")
+    release.set()
+
+    assert all(job is first for job in same)
+    assert first.wait(5) and other.wait(5)
+    assert sorted(calls) == [1, 2]
+    assert (first.result, other.result) == (2, 4)
+
+    stats = queue.stats()
+    assert (stats["submitted"], stats["deduplicated"], stats["succeeded"]) == (2, 5, 2)
+
+
+def test_finished_job_is_not_shared(queue):
+    first = queue.submit(lambda job: "done", key="grid:1")
+    assert first.wait(5)
+
+    second = queue.submit(lambda job: "again", key="grid:1")
+
+    assert second is not first
+    assert second.wait(5) and second.result == "again"
+
+
+def test_jobs_without_a_key_are_never_shared(queue):
+    jobs = [queue.submit(lambda job: None) for _ in range(3)]
+
+    assert len({job.id for job in jobs}) == 3
+
+
+#------------------------------------------------------------------------ Status and Progress ------------------------------------------------------------------------#
+def test_progress_is_visible_while_running(queue):
+    release = threading.Event()
+    started = threading.Event()
+
+    def run(job):
+        job.update(0.25, "Fetching")
+        started.set()
+        release.wait(5)
+
+    job = queue.submit(run)
+    assert started.wait(5)
+    assert (job.status, job.progress, job.message) == (JOB_RUNNING, 0.25, "Fetching")
+    assert queue.get(job.id) is job
+
+    release.set()
+    assert job.wait(5)
+    assert (job.status, job.progress, job.message) == (JOB_SUCCEEDED, 1.0, "Done")
+
+
+def test_job_error_keeps_its_status(queue):
+    def run(job):
+        raise JobError("No schedule available", status_code=404)
+
+    job = queue.submit(run, key="grid:1")
+    assert job.wait(5)
+
+    assert (job.status, job.error, job.error_status) == (JOB_FAILED, "No schedule available", 404)
+    assert job.to_dict()["error_status"] == 404
+
+
+def test_unexpected_error_is_a_500(queue):
+    def run(job):
+        raise KeyError("DayId")
+
+    job = queue.submit(run)
+    assert job.wait(5)
+
+    assert job.status == JOB_FAILED and job.error_status == 500
+    assert job.error.startswith("KeyError")
+    assert queue.stats()["failed"] == 1
+
+
+#------------------------------------------------------------------------ Retention ------------------------------------------------------------------------#
+def test_finished_jobs_are_forgotten_after_the_retention(monkeypatch):
+    queue = JobQueue(max_workers=1, retention=60)
+    job = queue.submit(lambda job: None)
+    assert job.wait(5)
+    queue.shutdown()
+
+    later = job.finished_at + 61
+    monkeypatch.setattr(job_module.time, "time", lambda: later)
+    assert queue.get(job.id) is None
+
+
+def test_only_max_finished_jobs_are_kept():
+    queue = JobQueue(max_workers=1, max_finished=2)
+    jobs = [queue.submit(lambda job: None) for _ in range(4)]
+    for job in jobs:
+        assert job.wait(5)
+    queue.shutdown()
+
+    assert [queue.get(job.id) is not None for job in jobs] == [False, False, True, True]
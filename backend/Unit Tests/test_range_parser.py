@@ -0,0 +1,95 @@
+import datetime
+
+import pytest
+
+from controllers.grid.helper_classes.range_parser import (
+    parse_day, parse_day_strict, minutes_to_day_ranges, RangeParseError, DAY_END_MINUTE
+)
+from controllers.grid.helper_classes.availability_parser import parse_availability_json
+
+
+def minutes(hour, minute=0):
+    return hour * 60 + minute
+
+
+#------------------------------------------------------------------------ Valid Ranges ------------------------------------------------------------------------#
+@pytest.mark.parametrize("text, expected", [
+    ("8am-10:30am;1pm-5pm", ((minutes(8), minutes(10, 30)), (minutes(13), minutes(17)))),
+    ("12am-12pm", ((0, minutes(12)),)),
+    ("11:59PM-", ((minutes(23, 59), DAY_END_MINUTE),)),
+    ("-11am", ((0, minutes(11)),)),
+    ("-", ((0, DAY_END_MINUTE),)),
+    (" 9 am - 5 pm ", ((minutes(9), minutes(17)),)),
+    ("9am-5pm;;", ((minutes(9), minutes(17)),)),
+    ("", ((0, DAY_END_MINUTE),)),
+    (None, ((0, DAY_END_MINUTE),)),
+])
+def test_valid_day_strings(text, expected):
+    assert parse_day(text) == (expected, ())
+    assert parse_day_strict(text) == expected
+
+
+def test_results_are_memoized():
+    assert parse_day("9am-5pm") is parse_day("9am-5pm")
+
+
+def test_minutes_to_day_ranges():
+    assert minutes_to_day_ranges(((minutes(8), minutes(10, 30)),)) == [
+        {"start_time": datetime.time(8), "end_time": datetime.time(10, 30)}
+    ]
+
+
+#------------------------------------------------------------------------ Malformed Ranges ------------------------------------------------------------------------#
+@pytest.mark.parametrize("segment, reason", [
+    ("13pm-2pm", "hour 13 is not between 1 and 12"),
+    ("0am-2pm", "hour 0 is not between 1 and 12"),
+    ("9:75am-10am", "minute 75 is not between 0 and 59"),
+    ("9-10", "expected '<time>-<time>'"),
+    ("9am", "expected '<time>-<time>'"),
+    ("9am-10am-11am", "expected '<time>-<time>'"),
+    ("noon-1pm", "expected '<time>-<time>'"),
+])
+def test_malformed_ranges_are_reported_and_skipped(segment, reason):
+    text = f"8am-9am;{segment};1pm-2pm"
+
+    ranges, errors = parse_day(text)
+
+    assert ranges == ((minutes(8), minutes(9)), (minutes(13), minutes(14)))
+    assert len(errors) == 1
+    error = errors[0]
+    assert isinstance(error, RangeParseError) and isinstance(error, ValueError)
+    assert (error.text, error.segment, error.position) == (text, segment, len("8am-9am;"))
+    assert error.reason.startswith(reason)
+    assert error.to_dict() == {"text": text, "segment": segment, "position": 8, "reason": error.reason}
+
+
+def test_strict_parse_raises_the_first_error():
+    with pytest.raises(RangeParseError) as info:
+        parse_day_strict("bad;8am-9am;13pm-1pm")
+    assert info.value.segment == "bad" and info.value.position == 0
+
+
+#------------------------------------------------------------------------ Availability Rows ------------------------------------------------------------------------#
+ROWS = [
+    {"DayId": 2, "AvailableRanges": "8am-9am;25pm-1pm;1pm-2pm"},
+    {"DayId": 3, "AvailableRanges": "garbage"},
+    {"DayId": 4, "AvailableRanges": "9am-5pm"},
+]
+
+
+def test_rows_keep_the_valid_ranges_and_collect_the_errors():
+    errors = []
+
+    avail = parse_availability_json(ROWS, errors=errors)
+
+    assert [day["DayId"] for day in avail] == [2, 3, 4]
+    assert avail[0]["DayRanges"] == minutes_to_day_ranges(((minutes(8), minutes(9)), (minutes(13), minutes(14))))
+    assert avail[1]["DayRanges"] == []
+    assert [error.segment for error in errors] == ["25pm-1pm", "garbage"]
+
+
+def test_rows_print_the_errors_without_a_list(capsys):
+    parse_availability_json(ROWS)
+
+    out = capsys.readouterr().out
+    assert "MALFORMED AVAILABILITY FOR DAY 2" in out and "MALFORMED AVAILABILITY FOR DAY 3" in out
@@ -0,0 +1,224 @@
+import time
+import datetime
+import threading
+
+import pytest
+
+from controllers.jobs import roster_warmer
+from controllers.jobs.roster_warmer import RosterWarmer, parse_off_peak
+from controllers.grid.helper_classes.availability_cache import AvailabilityCache
+
+
+AVAIL = [{"DayId": 2, "DayRanges": [{"start_time": datetime.time(8), "end_time": datetime.time(10)}]}]
+
+
+class StubFetch:
+    """Stands in for `get_availability_many`: caches every student except the failing ones and records the calls"""
+
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+        self.lock = threading.Lock()
+
+    def __call__(self, studentIds, force_refresh=False, cache=None, session_manager=None, strategy="auto"):
+        with self.lock:
+            self.calls.append((list(studentIds), strategy))
+        found, errors = {}, {}
+        for studentId in studentIds:
+            if studentId in self.failing:
+                errors[studentId] = RuntimeError(f"{studentId} down")
+            else:
+                cache.put(studentId, AVAIL)
+                found[studentId] = AVAIL
+        return found, errors
+
+
+@pytest.fixture
+def fetch(monkeypatch):
+    stub = StubFetch()
+    monkeypatch.setattr(roster_warmer, "get_availability_many", stub)
+    return stub
+
+
+def warmer(roster, **kwargs):
+    return RosterWarmer(roster, interval=3600, jitter=0.1, base_backoff=60, max_backoff=600,
+                        cache=AvailabilityCache(ttl=24 * 3600), **kwargs)
+
+
+#------------------------------------------------------------------------ Scheduling ------------------------------------------------------------------------#
+def test_only_missing_and_old_students_are_due(fetch):
+    w = warmer(["1", "2", "3"])
+    w.cache.put("1", AVAIL)
+    w.cache.put("2", AVAIL, stored_at=time.time() - 2 * 3600)
+
+    assert w.due() == ["2", "3"]
+    assert w.run_once()["due"] == 2
+    assert w.due() == []
+
+
+def test_small_passes_fetch_per_employee_in_batches(fetch):
+    w = warmer([str(i) for i in range(12)], batch_size=5, concurrency=2)
+
+    run = w.run_once()
+
+    assert run["refreshed"] == 12 and run["failed"] == 0
+    assert sorted(len(batch) for batch, _ in fetch.calls) == [2, 5, 5]
+    assert {strategy for _, strategy in fetch.calls} == {"concurrent"}
+
+
+def test_large_passes_are_one_roster_wide_query(fetch):
+    roster = [str(i) for i in range(roster_warmer.DEFAULT_ROSTER_QUERY_FROM + 5)]
+    w = warmer(roster)
+
+    run = w.run_once()
+
+    assert fetch.calls == [(roster, "auto")]
+    assert run["refreshed"] == len(roster)
+
+
+def test_default_batches_never_reach_the_unfiltered_query():
+    from controllers.api.schedule_source_api import UNFILTERED_QUERY_THRESHOLD
+
+    assert roster_warmer.DEFAULT_BATCH_SIZE < UNFILTERED_QUERY_THRESHOLD
+
+
+#------------------------------------------------------------------------ Backoff ------------------------------------------------------------------------#
+def test_failing_students_back_off_exponentially_up_to_the_maximum(fetch, monkeypatch):
+    w = warmer(["1"])
+    fetch.failing.add("1")
+    clock = [1000.0]
+    monkeypatch.setattr(roster_warmer.time, "time", lambda: clock[0])
+    monkeypatch.setattr(roster_warmer.random, "uniform", lambda low, high: high)
+    delays = []
+
+    for _ in range(6):
+        w.run_once()
+        count, error, retryAt = w._failures["1"]
+        delays.append(retryAt - clock[0])
+        clock[0] = retryAt + 1
+
+    assert delays == pytest.approx([66, 132, 264, 528, 660, 660])
+    assert w._failures["1"][:2] == (6, "1 down")
+
+
+def test_students_waiting_for_a_retry_are_not_due(fetch):
+    w = warmer(["1"])
+    fetch.failing.add("1")
+    w.run_once()
+    retryAt = w._failures["1"][2]
+
+    assert w.due(retryAt - 1) == []
+    assert w.due(retryAt + 1) == ["1"]
+
+
+def test_jitter_spreads_the_retry_times(fetch, monkeypatch):
+    w = warmer(["1", "2"])
+    fetch.failing.update({"1", "2"})
+    draws = iter([0.9, 1.1])
+    monkeypatch.setattr(roster_warmer.random, "uniform", lambda low, high: next(draws))
+    now = time.time()
+    monkeypatch.setattr(roster_warmer.time, "time", lambda: now)
+
+    w.run_once()
+
+    assert w._failures["1"][2] == pytest.approx(now + 54)
+    assert w._failures["2"][2] == pytest.approx(now + 66)
+
+
+def test_success_clears_the_failure(fetch):
+    w = warmer(["1"])
+    fetch.failing.add("1")
+    w.run_once()
+    fetch.failing.clear()
+
+    w._failures["1"] = (1, "down", 0)
+    w.run_once()
+
+    assert w._failures == {}
+
+
+#------------------------------------------------------------------------ Report ------------------------------------------------------------------------#
+def test_report_lists_stale_and_failing_students(fetch):
+    w = warmer(["1", "2", "3"])
+    w.cache.put("1", AVAIL)
+    w.cache.put("2", AVAIL, stored_at=time.time() - 2 * 3600)
+    fetch.failing.add("3")
+    fetch.calls.clear()
+
+    w._record(["3"], *fetch(["3"], cache=w.cache))
+    report = w.report()
+
+    assert report["roster_size"] == 3 and report["fresh"] == 1
+    assert report["stale"]["3"] is None
+    assert report["stale"]["2"] == pytest.approx(7200, abs=5)
+    assert report["failing"]["3"]["failures"] == 1
+    assert report["failing"]["3"]["last_error"] == "3 down"
+    assert not report["running"]
+
+
+def test_report_counts_passes(fetch):
+    w = warmer(["1", "2"])
+    fetch.failing.add("2")
+
+    w.run_once()
+    report = w.report()
+
+    assert report["passes"] == 1 and report["refreshed"] == 1 and report["failed"] == 1
+    assert report["last_run"]["due"] == 2
+    assert list(report["stale"]) == ["2"]
+
+
+#------------------------------------------------------------------------ Off-Peak ------------------------------------------------------------------------#
+def test_parse_off_peak():
+    assert parse_off_peak("") is None
+    assert parse_off_peak("22-6") == (22, 6)
+    for text in ("6-6", "25-3", "night"):
+        with pytest.raises(ValueError):
+            parse_off_peak(text)
+
+
+def test_overnight_window():
+    w = warmer([], off_peak=(22, 6))
+    day = datetime.datetime(2024, 3, 4)
+
+    assert w.in_off_peak(day.replace(hour=23)) and w.in_off_peak(day.replace(hour=5))
+    assert not w.in_off_peak(day.replace(hour=6)) and not w.in_off_peak(day.replace(hour=21))
+    assert w.seconds_until_off_peak(day.replace(hour=23)) == 0
+    assert w.seconds_until_off_peak(day.replace(hour=21, minute=30)) == 30 * 60
+    assert w.seconds_until_off_peak(day.replace(hour=6)) == 16 * 3600
+
+
+def test_daytime_window_opens_the_next_day():
+    w = warmer([], off_peak=(1, 5))
+    day = datetime.datetime(2024, 3, 4)
+
+    assert w.seconds_until_off_peak(day.replace(hour=5)) == 20 * 3600
+    assert w.seconds_until_off_peak(day.replace(hour=0)) == 3600
+
+
+def test_no_pass_runs_outside_off_peak_hours(fetch, monkeypatch):
+    w = warmer(["1"])
+    monkeypatch.setattr(w, "seconds_until_off_peak", lambda when=None: 3600)
+
+    w.start()
+    deadline = time.time() + 2
+    while w.report()["next_run"] is None and time.time() < deadline:
+        time.sleep(0.01)
+    w.stop(timeout=2)
+
+    assert fetch.calls == []
+    assert w.report()["passes"] == 0
+    assert w.report()["next_run"] == pytest.approx(time.time() + 3600, abs=5)
+
+
+def test_passes_run_inside_off_peak_hours(fetch, monkeypatch):
+    w = warmer(["1"])
+    monkeypatch.setattr(w, "seconds_until_off_peak", lambda when=None: 0)
+
+    w.start()
+    deadline = time.time() + 2
+    while w.report()["passes"] == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    w.stop(timeout=2)
+
+    assert fetch.calls == [(["1"], "concurrent")]
@@ -1 +1,134 @@
-#TODO: Add tests for the schedule source API
\ No newline at end of file
+import pytest
+
+from controllers.auth.session_manager import SessionManager
+from controllers.metrics.timing import collect
+from controllers.api.schedule_source_api import (ScheduleSourceAPI, UNFILTERED_QUERY_THRESHOLD,
+                                                 group_availability_rows)
+
+
+class FakeSessionManager:
+    """Hands out fixed tokens without logging in"""
+
+    def get_tokens(self):
+        return "session", "token"
+
+    def refresh(self, stale_token=None):
+        return "session", "token"
+
+
+class LoginResponse:
+    """Successful login response handing out numbered tokens"""
+
+    def __init__(self, number):
+        self.number = number
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"Response": {"SessionId": f"s{self.number}", "APIToken": f"t{self.number}"}}
+
+
+class LoginTransport:
+    """Transport answering every login, counting them"""
+
+    def __init__(self):
+        self.logins = 0
+
+    def post(self, url, **kwargs):
+        self.logins += 1
+        return LoginResponse(self.logins)
+
+
+def rows_of(employee_id):
+    return [{"EmployeeExternalId": employee_id, "DayId": 2, "AvailableRanges": "8am-10am"}]
+
+
+def fake_api(monkeypatch, roster, unfiltered=None):
+    """
+    API whose requests are answered from `roster` (ID -> rows). The unfiltered query returns
+    `unfiltered` instead of the whole roster when given. Returns the API and the list of requests.
+    """
+    api = ScheduleSourceAPI("http://auth.invalid", {"code": "c", "user": "u", "password": "p"},
+                            session_manager=FakeSessionManager())
+    requests = []
+
+    def request_availability(params):
+        employee_id = params.get("EmployeeExternalId")
+        requests.append(employee_id)
+        if employee_id is None:
+            return unfiltered if unfiltered is not None else [row for rows in roster.values() for row in rows]
+        if employee_id not in roster:
+            raise LookupError(f"unknown employee {employee_id}")
+        return roster[employee_id]
+
+    monkeypatch.setattr(api, "_request_availability", request_availability)
+    return api, requests
+
+
+def test_group_availability_rows_leaves_out_ids_without_rows():
+    rows = rows_of("1") + rows_of("3")
+
+    assert group_availability_rows(rows, ["1", "2"]) == {"1": rows_of("1")}
+
+
+def test_unfiltered_refetches_ids_missing_from_the_response(monkeypatch):
+    roster = {"1": rows_of("1"), "2": rows_of("2"), "3": rows_of("3")}
+    api, requests = fake_api(monkeypatch, roster, unfiltered=rows_of("1") + rows_of("3"))
+
+    results, errors = api.get_global_availability_many(["3", "2", "1"], strategy="unfiltered")
+
+    assert results == {"3": rows_of("3"), "2": rows_of("2"), "1": rows_of("1")}
+    assert list(results) == ["3", "2", "1"]
+    assert errors == {}
+    assert requests == [None, "2"]
+
+
+def test_unfiltered_reports_unknown_ids_as_errors(monkeypatch):
+    api, _ = fake_api(monkeypatch, {"1": rows_of("1")})
+
+    results, errors = api.get_global_availability_many(["1", "404"], strategy="unfiltered")
+
+    assert results == {"1": rows_of("1")}
+    assert isinstance(errors["404"], LookupError)
+
+
+def test_paginated_response_falls_back_to_per_employee_requests(monkeypatch):
+    roster = {str(i): rows_of(str(i)) for i in range(UNFILTERED_QUERY_THRESHOLD)}
+    api, requests = fake_api(monkeypatch, roster, unfiltered={"Records": rows_of("0"), "NextPage": 2})
+
+    results, errors = api.get_global_availability_many(list(roster), strategy="auto")
+
+    assert results == roster and errors == {}
+    assert requests[0] is None and sorted(requests[1:]) == sorted(roster)
+
+
+def test_paginated_response_fails_the_unfiltered_strategy(monkeypatch):
+    api, _ = fake_api(monkeypatch, {"1": rows_of("1")}, unfiltered={"Records": rows_of("1")})
+
+    results, errors = api.get_global_availability_many(["1"], strategy="unfiltered")
+
+    assert results == {}
+    assert isinstance(errors["1"], TypeError)
+
+
+def test_unknown_strategy_is_rejected(monkeypatch):
+    api, _ = fake_api(monkeypatch, {})
+
+    with pytest.raises(ValueError):
+        api.get_global_availability_many(["1"], strategy="paged")
+
+
+def test_only_actual_logins_are_timed_as_auth():
+    transport = LoginTransport()
+    manager = SessionManager("http://auth.invalid", {"code": "c", "user": "u", "password": "p"},
+                             transport=transport)
+
+    with collect() as spans:
+        api = ScheduleSourceAPI("http://auth.invalid", {"code": "c", "user": "u", "password": "p"},
+                                session_manager=manager)
+        for _ in range(5):
+            assert api.authenticate()
+
+    assert transport.logins == 1
+    assert [name for name, _ in spans] == ["auth"]
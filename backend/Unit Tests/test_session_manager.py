@@ -0,0 +1,170 @@
+import time
+import threading
+
+import requests
+
+from controllers.auth import session_manager as session_module
+from controllers.auth.session_manager import SessionManager, AuthenticationError
+from controllers.api.schedule_source_api import ScheduleSourceAPI
+
+
+CREDENTIALS = {"code": "c", "user": "u", "password": "p"}
+
+
+class LoginResponse:
+    def __init__(self, number):
+        self.number = number
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"Response": {"SessionId": f"s{self.number}", "APIToken": f"t{self.number}"}}
+
+
+class LoginTransport:
+    """Answers every login after `delay` seconds, counting them; fails them all when `fail` is set"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fail = False
+        self.logins = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        time.sleep(self.delay)
+        if self.fail:
+            raise requests.exceptions.ConnectionError("auth endpoint down")
+        with self._lock:
+            self.logins += 1
+            return LoginResponse(self.logins)
+
+
+def manager_with(transport, **options):
+    return SessionManager("http://auth.invalid", CREDENTIALS, transport=transport, **options)
+
+
+def run_together(target, count):
+    """Runs `target` in `count` threads released at the same time, returns their results"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def run(index):
+        barrier.wait()
+        results[index] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+#------------------------------------------------------------------------ Single Flight ------------------------------------------------------------------------#
+def test_concurrent_first_calls_share_one_login():
+    transport = LoginTransport(delay=0.05)
+    manager = manager_with(transport)
+
+    results = run_together(manager.get_tokens, 16)
+
+    assert transport.logins == 1
+    assert set(results) == {("s1", "t1")}
+
+
+def test_concurrent_refreshes_of_the_same_token_share_one_login():
+    transport = LoginTransport(delay=0.05)
+    manager = manager_with(transport)
+    _, stale = manager.get_tokens()
+
+    results = run_together(lambda: manager.refresh(stale_token=stale), 16)
+
+    assert transport.logins == 2
+    assert set(results) == {("s2", "t2")}
+
+
+def test_refresh_of_an_already_replaced_token_does_not_log_in():
+    transport = LoginTransport()
+    manager = manager_with(transport)
+    _, stale = manager.get_tokens()
+    manager.refresh(stale_token=stale)
+
+    assert manager.refresh(stale_token=stale) == ("s2", "t2")
+    assert transport.logins == 2
+
+
+#------------------------------------------------------------------------ Expiry ------------------------------------------------------------------------#
+def fake_clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(session_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_session_is_reused_until_the_refresh_margin(monkeypatch):
+    now = fake_clock(monkeypatch)
+    transport = LoginTransport()
+    manager = manager_with(transport, max_age=100, refresh_margin=10)
+
+    manager.get_tokens()
+    now[0] += 89
+    assert manager.get_tokens() == ("s1", "t1")
+    assert transport.logins == 1
+
+
+def test_proactive_refresh_inside_the_margin(monkeypatch):
+    now = fake_clock(monkeypatch)
+    transport = LoginTransport()
+    manager = manager_with(transport, max_age=100, refresh_margin=10)
+
+    manager.get_tokens()
+    now[0] += 95
+    assert manager.get_tokens() == ("s2", "t2")
+    assert transport.logins == 2
+
+
+def test_failed_proactive_refresh_keeps_the_valid_session(monkeypatch):
+    now = fake_clock(monkeypatch)
+    transport = LoginTransport()
+    manager = manager_with(transport, max_age=100, refresh_margin=10)
+
+    manager.get_tokens()
+    transport.fail = True
+    now[0] += 95
+    assert manager.get_tokens() == ("s1", "t1")
+
+
+def test_expired_session_logs_in_again(monkeypatch):
+    now = fake_clock(monkeypatch)
+    transport = LoginTransport()
+    manager = manager_with(transport, max_age=100, refresh_margin=10)
+
+    manager.get_tokens()
+    now[0] += 100
+    assert manager.get_tokens() == ("s2", "t2")
+
+
+#------------------------------------------------------------------------ Failures ------------------------------------------------------------------------#
+class UnauthorizedResponse:
+    status_code = 401
+    url = "http://api.invalid/availability"
+    headers = {}
+    content = b""
+
+
+class UnauthorizedTransport:
+    def get(self, url, **kwargs):
+        return UnauthorizedResponse()
+
+
+def test_failed_relogin_is_a_per_employee_error():
+    transport = LoginTransport()
+    manager = manager_with(transport)
+    api = ScheduleSourceAPI("http://auth.invalid", CREDENTIALS, session_manager=manager,
+                            transport=UnauthorizedTransport())
+    transport.fail = True
+
+    for strategy in ("unfiltered", "concurrent", "auto"):
+        results, errors = api.get_global_availability_many(["1", "2"], strategy=strategy)
+        assert results == {}
+        assert all(isinstance(errors[i], AuthenticationError) for i in ("1", "2"))
+    assert issubclass(AuthenticationError, requests.exceptions.RequestException)
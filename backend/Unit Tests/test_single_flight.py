@@ -0,0 +1,96 @@
+import time
+import threading
+
+import pytest
+
+from controllers.jobs.single_flight import SingleFlight
+
+
+def run_together(target, count):
+    """Runs `target` in `count` threads released at the same time; returns their results or exceptions"""
+    barrier = threading.Barrier(count)
+    outcomes = [None] * count
+
+    def run(index):
+        barrier.wait()
+        try:
+            outcomes[index] = target()
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+def slow(calls, value, delay=0.2):
+    """Function recording its calls and returning `value` after `delay` seconds"""
+    def fn():
+        calls.append(value)
+        time.sleep(delay)
+        return value
+    return fn
+
+
+def test_concurrent_calls_with_the_same_key_run_once():
+    flight = SingleFlight("test")
+    calls = []
+
+    outcomes = run_together(lambda: flight.do("1", slow(calls, ["grid"])), 8)
+
+    assert calls == [["grid"]]
+    assert all(outcome is outcomes[0] for outcome in outcomes)
+    stats = flight.stats()
+    assert (stats["calls"], stats["executions"], stats["coalesced"], stats["in_flight"]) == (8, 1, 7, 0)
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    calls = []
+    keys = iter(range(4))
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            key = next(keys)
+        return flight.do(key, slow(calls, key))
+
+    assert sorted(run_together(call, 4)) == [0, 1, 2, 3]
+    assert sorted(calls) == [0, 1, 2, 3]
+
+
+def test_waiters_receive_the_same_exception():
+    flight = SingleFlight()
+    error = RuntimeError("upstream down")
+    calls = []
+
+    def fail():
+        calls.append(1)
+        time.sleep(0.2)
+        raise error
+
+    outcomes = run_together(lambda: flight.do("1", fail), 5)
+
+    assert len(calls) == 1
+    assert all(outcome is error for outcome in outcomes)
+
+
+def test_nothing_is_cached_after_the_call():
+    flight = SingleFlight()
+    calls = []
+
+    assert flight.do("1", slow(calls, 1, delay=0)) == 1
+    assert flight.do("1", slow(calls, 2, delay=0)) == 2
+    assert calls == [1, 2]
+
+
+def test_arguments_are_passed():
+    flight = SingleFlight()
+
+    assert flight.do("k", lambda a, b=0: a + b, 1, b=2) == 3
+    with pytest.raises(ZeroDivisionError):
+        flight.do("k", lambda: 1 / 0)
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,243 @@
+"""
+cli.py
+
+OVERVIEW:
+    Command line entry point of the backend. The commands used to live in `__main__` blocks of the modules they
+    exercise; they are gathered here so the modules imported by the web app carry no demo code, and every command
+    imports only what it needs (the template and openpyxl for grids, requests for the API checks).
+
+    After `pip install -e .` (see pyproject.toml) it is installed as the `ssgg` command; it also runs as a script,
+    e.g. from cron:
+        python backend/app/cli.py grid                              # prompts for an ID, writes schedule_<id>.xlsx
+        python backend/app/cli.py grid --csv roster.csv --format zip --output grids.zip
+        python backend/app/cli.py heatmap 170600001,170600002       # writes heatmap.xlsx
+        python backend/app/cli.py templates                         # writes the template of every spec
+        python backend/app/cli.py auth                              # checks the login
+        python backend/app/cli.py availability 170601496            # prints one employee's raw availability
+        python backend/app/cli.py warm roster.csv --db availability.db --once
+
+COMMANDS:
+    - grid: One grid, or the export of a whole roster (see `batch_export`).
+    - heatmap: Coverage heatmap of several employees.
+    - templates: Templates of every registered `GridSpec`, for inspection.
+    - auth: Logs in with the configured credentials and prints the session.
+    - availability: Fetches one employee's availability rows.
+    - warm: Prefetches a roster into the availability cache (see `roster_warmer`).
+"""
+
+import time
+import argparse
+from pathlib import Path
+
+
+#------------------------------------------------------------------------ Helpers ------------------------------------------------------------------------#
+def _credentials():
+    """Returns the configured Schedule Source credentials as the dictionary the API clients expect"""
+    from utils.Credentials import load_creds
+
+    creds = load_creds()
+    return {
+        "code": creds.code,
+        "user": creds.user,
+        "password": creds.password
+    }
+
+
+#------------------------------------------------------------------------ Grid ------------------------------------------------------------------------#
+def run_grid(args):
+    """
+    Without --ids or --csv, prompts for one student ID and writes `schedule_<studentId>.xlsx` in the current
+    directory; the template is never overwritten. Otherwise exports the grids of a whole roster and prints the
+    per-ID failures and the throughput.
+    """
+    from controllers.grid.grid_spec import get_grid_spec
+
+    spec = get_grid_spec(args.resolution)
+
+    if args.ids is None and args.csv is None:
+        from controllers.grid.grid_generator import new_grid_workbook, fill_in_schedule, GRID_FILL_COLOR
+
+        wb = new_grid_workbook(spec)
+        ws = wb.active
+
+        studentId = input("Enter the Student ID Number: ")
+        fill_in_schedule(ws, studentId, GRID_FILL_COLOR, spec=spec)
+
+        outputFile = Path.cwd() / f"schedule_{studentId}.xlsx"
+        wb.save(outputFile)
+        print(f"Schedule saved to {outputFile}")
+        return
+
+    from controllers.grid.batch_export import read_ids, export_roster, DEFAULT_RENDER_WORKERS
+
+    studentIds = read_ids(args.csv.read_text()) if args.csv else read_ids(args.ids.split(","))
+    outputFile = args.output or Path.cwd() / ("schedules.zip" if args.format == "zip" else "schedules.xlsx")
+    workers = DEFAULT_RENDER_WORKERS if args.workers is None else args.workers
+
+    report = export_roster(studentIds, outputFile, export_format=args.format, workers=workers,
+                           force_refresh=args.force_refresh, spec=spec)
+
+    for studentId, error in report["failures"].items():
+        print(f"FAILED {studentId}: {error}")
+    print(f"Exported {report['succeeded']}/{report['requested']} grids to {outputFile} "
+          f"in {report['elapsed_seconds']}s ({report['grids_per_second']} grids/s; "
+          f"fetch {report['fetch_seconds']}s, render {report['render_seconds']}s)")
+
+
+def run_heatmap(args):
+    """Writes the coverage heatmap of the given employees to `heatmap.xlsx` in the current directory"""
+    from controllers.grid.heatmap_generator import generate_heatmap
+
+    source = args.ids or input("Enter the Student ID Numbers (comma separated): ")
+    studentIds = [i.strip() for i in source.split(",") if i.strip()]
+    wb, found, errors = generate_heatmap(studentIds)
+
+    for studentId, error in errors.items():
+        print(f"NO AVAILABILITY FOR {studentId}: {error}")
+
+    outputFile = Path.cwd() / "heatmap.xlsx"
+    wb.save(outputFile)
+    print(f"Heatmap of {len(found)} employees saved to {outputFile}")
+
+
+def run_templates(args):
+    """Writes the template of every registered spec to the current directory for inspection"""
+    from controllers.grid.grid_spec import DEFAULT_GRID_SPEC, GRID_SPECS
+    from controllers.grid.grid_generator import load_template, GRID_FILE_NAME
+
+    for step, spec in sorted(GRID_SPECS.items()):
+        if spec == DEFAULT_GRID_SPEC:
+            continue
+        outputFile = Path.cwd() / f"{GRID_FILE_NAME.stem} {spec.name}.xlsx"
+        load_template(spec).save(outputFile)
+        print(f"Template for {step}-minute cells saved to {outputFile}")
+
+
+#------------------------------------------------------------------------ Schedule Source ------------------------------------------------------------------------#
+def run_auth(args):
+    """Logs in with the configured credentials and prints the session and the authentication headers"""
+    from utils.URLs import URLs
+    from controllers.auth.base_auth import BaseAuth
+
+    auth = BaseAuth(URLs.TEST_SITE_AUTH.value, _credentials())
+
+    print("Testing authentication...")
+    if auth.authenticate():
+        print("\n✅ Authentication successful!")
+        print(f"Session ID: {auth.session_id}")
+        print(f"API Token: {auth.api_token}")
+
+        headers = auth.get_auth_headers()
+        print("\nAuthentication Headers:")
+        for key, value in headers.items():
+            print(f"{key}: {value}")
+    else:
+        print("\n❌ Authentication failed!")
+
+
+def run_availability(args):
+    """Fetches and prints one employee's raw availability rows"""
+    from utils.URLs import URLs
+    from controllers.api.schedule_source_api import ScheduleSourceAPI
+
+    api = ScheduleSourceAPI(URLs.TEST_SITE_AUTH.value, _credentials())
+    if api.authenticate():
+        print("\n✅ Authentication successful!")
+        try:
+            print(f"\n[INFO] Fetching availability for EmployeeExternalId: {args.id}")
+            availability = api.get_global_availability(args.id)
+            print("\n[INFO] Employee Availability:", availability)
+        except Exception as e:
+            print("\n[ERROR] Failed to fetch employee availability:", e)
+    else:
+        print("\n❌ Authentication failed!")
+
+
+def run_warm(args):
+    """
+    Warms the availability cache from a roster, e.g. from cron. Pointing the web app at the same cache file
+    (AVAILABILITY_CACHE_DB) lets every worker read what was warmed.
+    """
+    from controllers.grid.batch_export import read_ids
+    from controllers.grid.helper_classes.availability_cache import configure_default_cache, get_default_cache
+    from controllers.jobs.roster_warmer import RosterWarmer, parse_off_peak
+
+    cache = configure_default_cache(db_path=args.db) if args.db else get_default_cache()
+    with open(args.roster, encoding="utf-8-sig") as f:
+        roster = read_ids(f.read())
+
+    warmer = RosterWarmer(roster, interval=args.interval, concurrency=args.concurrency, batch_size=args.batch_size,
+                          jitter=args.jitter, off_peak=parse_off_peak(args.off_peak),
+                          refresh_after=args.refresh_after, cache=cache)
+    if args.once:
+        run = warmer.run_once()
+        report = warmer.report()
+        print(f"Refreshed {run['refreshed']} of {run['due']} due students in {run['duration']:.1f}s, "
+              f"{run['failed']} failed, {len(report['stale'])} of {report['roster_size']} still stale")
+        for studentId, failure in report["failing"].items():
+            print(f"FAILED {studentId}: {failure['last_error']}")
+        return
+
+    warmer.start()
+    try:
+        while True:
+            time.sleep(60)
+            report = warmer.report()
+            print(f"{report['fresh']}/{report['roster_size']} fresh, {len(report['failing'])} failing")
+    except KeyboardInterrupt:
+        warmer.stop()
+
+
+#------------------------------------------------------------------------ Main ------------------------------------------------------------------------#
+def build_parser():
+    """Returns the argument parser of every command. Defaults are literals so no command module is imported."""
+    parser = argparse.ArgumentParser(description="Schedule Source grid generator tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    grid = commands.add_parser("grid", help="generate one grid or export a roster")
+    grid.add_argument("--ids", help="Comma separated external IDs to export")
+    grid.add_argument("--csv", type=Path, help="CSV file of external IDs to export")
+    grid.add_argument("--format", choices=("zip", "workbook"), default="zip",
+                      help="zip: one file per employee, workbook: one sheet per employee")
+    grid.add_argument("--output", type=Path, help="Destination of the export")
+    grid.add_argument("--workers", type=int, help="Render processes for the zip format (0 renders in-process)")
+    grid.add_argument("--force-refresh", action="store_true", help="Bypass the availability cache")
+    grid.add_argument("--resolution", type=int, choices=(5, 15, 30), default=5, help="Minutes per grid cell")
+    grid.set_defaults(run=run_grid)
+
+    heatmap = commands.add_parser("heatmap", help="coverage heatmap of several employees")
+    heatmap.add_argument("ids", nargs="?", help="Comma separated external IDs (prompted when omitted)")
+    heatmap.set_defaults(run=run_heatmap)
+
+    templates = commands.add_parser("templates", help="write the template of every grid resolution")
+    templates.set_defaults(run=run_templates)
+
+    auth = commands.add_parser("auth", help="check the Schedule Source login")
+    auth.set_defaults(run=run_auth)
+
+    availability = commands.add_parser("availability", help="print one employee's raw availability")
+    availability.add_argument("id", nargs="?", default="170601496", help="EmployeeExternalId")
+    availability.set_defaults(run=run_availability)
+
+    warm = commands.add_parser("warm", help="prefetch a roster into the availability cache")
+    warm.add_argument("roster", help="CSV roster (one ID per line or an external_id column)")
+    warm.add_argument("--db", help="SQLite availability cache file to fill (memory only when omitted)")
+    warm.add_argument("--interval", type=float, default=60 * 60, help="seconds between passes")
+    warm.add_argument("--concurrency", type=int, default=2, help="batches fetched at once")
+    warm.add_argument("--batch-size", type=int, default=10, help="students per batch of per-employee requests")
+    warm.add_argument("--jitter", type=float, default=0.1, help="random share of the interval")
+    warm.add_argument("--off-peak", default="", help="hours during which passes may run, e.g. 22-6")
+    warm.add_argument("--refresh-after", type=float, help="age from which a student is fetched again")
+    warm.add_argument("--once", action="store_true", help="run one pass and exit")
+    warm.set_defaults(run=run_warm)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
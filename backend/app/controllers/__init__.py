@@ -0,0 +1,5 @@
+"""
+Backend of the grid generator: Schedule Source clients, grid rendering, background jobs and metrics.
+
+Subpackages are imported on demand; nothing heavy (openpyxl, requests, httpx) is loaded by importing a package.
+"""
@@ -0,0 +1,3 @@
+"""
+Schedule Source API clients (synchronous and asyncio) and their shared HTTP transport.
+"""
@@ -0,0 +1,242 @@
+# Async Schedule Source API
+# asyncio variant of ScheduleSourceAPI built on httpx.AsyncClient.
+# It sends the same SS_AVAILABILITY requests as the synchronous client and returns the same JSON rows.
+# Sessions come from the same SessionManager as the synchronous clients, so both share one login per credential set
+# and its single-flight refresh on 401 or expiry. Logins are rare and go through the manager's blocking transport,
+# so they run in a worker thread instead of blocking the event loop.
+# Every availability request passes through a semaphore so a fan-out over a few hundred employees never has more
+# than `max_concurrency` requests in flight against Schedule Source.
+#
+# Usable from an async web handler (`async with AsyncScheduleSourceAPI(...) as api`) or from a batch script
+# (`asyncio.run(...)`). `auth_url` and `base_url` can point at a local stub server for testing.
+#
+# httpx is an optional dependency, installed with the "async" extra:
+#     pip install -e ".[async]"
+# The synchronous clients and the web app never import this module, so they run without it.
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import asyncio
+
+import httpx
+
+from controllers.auth.session_manager import SessionManager, AuthenticationError, get_session_manager
+from controllers.api.schedule_source_api import (AVAILABILITY_FIELDS, build_availability_headers,
+                                                 group_availability_rows)
+from controllers.api.http_transport import (RETRY_STATUS_CODES, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT,
+                                            DEFAULT_MAX_RETRIES, DEFAULT_BACKOFF_BASE, DEFAULT_BACKOFF_MAX,
+                                            backoff_delay)
+from controllers.metrics.timing import span
+from utils.URLs import URLs
+from utils.Paths import Paths
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+DEFAULT_MAX_CONCURRENCY = 16        # Requests in flight at once against Schedule Source
+
+
+#------------------------------------------------------- Async Schedule Source API ------------------------------------------------------#
+class AsyncScheduleSourceAPI:
+    """
+    asyncio client for Schedule Source employee availability.
+
+    Mirrors ScheduleSourceAPI: `get_global_availability` returns the same rows and
+    `get_global_availability_many` the same (results, errors) pair. Create one instance per
+    event loop and share it between tasks; the connection pool is shared too, and the session
+    with every other client of the same SessionManager.
+
+    Attributes:
+        base_url (str): Base URL for the Schedule Source API endpoints
+        session_manager (SessionManager): Shared owner of the session tokens
+        max_concurrency (int): Maximum requests in flight at once
+    """
+
+#------------------------------------------------------- Constructor ------------------------------------------------------#
+    def __init__(self, auth_url: str, credentials: dict, base_url: str = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 session_manager: SessionManager = None,
+                 client: httpx.AsyncClient = None):
+        """
+        Initialize the async client. No request is sent until the first call.
+
+        Args:
+            auth_url (str): Authentication endpoint URL
+            credentials (dict): Dictionary containing 'code', 'user' and 'password'
+            base_url (str): Base URL of the API. Defaults to URLs.TEST_BASE_URL.
+            max_concurrency (int): Maximum requests in flight at once
+            connect_timeout (float): Seconds allowed to open a connection
+            read_timeout (float): Seconds allowed between bytes of the response
+            max_retries (int): Retries after the first attempt on 429/5xx, timeouts and dropped connections
+            backoff_base (float): Base delay of the exponential backoff in seconds
+            backoff_max (float): Cap for a single backoff delay in seconds
+            session_manager (SessionManager): Session owner to use. Defaults to the process-wide
+                            manager for these credentials, shared with the synchronous clients.
+            client (httpx.AsyncClient): Client to use instead of creating one (it is not closed by `aclose`)
+        """
+        self.session_manager = session_manager or get_session_manager(auth_url, credentials)
+        self.base_url = (base_url or URLs.TEST_BASE_URL.value).rstrip('/')
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._owns_client = client is None
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the underlying HTTP client if this instance created it"""
+        if self._owns_client:
+            await self._client.aclose()
+
+
+#------------------------------------------------------- Authenticate ------------------------------------------------------#
+    async def authenticate(self) -> bool:
+        """Makes sure a session is held, logging in only when needed. Returns False if the login fails."""
+        try:
+            await self._get_tokens()
+            return True
+        except AuthenticationError as e:
+            print(f"Authentication failed: {str(e)}")
+            return False
+
+    async def _get_tokens(self, stale_token: str = None) -> tuple:
+        """
+        Returns (session_id, api_token) from the session manager, replacing the session when
+        `stale_token` was rejected. A login blocks, so the manager is called in a worker thread;
+        concurrent callers still share one login through the manager's lock.
+        """
+        if stale_token is not None:
+            return await asyncio.to_thread(self.session_manager.refresh, stale_token=stale_token)
+        return await asyncio.to_thread(self.session_manager.get_tokens)
+
+
+#------------------------------------------------------- Get Global Availability ------------------------------------------------------#
+    async def get_global_availability(self, EmployeeExternalId: str) -> list:
+        """
+        Fetch an employee's global availability ranges from Schedule Source.
+
+        Args:
+            EmployeeExternalId (str): Unique identifier for the employee
+
+        Returns:
+            list: JSON rows with AvailableRanges, EmployeeExternalId, DayId and FirstName
+
+        Raises:
+            httpx.HTTPError: If the API request fails after the retries
+            AuthenticationError: If no session could be obtained
+        """
+        params = {
+            'Fields': AVAILABILITY_FIELDS,
+            'EmployeeExternalId': EmployeeExternalId
+        }
+        return await self._request_availability(params)
+
+
+    async def get_global_availability_many(self, EmployeeExternalIds, strategy: str = "concurrent") -> tuple:
+        """
+        Fetch global availability for many employees.
+
+        Args:
+            EmployeeExternalIds (iterable of str): Employees to fetch. Duplicates are fetched once.
+            strategy (str): "concurrent" (one request per employee, bounded by the semaphore)
+                            or "unfiltered" (one request for the whole roster)
+
+        Returns:
+            tuple: (results, errors) keyed by EmployeeExternalId, as in
+                   ScheduleSourceAPI.get_global_availability_many. As there, IDs missing from the
+                   unfiltered response are fetched per employee.
+        """
+        if strategy not in ("concurrent", "unfiltered"):
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+        ids = list(dict.fromkeys(str(i) for i in EmployeeExternalIds))
+        if not ids:
+            return {}, {}
+
+        if strategy == "unfiltered":
+            try:
+                rows = await self._request_availability({'Fields': AVAILABILITY_FIELDS})
+                if not isinstance(rows, list):
+                    raise TypeError(f"Expected a list of availability rows, got {type(rows).__name__}")
+                grouped = group_availability_rows(rows, ids)
+            except (httpx.HTTPError, AuthenticationError, KeyError, TypeError) as e:
+                return {}, {employee_id: e for employee_id in ids}
+
+            missing = [employee_id for employee_id in ids if employee_id not in grouped]
+            refetched, errors = await self._get_availability_concurrent(missing) if missing else ({}, {})
+            grouped.update(refetched)
+            return {i: grouped[i] for i in ids if i in grouped}, errors
+
+        return await self._get_availability_concurrent(ids)
+
+
+    async def _get_availability_concurrent(self, ids: list) -> tuple:
+        """Fetches each employee with its own request, bounded by the semaphore"""
+        outcomes = await asyncio.gather(*(self.get_global_availability(i) for i in ids), return_exceptions=True)
+
+        results = {}
+        errors = {}
+        for employee_id, outcome in zip(ids, outcomes):
+            if isinstance(outcome, Exception):
+                errors[employee_id] = outcome
+            else:
+                results[employee_id] = outcome
+        return results, errors
+
+
+#------------------------------------------------------- Request Availability ------------------------------------------------------#
+    async def _request_availability(self, params: dict):
+        """Sends one GET to the SS_AVAILABILITY endpoint, re-authenticating once on a 401"""
+        endpoint = f"{self.base_url}{Paths.SS_AVAILABILITY.value}"
+
+        with span("availability_fetch"):
+            session_id, api_token = await self._get_tokens()
+            response = await self._send("GET", endpoint, headers=build_availability_headers(session_id, api_token),
+                                        params=params)
+
+            # Handle unauthorized access by re-authenticating
+            if response.status_code == 401:
+                session_id, api_token = await self._get_tokens(stale_token=api_token)
+                response = await self._send("GET", endpoint, headers=build_availability_headers(session_id, api_token),
+                                            params=params)
+
+            response.raise_for_status()
+            return response.json()
+
+
+    async def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request under the concurrency semaphore, retrying 429/5xx responses,
+        timeouts and dropped connections with jittered exponential backoff.
+        """
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    response = await self._client.request(method, url, **kwargs)
+            except (httpx.TimeoutException, httpx.TransportError):
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+
+            # Back off outside the semaphore so waiting retries do not hold a slot
+            attempt += 1
+            await asyncio.sleep(backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after))
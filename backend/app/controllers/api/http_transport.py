@@ -0,0 +1,257 @@
+# HTTP Transport
+# Shared HTTP layer for every call made to Schedule Source (auth and data endpoints).
+# It keeps a pooled keep-alive requests.Session so TCP+TLS connections are reused between calls,
+# applies connect/read timeouts so a slow upstream cannot pin a worker, and retries 429/5xx
+# responses and dropped connections with jittered exponential backoff.
+# Counters for requests, pool hits, retries, timeouts and recent latencies are exposed through `stats()`.
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import time
+import random
+import threading
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+DEFAULT_POOL_SIZE = 10              # Keep-alive connections kept per host
+DEFAULT_CONNECT_TIMEOUT = 3.05      # Seconds to establish a connection
+DEFAULT_READ_TIMEOUT = 20           # Seconds to wait for the server between bytes
+DEFAULT_MAX_RETRIES = 3             # Extra attempts after the first one
+DEFAULT_BACKOFF_BASE = 0.5          # First backoff delay in seconds, doubled on every retry
+DEFAULT_BACKOFF_MAX = 8             # Upper bound for a single backoff delay in seconds
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+LATENCY_SAMPLE_SIZE = 1024          # Number of recent request latencies kept for percentiles
+
+
+#------------------------------------------------------- HttpTransport ------------------------------------------------------#
+class HttpTransport:
+    """
+    Pooled, keep-alive HTTP client with timeouts and bounded retries.
+
+    Safe to share between threads; BaseAuth and ScheduleSourceAPI use one process-wide
+    instance by default (see `get_default_transport`).
+
+    Attributes:
+        session (requests.Session): Underlying session holding the connection pools
+        timeout (tuple): (connect, read) timeout in seconds applied to every request
+        max_retries (int): Number of retries after the first attempt
+    """
+
+#------------------------------------------------------- Constructor ------------------------------------------------------#
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX):
+        """
+        Initialize the transport.
+
+        Args:
+            pool_size (int): Maximum keep-alive connections kept per host
+            connect_timeout (float): Seconds allowed to open a connection
+            read_timeout (float): Seconds allowed between bytes of the response
+            max_retries (int): Retries after the first attempt on 429/5xx, timeouts and dropped connections
+            backoff_base (float): Base delay of the exponential backoff in seconds
+            backoff_max (float): Cap for a single backoff delay in seconds
+        """
+        self.session = requests.Session()
+        # Retries are handled here rather than by urllib3 so they can be counted and jittered
+        self._adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._timeouts = 0
+        self._failures = 0
+        self._latencies = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+
+#------------------------------------------------------- Request ------------------------------------------------------#
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a request, retrying retryable failures with jittered exponential backoff.
+
+        Args:
+            method (str): HTTP method, e.g. "GET" or "POST"
+            url (str): Full request URL
+            **kwargs: Passed to `requests.Session.request` (headers, params, json, ...)
+
+        Returns:
+            requests.Response: The final response. A 429/5xx response is returned as is
+                            once the retries are used up, so callers keep using raise_for_status().
+
+        Raises:
+            requests.exceptions.RequestException: If the last attempt timed out or could not connect
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+
+        while True:
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.Timeout:
+                self._record(started, timeout=True)
+                if attempt >= self.max_retries:
+                    self._count_failure()
+                    raise
+            except requests.exceptions.ConnectionError:
+                self._record(started)
+                if attempt >= self.max_retries:
+                    self._count_failure()
+                    raise
+            else:
+                self._record(started)
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+
+            attempt += 1
+            with self._stats_lock:
+                self._retries += 1
+            time.sleep(self._backoff_delay(attempt, retry_after))
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Sends a GET request through `request`"""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Sends a POST request through `request`"""
+        return self.request("POST", url, **kwargs)
+
+
+#------------------------------------------------------- Backoff ------------------------------------------------------#
+    def _backoff_delay(self, attempt: int, retry_after: str = None) -> float:
+        """Returns how long to wait before the given retry attempt (see `backoff_delay`)"""
+        return backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after)
+
+
+#------------------------------------------------------- Stats ------------------------------------------------------#
+    def _record(self, started: float, timeout: bool = False):
+        """Records the latency of one attempt"""
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._requests += 1
+            self._latencies.append(elapsed)
+            if timeout:
+                self._timeouts += 1
+
+    def _count_failure(self):
+        with self._stats_lock:
+            self._failures += 1
+
+    def stats(self) -> dict:
+        """
+        Returns counters describing connection reuse, retries and latency.
+
+        Returns:
+            dict:
+                - requests: Attempts sent (including retries)
+                - connections_opened: New TCP connections opened by the pools
+                - pool_hits: Requests served on an already-open keep-alive connection
+                - retries: Retries performed after a retryable failure
+                - timeouts: Attempts that hit the connect or read timeout
+                - failures: Requests that raised after all retries
+                - latency_p50 / latency_p95 / latency_p99 / latency_max: Seconds, over recent attempts
+        """
+        connections = 0
+        pool_requests = 0
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is not None:
+                connections += pool.num_connections
+                pool_requests += pool.num_requests
+
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            result = {
+                "requests": self._requests,
+                "connections_opened": connections,
+                "pool_hits": max(pool_requests - connections, 0),
+                "retries": self._retries,
+                "timeouts": self._timeouts,
+                "failures": self._failures,
+            }
+
+        for name, pct in (("latency_p50", 0.50), ("latency_p95", 0.95), ("latency_p99", 0.99)):
+            result[name] = latencies[min(int(len(latencies) * pct), len(latencies) - 1)] if latencies else 0.0
+        result["latency_max"] = latencies[-1] if latencies else 0.0
+        return result
+
+    def close(self):
+        """Closes every pooled connection"""
+        self.session.close()
+
+
+#------------------------------------------------------- Backoff Delay ------------------------------------------------------#
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE, maximum: float = DEFAULT_BACKOFF_MAX,
+                  retry_after: str = None) -> float:
+    """
+    Returns how long to wait before the given retry attempt.
+
+    Uses "full jitter": a random delay between 0 and base * 2^(attempt-1), capped at `maximum`.
+    A numeric Retry-After header from the server takes precedence (still capped).
+
+    Args:
+        attempt (int): Retry number, starting at 1
+        base (float): Delay ceiling of the first retry in seconds
+        maximum (float): Cap for a single delay in seconds
+        retry_after (str): Value of the response's Retry-After header, if any
+
+    Returns:
+        float: Seconds to sleep
+    """
+    if retry_after is not None:
+        try:
+            return min(float(retry_after), maximum)
+        except ValueError:
+            pass  # HTTP-date form, fall back to our own backoff
+
+    ceiling = min(maximum, base * (2 ** (attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+#------------------------------------------------------- Default Transport ------------------------------------------------------#
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> HttpTransport:
+    """Returns the process-wide transport, creating it with the default settings on first use"""
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
+
+
+def configure_default_transport(**options) -> HttpTransport:
+    """
+    Replaces the process-wide transport with one built from the given options.
+
+    Args:
+        **options: Any HttpTransport constructor argument (pool_size, connect_timeout, ...)
+
+    Returns:
+        HttpTransport: The new default transport
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is not None:
+            _default_transport.close()
+        _default_transport = HttpTransport(**options)
+        return _default_transport
@@ -2,26 +2,50 @@
 # This is the Schedule Source API class for handling employee availability data.
 # It provides methods to interact with the Schedule Source API, specifically focusing on retrieving employee global availability information.
 # It handles authentication, request management, and automatic token refresh.
+# Sessions come from a shared SessionManager, so creating a client does not log in again when a session is already held.
 
 #------------------------------------------------------- Imports ------------------------------------------------------#
 
-import sys
-import os
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 
-#------------------------------------------------------- Path Setup ------------------------------------------------------#
-# Get the absolute path of the current file and resolve any symlinks
-# Then navigate up 3 levels to reach app directory:
-# schedule_source_api.py -> api -> controllers -> app
-root_dir = Path(__file__).resolve().parents[2]
-sys.path.append(str(root_dir))
-
-# Now we can import our local modules
-from controllers.auth.base_auth import BaseAuth
+from controllers.auth.base_auth import BaseAuth, BUILD_COOKIE
+from controllers.auth.session_manager import SessionManager, AuthenticationError, get_session_manager
+from controllers.api.http_transport import HttpTransport
+from controllers.metrics.timing import timed
 from utils.URLs import URLs
 from utils.Paths import Paths
-from utils.Credentials import load_creds
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+AVAILABILITY_FIELDS = 'AvailableRanges,EmployeeExternalId,DayId,FirstName'
+DEFAULT_MAX_WORKERS = 8             # Concurrent requests for per-employee batch fetches
+UNFILTERED_QUERY_THRESHOLD = 25     # Batch size from which one unfiltered query beats per-employee requests
+
+
+def build_availability_headers(session_id: str, api_token: str) -> dict:
+    """Returns the headers of an authenticated SS_AVAILABILITY request"""
+    return {
+        "Content-Type": "application/json",
+        "x-api-token": api_token,
+        "x-session-id": session_id,
+        "BuildCookie": BUILD_COOKIE
+    }
+
+
+def group_availability_rows(rows, ids) -> dict:
+    """
+    Groups the rows of an unfiltered availability query by employee, keeping only the requested IDs.
+    A requested ID without any row is left out rather than mapped to an empty list, so the caller can
+    tell an employee the response did not cover from one without availability.
+    """
+    wanted = set(ids)
+    results = {}
+    for row in rows:
+        employee_id = str(row["EmployeeExternalId"])
+        if employee_id in wanted:
+            results.setdefault(employee_id, []).append(row)
+    return results
 
 
 #------------------------------------------------------- Schedule Source API ------------------------------------------------------#
@@ -38,13 +62,15 @@ class ScheduleSourceAPI(BaseAuth):
     
     Attributes:
         base_url (str): Base URL for the Schedule Source API endpoints
+        session_manager (SessionManager): Shared owner of the session tokens
         api_token (str): Current API token for authentication (inherited)
         session_id (str): Current session ID (inherited)
     """
 
 
 #------------------------------------------------------- Constructor ------------------------------------------------------#
-    def __init__(self, auth_url: str, credentials: dict):
+    def __init__(self, auth_url: str, credentials: dict, session_manager: SessionManager = None,
+                 transport: HttpTransport = None):
         """
         Initialize the Schedule Source API client.
         
@@ -52,14 +78,37 @@ class ScheduleSourceAPI(BaseAuth):
             auth_url (str): Authentication endpoint URL
             credentials (dict): Dictionary containing authentication credentials
                             Required keys: 'code', 'user', 'password'
+            session_manager (SessionManager): Session owner to use. Defaults to the
+                            process-wide manager for these credentials.
+            transport (HttpTransport): Pooled HTTP transport for the data calls. Defaults to the
+                            process-wide transport, so connections are reused between clients.
         
         Note:
-            Automatically authenticates upon initialization
+            Automatically authenticates upon initialization, reusing the shared session when one is held
         """
-        super().__init__(auth_url=auth_url, credentials=credentials)
+        super().__init__(auth_url=auth_url, credentials=credentials, transport=transport)
+        self.session_manager = session_manager or get_session_manager(auth_url, credentials)
         self.base_url = URLs.TEST_BASE_URL.value.rstrip('/')
         self.authenticate()
 
+
+#------------------------------------------------------- Authenticate ------------------------------------------------------#
+    def authenticate(self):
+        """
+        Takes the session tokens from the session manager, which only logs in when needed.
+        Not timed here: the "auth" span is recorded by the login itself (BaseAuth.authenticate),
+        so handing out a held session does not count as an authentication.
+        """
+        try:
+            self.session_id, self.api_token = self.session_manager.get_tokens()
+            self._is_authenticated = True
+            return True
+
+        except AuthenticationError as e:
+            print(f"Authentication failed: {str(e)}")
+            self._is_authenticated = False
+            return False
+
     
 #------------------------------------------------------- Get Global Availability ------------------------------------------------------#
     def get_global_availability(self, EmployeeExternalId: str) -> dict:
@@ -81,43 +130,148 @@ class ScheduleSourceAPI(BaseAuth):
                 - FirstName: Employee's first name
         
         Raises:
-            requests.exceptions.RequestException: If the API request fails
+            requests.exceptions.RequestException: If the API request fails after the transport's retries
             
 
         """
+        # Define query parameters for the request
+        params = {
+            'Fields': AVAILABILITY_FIELDS,
+            'EmployeeExternalId': EmployeeExternalId
+        }
+        return self._request_availability(params)
+
+
+#------------------------------------------------------- Get Global Availability (Many) ------------------------------------------------------#
+    def get_global_availability_many(self, EmployeeExternalIds, strategy: str = "auto",
+                                     max_workers: int = DEFAULT_MAX_WORKERS) -> tuple:
+        """
+        Fetch global availability for many employees in one pass.
+
+        Two strategies are available:
+            - "unfiltered": One request for SS_AVAILABILITY without an EmployeeExternalId filter,
+              whose rows are grouped by employee. One round trip for the whole roster.
+            - "concurrent": One request per employee, at most `max_workers` in flight at once.
+        "auto" uses the unfiltered query for batches of UNFILTERED_QUERY_THRESHOLD or more IDs and
+        falls back to concurrent fetches if the upstream rejects it, does not return employee IDs or
+        returns anything but a plain list of rows (e.g. a paginated envelope).
+
+        The unfiltered response only holds the employees the upstream chose to return; requested IDs
+        missing from it are fetched again with the filtered per-employee request, so an ID is never
+        reported as empty just because it was left out of the roster-wide answer.
+
+        Args:
+            EmployeeExternalIds (iterable of str): Employees to fetch. Duplicates are fetched once.
+            strategy (str): "auto", "unfiltered" or "concurrent"
+            max_workers (int): Maximum concurrent requests for the concurrent strategy
+
+        Returns:
+            tuple: (results, errors)
+                - results (dict): EmployeeExternalId -> list of availability rows, in the same format
+                  as `get_global_availability`. An employee with no rows maps to an empty list.
+                - errors (dict): EmployeeExternalId -> exception raised while fetching that employee.
+                  A failure for one employee never fails the rest of the batch.
+        """
+        if strategy not in ("auto", "unfiltered", "concurrent"):
+            raise ValueError(f"Unknown strategy: {strategy}")
+
+        # Keep the caller's order but fetch every ID only once
+        ids = list(dict.fromkeys(str(i) for i in EmployeeExternalIds))
+        if not ids:
+            return {}, {}
+
+        use_unfiltered = strategy == "unfiltered" or (strategy == "auto" and len(ids) >= UNFILTERED_QUERY_THRESHOLD)
+        if use_unfiltered:
+            try:
+                return self._get_availability_unfiltered(ids, max_workers)
+            except (requests.exceptions.RequestException, KeyError, TypeError) as e:
+                if strategy == "unfiltered":
+                    return {}, {employee_id: e for employee_id in ids}
+                print(f"\n[WARNING] Unfiltered availability query failed, fetching per employee: {str(e)}")
+
+        return self._get_availability_concurrent(ids, max_workers)
+
+
+    def _get_availability_unfiltered(self, ids: list, max_workers: int) -> tuple:
+        """
+        Fetches every employee's rows in one request and keeps the requested ones. IDs the response
+        does not cover are fetched per employee, and their failures are reported per ID.
+
+        Raises:
+            TypeError: If the response is not a plain list of rows. A paginated or wrapped response
+                would silently hold only part of the roster.
+        """
+        rows = self._request_availability({'Fields': AVAILABILITY_FIELDS})
+        if not isinstance(rows, list):
+            raise TypeError(f"Expected a list of availability rows, got {type(rows).__name__}")
+
+        grouped = group_availability_rows(rows, ids)
+        missing = [employee_id for employee_id in ids if employee_id not in grouped]
+        if not missing:
+            return {i: grouped[i] for i in ids}, {}
+
+        print(f"\n[WARNING] Unfiltered availability query missed {len(missing)} employees, fetching them per employee")
+        refetched, errors = self._get_availability_concurrent(missing, max_workers)
+        grouped.update(refetched)
+        return {i: grouped[i] for i in ids if i in grouped}, errors
+
+
+    def _get_availability_concurrent(self, ids: list, max_workers: int) -> tuple:
+        """Fetches each employee with its own request, bounded by a thread pool"""
+        results = {}
+        errors = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(ids)))) as executor:
+            futures = {executor.submit(self.get_global_availability, employee_id): employee_id for employee_id in ids}
+            for future in as_completed(futures):
+                employee_id = futures[future]
+                try:
+                    results[employee_id] = future.result()
+                except Exception as e:
+                    errors[employee_id] = e
+
+        # Report in the caller's order rather than completion order
+        return ({i: results[i] for i in ids if i in results},
+                {i: errors[i] for i in ids if i in errors})
+
+
+#------------------------------------------------------- Request Availability ------------------------------------------------------#
+    @timed("availability_fetch")
+    def _request_availability(self, params: dict):
+        """
+        Sends one GET to the SS_AVAILABILITY endpoint, re-authenticating once on a 401.
+
+        Args:
+            params (dict): Query parameters for the request
+
+        Returns:
+            list: Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the API request fails after the transport's retries,
+                or an AuthenticationError (a RequestException) if the re-authentication fails
+        """
+        response = None
         try:
             # Construct the endpoint URL
             endpoint = f"{self.base_url}{Paths.SS_AVAILABILITY.value}"
-            print(f"\n[INFO] Endpoint URL: {endpoint}")
 
             # Set up headers with authentication tokens
-            headers = {
-                "Content-Type": "application/json",
-                "x-api-token": self.api_token,
-                "x-session-id": self.session_id,
-                "BuildCookie": "24060420361420.32735534d2ac453faeb6fc50bf314f4d"
-            }
+            headers = build_availability_headers(self.session_id, self.api_token)
             #print(f"[INFO] Headers: {headers}")
 
-            # Define query parameters for the request
-            params = {
-                'Fields': 'AvailableRanges,EmployeeExternalId,DayId,FirstName',
-                'EmployeeExternalId': EmployeeExternalId
-            }
-
             # Make the API request
-            response = requests.get(endpoint, headers=headers, params=params)
+            response = self.transport.get(endpoint, headers=headers, params=params)
 
             # Handle unauthorized access by re-authenticating
+            # The manager only logs in if no other request has replaced the rejected token yet
             if response.status_code == 401:
                 print("\n[WARNING] Unauthorized. Re-authenticating...")
-                self.authenticate()
+                self.session_id, self.api_token = self.session_manager.refresh(stale_token=headers["x-api-token"])
                 headers.update({
                     "x-api-token": self.api_token,
                     "x-session-id": self.session_id
                 })
-                print(f"[INFO] New Headers after re-authentication: {headers}")
-                response = requests.get(endpoint, headers=headers, params=params)
+                response = self.transport.get(endpoint, headers=headers, params=params)
 
                 
                 
@@ -128,7 +282,7 @@ class ScheduleSourceAPI(BaseAuth):
         except requests.exceptions.RequestException as e:
             # Log error details if a request exception occurs
             print(f"\n[ERROR] Schedule Source API Error: {str(e)}")
-            if response:
+            if response is not None:
                 # Debugging information for the failed request
                 print(f"[DEBUG] Request URL: {response.url}")
                 print(f"[DEBUG] Response Status Code: {response.status_code}")
@@ -136,42 +290,3 @@ class ScheduleSourceAPI(BaseAuth):
                 if response.content:
                     print(f"[DEBUG] Response Content: {response.content.decode()}")
             raise  # Re-raise the exception to propagate the error
-
-
-#------------------------------------------------------- Test Section ------------------------------------------------------#  
-if __name__ == "__main__":
-    """
-    Test functionality of the ScheduleSourceAPI class.
-    
-    This section demonstrates the usage of the ScheduleSourceAPI by:
-    1. Loading credentials from configuration
-    2. Initializing the API client
-    3. Testing authentication
-    4. Retrieving employee availability data
-    
-    Example Usage:
-        $ python schedule_source_api.py
-    """
-    # Load credentials and authenticate
-    creds = load_creds()
-    credentials = {
-        "code": creds.code,
-        "user": creds.user,
-        "password": creds.password
-    }
-
-    # Initialize ScheduleSourceAPI
-    api = ScheduleSourceAPI(URLs.TEST_SITE_AUTH.value, credentials)
-
-    # Test authentication and availability retrieval
-    if api.authenticate():
-        print("\n✅ Authentication successful!")
-        try:
-            EmployeeExternalId = "170601496"
-            print(f"\n[INFO] Fetching availability for EmployeeExternalId: {EmployeeExternalId}")
-            availability = api.get_global_availability(EmployeeExternalId)
-            print("\n[INFO] Employee Availability:", availability)
-        except Exception as e:
-            print("\n[ERROR] Failed to fetch employee availability:", e)
-    else:
-        print("\n❌ Authentication failed!")
\ No newline at end of file
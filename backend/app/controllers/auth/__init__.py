@@ -0,0 +1,3 @@
+"""
+Schedule Source login and the process-wide session manager.
+"""
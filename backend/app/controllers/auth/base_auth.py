@@ -1,63 +1,64 @@
 #------------------------------------------------------- Imports ------------------------------------------------------#
-import os
-import sys
-from pathlib import Path
+import requests
+from controllers.api.http_transport import get_default_transport
+from controllers.metrics.timing import timed
 
 
-#------------------------------------------------------- Path Setup ------------------------------------------------------#
-# Get the absolute path of the current file and resolve any symlinks
-# Then navigate up 2 levels to reach the project root:
-# base_auth.py -> auth -> controllers -> app -> [project_root]
-root_dir = Path(__file__).resolve().parents[2]
-    
-# Add the project root to Python's path
-# This allows Python to find our modules regardless of where the script is run from
-sys.path.append(str(root_dir))
+#------------------------------------------------------- Request Shapes ------------------------------------------------------#
+# Shared by the synchronous BaseAuth and the asyncio client so both log in the same way
+BUILD_COOKIE = "24060420361420.32735534d2ac453faeb6fc50bf314f4d"
 
-# Now we can import our local modules
-import requests
-from utils.Credentials import load_creds
-from utils.URLs import URLs
+AUTH_HEADERS = {
+    "Content-Type": "application/json",
+    "BuildCookie": BUILD_COOKIE,
+}
+
+
+def build_auth_payload(credentials):
+    """Returns the JSON body of a manager-portal login for the given credentials"""
+    return {
+        "ExternalId": "",
+        "Request": {
+            "Portal": "mgr",
+            "Code": credentials["code"],
+            "Username": credentials["user"],
+            "Password": credentials["password"],
+        }
+    }
+
+
+def parse_auth_response(response_json):
+    """Extracts (session_id, api_token) from a login response"""
+    return response_json["Response"]["SessionId"], response_json["Response"]["APIToken"]
 
 
 #------------------------------------------------------- BaseAuth ------------------------------------------------------#
 class BaseAuth:
     """Base authentication class for all API interactions"""
     
-    def __init__(self, auth_url, credentials):
+    def __init__(self, auth_url, credentials, transport=None):
         # Initialize with site-specific auth URL and credentials
+        # All HTTP goes through the pooled transport (the shared process-wide one unless given)
         self.auth_url = auth_url
         self.credentials = credentials
+        self.transport = transport or get_default_transport()
         self.session_id = None
         self.api_token = None
         self._is_authenticated = False
 
 
 #------------------------------------------------------- Authenticate ------------------------------------------------------#
+    @timed("auth")
     def authenticate(self):
         """Authenticates with the API and stores session tokens"""
         try:
-            payload = {
-                "ExternalId": "",
-                "Request": {
-                    "Portal": "mgr",
-                    "Code": self.credentials["code"],
-                    "Username": self.credentials["user"],
-                    "Password": self.credentials["password"],
-                }
-            }
+            payload = build_auth_payload(self.credentials)
+            headers = dict(AUTH_HEADERS)
 
-            headers = {
-                "Content-Type": "application/json",
-                "BuildCookie": "24060420361420.32735534d2ac453faeb6fc50bf314f4d",
-            }
-
-            response = requests.post(self.auth_url, headers=headers, json=payload)
+            response = self.transport.post(self.auth_url, headers=headers, json=payload)
             response.raise_for_status()
             
-            response_json = response.json()
-            self.session_id = response_json["Response"]["SessionId"]
-            self.api_token = response_json["Response"]["APIToken"]
+            self.session_id, self.api_token = parse_auth_response(response.json())
             self._is_authenticated = True
             
             return True
@@ -79,36 +80,4 @@ class BaseAuth:
             "Content-Type": "application/json",
             "Authorization": self.api_token,
             "SessionId": self.session_id
-        } 
-        
-
-#------------------------------------------------------- Test Section ------------------------------------------------------#
-if __name__ == "__main__":
-    # Load credentials
-    creds = load_creds()
-    credentials = {
-        "code": creds.code,
-        "user": creds.user,
-        "password": creds.password
-    }
-    
-    # Initialize BaseAuth
-    auth = BaseAuth(URLs.TEST_SITE_AUTH.value, credentials)
-    
-    # Test authentication
-    print("Testing authentication...")
-    success = auth.authenticate()
-    
-    if success:
-        print("\n✅ Authentication successful!")
-        print(f"Session ID: {auth.session_id}")
-        print(f"API Token: {auth.api_token}")
-        
-        # Test getting headers
-        headers = auth.get_auth_headers()
-        print("\nAuthentication Headers:")
-        for key, value in headers.items():
-            print(f"{key}: {value}")
-    else:
-        print("\n❌ Authentication failed!")
-        
\ No newline at end of file
+        }
@@ -0,0 +1,178 @@
+# Session Manager
+# Holds one Schedule Source session (SessionId / APIToken) per credential set for the whole process.
+# Every ScheduleSourceAPI client shares the manager instead of logging in on its own, so a request
+# only pays for the auth round trip when the session is missing, expired or rejected with a 401.
+# Refreshes are single-flight: concurrent callers wait on one login instead of stampeding the auth endpoint.
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import time
+import threading
+
+import requests
+
+from controllers.auth.base_auth import BaseAuth
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+# How long a Schedule Source session is trusted before logging in again (seconds)
+DEFAULT_SESSION_MAX_AGE = 20 * 60
+# Window before expiry in which one caller refreshes while the others keep using the current session
+DEFAULT_REFRESH_MARGIN = 2 * 60
+
+
+class AuthenticationError(requests.exceptions.RequestException):
+    """
+    Raised when the Schedule Source auth endpoint does not hand out a session.
+    A RequestException, so a re-login failing in the middle of a fetch is handled like any other failed request.
+    """
+
+
+#------------------------------------------------------- SessionManager ------------------------------------------------------#
+class SessionManager:
+    """
+    Thread-safe owner of a single Schedule Source session for one credential set.
+
+    Wraps a BaseAuth instance and performs every login for the credentials it holds.
+    Callers ask for the current tokens with `get_tokens()` and report a rejected token
+    with `refresh(stale_token)`; only one login is in flight at any time.
+
+    Attributes:
+        max_age (float): Seconds a session is used before it is considered expired
+        refresh_margin (float): Seconds before expiry at which a proactive refresh starts
+        login_count (int): Number of successful logins performed by this manager
+    """
+
+#------------------------------------------------------- Constructor ------------------------------------------------------#
+    def __init__(self, auth_url: str, credentials: dict,
+                 max_age: float = DEFAULT_SESSION_MAX_AGE,
+                 refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+                 transport=None):
+        """
+        Initialize the session manager.
+
+        Args:
+            auth_url (str): Authentication endpoint URL
+            credentials (dict): Dictionary containing authentication credentials
+                            Required keys: 'code', 'user', 'password'
+            max_age (float): Seconds a session is trusted before logging in again
+            refresh_margin (float): Seconds before expiry at which a refresh is started early
+            transport (HttpTransport): HTTP transport for the login calls. Defaults to the shared one.
+
+        Note:
+            Does not log in until the first call to `get_tokens()`
+        """
+        self._auth = BaseAuth(auth_url=auth_url, credentials=credentials, transport=transport)
+        self._lock = threading.Lock()
+        # (session_id, api_token, issued_at) swapped as one tuple so readers never see a mixed pair
+        self._session = None
+        self.max_age = max_age
+        self.refresh_margin = refresh_margin
+        self.login_count = 0
+
+
+#------------------------------------------------------- Get Tokens ------------------------------------------------------#
+    def get_tokens(self) -> tuple:
+        """
+        Returns the current session, logging in only when there is no usable one.
+
+        Inside the refresh margin a single caller renews the session while everyone else
+        keeps using the still-valid tokens, so the refresh never blocks a request.
+
+        Returns:
+            tuple: (session_id, api_token)
+
+        Raises:
+            AuthenticationError: If a login was required and failed
+        """
+        session = self._session
+        if session is not None:
+            age = time.monotonic() - session[2]
+            if age < self.max_age - self.refresh_margin:
+                return session[0], session[1]
+
+            # Proactive refresh: whoever gets the lock renews, the rest reuse the current tokens
+            if age < self.max_age:
+                if self._lock.acquire(blocking=False):
+                    try:
+                        if self._session is session:
+                            self._login()
+                    except AuthenticationError as e:
+                        print(f"\n[WARNING] Proactive session refresh failed: {str(e)}")
+                    finally:
+                        self._lock.release()
+                current = self._session
+                if current is not None:
+                    return current[0], current[1]
+
+        with self._lock:
+            # Another thread may have logged in while we were waiting for the lock
+            if self._session is None or self._session is session:
+                self._login()
+            current = self._session
+            return current[0], current[1]
+
+
+#------------------------------------------------------- Refresh ------------------------------------------------------#
+    def refresh(self, stale_token: str = None) -> tuple:
+        """
+        Replaces a session the API has rejected (e.g. with a 401).
+
+        Args:
+            stale_token (str): The API token that was rejected. If the manager already
+                            holds a different token, another caller refreshed first and
+                            that session is returned without logging in again.
+
+        Returns:
+            tuple: (session_id, api_token)
+
+        Raises:
+            AuthenticationError: If the login fails
+        """
+        with self._lock:
+            current = self._session
+            if current is None or stale_token is None or current[1] == stale_token:
+                self._login()
+            current = self._session
+            return current[0], current[1]
+
+
+#------------------------------------------------------- Invalidate ------------------------------------------------------#
+    def invalidate(self):
+        """Drops the held session so the next `get_tokens()` logs in again"""
+        with self._lock:
+            self._session = None
+
+
+#------------------------------------------------------- Login ------------------------------------------------------#
+    def _login(self):
+        """Performs the actual login through BaseAuth. Must be called with the lock held."""
+        if not self._auth.authenticate():
+            raise AuthenticationError("Failed to authenticate with the API")
+
+        self._session = (self._auth.session_id, self._auth.api_token, time.monotonic())
+        self.login_count += 1
+
+
+#------------------------------------------------------- Registry ------------------------------------------------------#
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_session_manager(auth_url: str, credentials: dict) -> SessionManager:
+    """
+    Returns the process-wide SessionManager for a credential set, creating it on first use.
+
+    Args:
+        auth_url (str): Authentication endpoint URL
+        credentials (dict): Dictionary containing 'code', 'user' and 'password'
+
+    Returns:
+        SessionManager: The shared manager for these credentials
+    """
+    key = (auth_url, credentials["code"], credentials["user"], credentials["password"])
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = SessionManager(auth_url, credentials)
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,3 @@
+"""
+Grid generation: template, painting, streaming writer, renderers, exports, heatmaps and the who-is-available index.
+"""
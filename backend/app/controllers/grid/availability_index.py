@@ -0,0 +1,398 @@
+"""
+availability_index.py
+
+OVERVIEW:
+    This module answers "who is available on Tuesday from 11:00 to 13:30?" over a whole roster without opening a
+    grid per student.
+
+    The index is the transpose of the day masks of `availability_mask`: instead of one mask per student with one
+    bit per slot, it keeps, for every day and every slot, one integer with one bit per student (the student's
+    position in the index). A query then only touches the slots of its window:
+        - available for the whole window:   AND of the window's slot integers
+        - at least N minutes of the window:  the window's slot integers are summed with a bit-sliced counter
+                                             (plane `k` holds bit `k` of every student's count) and compared
+                                             with N, lane by lane
+        - at least N consecutive minutes:   AND of every N-minute run of slots (built by doubling), then OR
+    Each step is one integer operation over every student at once, so a query costs a few microseconds
+    for a roster of a thousand students, whatever the number of matches.
+
+    Slots use the same convention as the grid: a student is available in a slot when they are available at its
+    start, and a window [start, end) covers the slots starting in it.
+
+FUNCTIONS AND CLASSES:
+    - class AvailabilityIndex:
+        Thread-safe index with update/remove/retain per student and `query`/`count` per day and time window.
+    - build_index(studentIds, force_refresh=False, spec=None, index=None):
+        Fills an index from the availability cache, fetching the misses in one batch.
+    - parse_day_id(day), parse_clock(text):
+        Parse the day names and times accepted by the queries ("tue", "Tuesday", 3 / "11:00", "1:30pm").
+    - get_availability_index():
+        The process-wide index.
+
+USAGE:
+    index, errors = build_index(roster)
+    index.query("tue", "11:00", "13:30")                       # available for the whole window
+    index.query("tue", "11:00", "13:30", min_minutes=60)       # at least an hour of it
+    index.query("tue", "11:00", "13:30", min_minutes=60, contiguous=True)
+
+DEPENDENCIES:
+    - availability_mask: Day masks of the parsed availability.
+    - availability_cache: Source of the parsed availability for `build_index`.
+"""
+
+import re
+import datetime
+import threading
+from itertools import compress
+
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+from controllers.grid.helper_classes.availability_mask import availability_to_masks, span_mask
+from controllers.grid.helper_classes.availability_cache import get_availability_many
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+# DayIds of the Schedule Source API, 1 is Sunday
+DAY_IDS = {"sun": 1, "mon": 2, "tue": 3, "wed": 4, "thu": 5, "fri": 6, "sat": 7}
+
+SPARSE_MATCHES = 64                 # Below this many matches, lanes are listed bit by bit rather than scanned
+
+CLOCK_PATTERN = re.compile(r"^\s*(\d{1,2})(?::(\d{2}))?\s*([ap]m)?\s*$", re.IGNORECASE)
+
+
+def parse_day_id(day):
+    """
+    Returns the DayId of a day given as a DayId or a name ("tue", "Tues", "Tuesday").
+
+    Raises:
+        ValueError: If the day is not recognized
+    """
+    if isinstance(day, int) or str(day).strip().isdigit():
+        dayId = int(day)
+        if 1 <= dayId <= 7:
+            return dayId
+    else:
+        dayId = DAY_IDS.get(str(day).strip().lower()[:3])
+        if dayId is not None:
+            return dayId
+    raise ValueError(f"Unknown day: {day!r} (use 1-7 with 1 = Sunday, or a day name)")
+
+
+def parse_clock(value):
+    """
+    Returns the minute of the day of a time given as minutes, a `datetime.time`, "13:30", "1:30pm" or "11am".
+
+    Raises:
+        ValueError: If the time is not recognized
+    """
+    if isinstance(value, datetime.time):
+        return value.hour * 60 + value.minute
+    if isinstance(value, int):
+        minute = value
+    else:
+        match = CLOCK_PATTERN.match(str(value))
+        if match is None:
+            raise ValueError(f"Unknown time: {value!r} (use 13:30, 1:30pm or 11am)")
+        hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+        if meridiem:
+            if not 1 <= hour <= 12:
+                raise ValueError(f"Unknown time: {value!r}")
+            hour = hour % 12 + (12 if meridiem.lower() == "pm" else 0)
+        minute = hour * 60 + minute
+    if not 0 <= minute <= 24 * 60:
+        raise ValueError(f"Time out of range: {value!r}")
+    return minute
+
+
+#------------------------------------------------------------------------ Bit-sliced helpers ------------------------------------------------------------------------#
+def _at_least(columns, k, lanes):
+    """
+    Returns the lanes (students) set in at least `k` of the `columns`.
+
+    The columns are added with a bit-sliced counter, then every lane's count is compared with `k` from the most
+    significant plane down: `greater` collects the lanes already known to be above `k`, `equal` the lanes equal
+    to `k` so far.
+    """
+    planes = []
+    for column in columns:
+        carry = column
+        for i in range(len(planes)):
+            if not carry:
+                break
+            planes[i], carry = planes[i] ^ carry, planes[i] & carry
+        if carry:
+            planes.append(carry)
+
+    if k.bit_length() > len(planes):
+        return 0
+    greater = 0
+    equal = lanes
+    for i in range(len(planes) - 1, -1, -1):
+        if (k >> i) & 1:
+            equal &= planes[i]
+        else:
+            greater |= equal & planes[i]
+            equal &= ~planes[i]
+    return greater | equal
+
+
+def _consecutive(columns, k):
+    """
+    Returns the lanes set in at least `k` consecutive `columns`.
+
+    Runs are built by doubling: `power[s]` holds the lanes set in the `length` columns starting at `s`, and the
+    runs of the binary decomposition of `k` are chained into `runs`.
+    """
+    power = list(columns)
+    length = 1
+    runs = None
+    runLength = 0
+    while k:
+        if k & 1:
+            if runs is None:
+                runs, runLength = power, length
+            else:
+                runs = [a & b for a, b in zip(runs, power[runLength:])]
+                runLength += length
+        k >>= 1
+        if k:
+            power = [a & b for a, b in zip(power, power[length:])]
+            length *= 2
+
+    result = 0
+    for run in runs or ():
+        result |= run
+    return result
+
+
+#------------------------------------------------------------------------ Index ------------------------------------------------------------------------#
+class AvailabilityIndex:
+    """
+    Who-is-available index over the parsed availability of many students.
+
+    Parameters:
+        spec (GridSpec, optional): Slot geometry of the index, the default grid (5-minute slots) when omitted.
+            Queries are answered at this resolution.
+    """
+
+    def __init__(self, spec=None):
+        self.spec = spec or DEFAULT_GRID_SPEC
+        self._lock = threading.Lock()
+        self._positions = {}        # studentId -> lane
+        self._students = []         # lane -> studentId, None for a free lane
+        self._free = []             # lanes freed by `remove`, reused first
+        self._lanes = 0             # mask of the lanes in use
+        self._masks = {}            # studentId -> {DayId: day mask}
+        self._columns = {dayId: [0] * self.spec.num_slots for dayId in self.spec.day_order}
+
+        self._queries = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, studentId):
+        return str(studentId) in self._positions
+
+    def update(self, studentId, avail):
+        """
+        Adds or replaces a student's availability.
+
+        Parameters:
+            studentId (str): The student's unique identifier
+            avail (list of dict): Output of `parse_availability`; days missing from it count as unavailable
+        """
+        studentId = str(studentId)
+        masks = availability_to_masks(avail, self.spec)
+        with self._lock:
+            lane = self._positions.get(studentId)
+            if lane is None:
+                lane = self._free.pop() if self._free else len(self._students)
+                if lane == len(self._students):
+                    self._students.append(studentId)
+                else:
+                    self._students[lane] = studentId
+                self._positions[studentId] = lane
+                self._lanes |= 1 << lane
+            old = self._masks.get(studentId, {})
+            self._masks[studentId] = masks
+            for dayId, columns in self._columns.items():
+                self._flip(columns, lane, old.get(dayId, 0) ^ masks.get(dayId, 0))
+
+    def update_many(self, availabilities):
+        """Adds or replaces many students at once (studentId -> parsed availability)"""
+        for studentId, avail in availabilities.items():
+            self.update(studentId, avail)
+
+    def remove(self, studentId):
+        """
+        Removes a student from the index.
+
+        Returns:
+            bool: True if the student was indexed
+        """
+        studentId = str(studentId)
+        with self._lock:
+            lane = self._positions.pop(studentId, None)
+            if lane is None:
+                return False
+            old = self._masks.pop(studentId)
+            for dayId, columns in self._columns.items():
+                self._flip(columns, lane, old.get(dayId, 0))
+            self._students[lane] = None
+            self._free.append(lane)
+            self._lanes &= ~(1 << lane)
+            return True
+
+    def retain(self, studentIds):
+        """
+        Removes every student who is not in `studentIds`, e.g. after a new roster was loaded.
+
+        Returns:
+            int: The number of students removed
+        """
+        keep = {str(studentId) for studentId in studentIds}
+        with self._lock:
+            dropped = [studentId for studentId in self._positions if studentId not in keep]
+        return sum(self.remove(studentId) for studentId in dropped)
+
+    @staticmethod
+    def _flip(columns, lane, changed):
+        """Toggles the student's bit in every slot set in `changed`. Lock must be held."""
+        bit = 1 << lane
+        while changed:
+            low = changed & -changed
+            columns[low.bit_length() - 1] ^= bit
+            changed ^= low
+
+    def _match(self, day, start, end, min_minutes, contiguous):
+        """Returns the lanes answering a query. Lock must be held."""
+        dayId = parse_day_id(day)
+        startMinute, endMinute = parse_clock(start), parse_clock(end)
+        if endMinute <= startMinute:
+            raise ValueError("The end of the window must be after its start")
+        # Only grid hours are indexed, a window reaching past them would be answered for the part inside
+        if startMinute < self.spec.start_minute or endMinute > self.spec.end_minute:
+            first, last = self.spec.start_minute, self.spec.end_minute
+            raise ValueError(f"The window must lie within the grid hours "
+                             f"({first // 60}:{first % 60:02d}-{last // 60}:{last % 60:02d})")
+
+        window = span_mask(startMinute, endMinute, self.spec)
+        if not window or dayId not in self._columns:
+            return 0
+        first = (window & -window).bit_length() - 1
+        columns = self._columns[dayId][first:window.bit_length()]
+        self._queries += 1
+
+        # Whole window: every slot of it
+        if min_minutes is None:
+            result = self._lanes
+            for column in columns:
+                result &= column
+                if not result:
+                    break
+            return result
+
+        # Part of the window, rounded up to whole slots
+        slots = max(1, -(-int(min_minutes) // self.spec.step_minutes))
+        if slots > len(columns):
+            return 0
+        if contiguous:
+            return _consecutive(columns, slots) & self._lanes
+        return _at_least(columns, slots, self._lanes)
+
+    def query(self, day, start, end, min_minutes=None, contiguous=False):
+        """
+        Returns the students available on a day during a time window.
+
+        Parameters:
+            day (int or str): DayId (1 = Sunday) or day name
+            start, end: Window as minutes of the day, `datetime.time` or text ("11:00", "1:30pm")
+            min_minutes (int, optional): Only require this many minutes of the window instead of all of it
+            contiguous (bool): With `min_minutes`, require them in one stretch
+
+        Returns:
+            list of str: The matching student IDs, in the order they were added
+
+        Raises:
+            ValueError: If the day or a time is not recognized, or the window is empty or outside the grid hours
+        """
+        with self._lock:
+            lanes = self._match(day, start, end, min_minutes, contiguous)
+            bits = bin(lanes)
+            if bits.count("1") > SPARSE_MATCHES:
+                # Lane i is character i of the reversed binary string
+                return list(compress(self._students, map("1".__eq__, bits[:1:-1])))
+            students = []
+            while lanes:
+                low = lanes & -lanes
+                students.append(self._students[low.bit_length() - 1])
+                lanes ^= low
+            return students
+
+    def count(self, day, start, end, min_minutes=None, contiguous=False):
+        """Returns the number of students `query` would return, without listing them"""
+        with self._lock:
+            return bin(self._match(day, start, end, min_minutes, contiguous)).count("1")
+
+    def availability_of(self, studentId):
+        """Returns the indexed day masks of a student (DayId -> mask), or None"""
+        with self._lock:
+            masks = self._masks.get(str(studentId))
+            return dict(masks) if masks is not None else None
+
+    def clear(self):
+        """Removes every student"""
+        with self._lock:
+            self._positions.clear()
+            self._students.clear()
+            self._free.clear()
+            self._masks.clear()
+            self._lanes = 0
+            self._columns = {dayId: [0] * self.spec.num_slots for dayId in self.spec.day_order}
+
+    def stats(self):
+        """
+        Returns the index counters.
+
+        Returns:
+            dict: students, lanes (including freed ones), queries and slot_minutes
+        """
+        with self._lock:
+            return {
+                "students": len(self._positions),
+                "lanes": len(self._students),
+                "queries": self._queries,
+                "slot_minutes": self.spec.step_minutes,
+            }
+
+
+#------------------------------------------------------------------------ Building ------------------------------------------------------------------------#
+def build_index(studentIds, force_refresh=False, spec=None, index=None):
+    """
+    Indexes the availability of a roster, answered from the availability cache where possible.
+
+    Parameters:
+        studentIds (iterable of str): The roster
+        force_refresh (bool): Fetch every student instead of using the cache
+        spec (GridSpec, optional): Slot geometry of a new index
+        index (AvailabilityIndex, optional): Index to update instead of creating one
+
+    Returns:
+        tuple: (AvailabilityIndex, dict): The index and the exception of each student that could not be fetched
+    """
+    found, errors = get_availability_many(studentIds, force_refresh=force_refresh)
+    index = index if index is not None else AvailabilityIndex(spec)
+    index.update_many(found)
+    return index, errors
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_availability_index():
+    """Returns the process-wide index, empty until a roster is loaded into it"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = AvailabilityIndex()
+        return _default_index
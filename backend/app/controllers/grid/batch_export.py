@@ -0,0 +1,294 @@
+"""
+This file is responsible for exporting the grids of a whole roster in one go.
+
+Overview:
+- The roster is a list of external IDs, given directly or as CSV (one ID per line, or a column named
+  `external_id`/`EmployeeExternalId`/`id`).
+- Availability is looked up through the availability cache; the misses are fetched together with one concurrent batch.
+- Grids are rendered by the streaming writer (`grid_writer`) in a process pool. Each worker process builds the writer
+  once and then only receives the day masks of an employee, which are plain integers and cheap to send.
+  Workers are started from a fork server (spawned where fork servers are unavailable), never forked from the caller:
+  exports run inside threaded Flask handlers and job queue workers, and forking a process that holds other threads'
+  locks can leave the child deadlocked.
+- The result is either a zip with one .xlsx per employee, streamed entry by entry as the renders finish, or a single
+  workbook with one sheet per employee.
+- Every export ends with a report: which IDs failed and why, and the overall throughput.
+
+Key Functions:
+1. `read_ids`: Parses a list or CSV of external IDs.
+2. `iter_zip_export`: Yields the bytes of the zip archive as grids finish; `report.json` is the last entry.
+3. `build_workbook_export`: Returns one workbook with a sheet per employee and the report.
+4. `export_roster`: Writes either format to a file, used by the command line (`cli.py grid --ids/--csv`).
+
+Dependencies:
+- OpenPyXL: For the multi-sheet workbook.
+- concurrent.futures: For the render process pool.
+"""
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import io
+import os
+import csv
+import re
+import json
+import time
+import zipfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from controllers.grid.grid_generator import new_grid_workbook, fill_in_day_mask, GRID_FILL_COLOR
+from controllers.grid.grid_writer import get_grid_writer, ChunkSink, ZIP_DATE_TIME
+from controllers.grid.helper_classes.availability_cache import get_availability_many
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+EXPORT_FORMATS = ("zip", "workbook")
+ID_COLUMNS = ("external_id", "employeeexternalid", "id")
+DEFAULT_RENDER_WORKERS = min(os.cpu_count() or 1, 4)
+# Below this many grids the pool costs more to start than it saves, so they are rendered in-process
+MIN_GRIDS_FOR_POOL = 32
+REPORT_ENTRY = "report.json"
+MAX_SHEET_TITLE = 31
+INVALID_SHEET_CHARS = re.compile(r"[\\/*?:\[\]]")     # Characters Excel does not allow in sheet titles
+
+
+def sheet_title(studentId):
+    """Returns a valid sheet title for an ID: characters Excel rejects become "_", cut to 31 characters"""
+    return INVALID_SHEET_CHARS.sub("_", studentId)[:MAX_SHEET_TITLE]
+
+
+def read_ids(source):
+    """
+    Parses a roster into a list of external IDs, keeping the first occurrence of each.
+
+    Parameters:
+        source: str or iterable of str
+            CSV text (one ID per line, or a header row with an `external_id`, `EmployeeExternalId` or `id` column),
+            or an iterable of IDs
+
+    Returns:
+        list of str: The IDs in order
+    """
+    if isinstance(source, str):
+        rows = [row for row in csv.reader(io.StringIO(source)) if row and any(cell.strip() for cell in row)]
+        column = 0
+        if rows:
+            header = [cell.strip().lower() for cell in rows[0]]
+            for name in ID_COLUMNS:
+                if name in header:
+                    column = header.index(name)
+                    rows = rows[1:]
+                    break
+        ids = [row[column].strip() for row in rows if len(row) > column]
+    else:
+        ids = [str(i).strip() for i in source]
+
+    return list(dict.fromkeys(i for i in ids if i))
+
+
+def fetch_masks(studentIds, force_refresh=False, spec=None):
+    """
+    Fetches the roster's availability and converts it into day masks of the given grid spec.
+
+    Returns:
+        tuple: (dict, dict): DayId -> mask dictionaries keyed by ID, and the error message of each ID that failed
+    """
+    found, errors = get_availability_many(studentIds, force_refresh=force_refresh)
+
+    masks = {}
+    failures = {studentId: str(error) for studentId, error in errors.items()}
+    for studentId in studentIds:
+        avail = found.get(studentId)
+        if avail:
+            masks[studentId] = availability_to_masks(avail, spec)
+        elif studentId not in failures:
+            failures[studentId] = "No schedule available for this ID"
+    return masks, failures
+
+
+def _pool_context():
+    """Returns the start method of the render workers: a fork server that has already imported the writer, or spawn"""
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # Workers are forked from the server, so they start with openpyxl and the writer module loaded
+    context.set_forkserver_preload(["controllers.grid.grid_writer"])
+    return context
+
+
+def _init_worker(spec):
+    """Builds the worker's writer once, before its first grid. Runs in the pool workers."""
+    get_grid_writer(spec)
+
+
+def _render_grid(studentId, masks, color, spec):
+    """Renders one grid with the process's writer. Runs in the pool workers."""
+    output = io.BytesIO()
+    get_grid_writer(spec).write(masks, output, color=color)
+    return studentId, output.getvalue()
+
+
+def _iter_rendered(masks, color, workers, spec):
+    """
+    Yields (studentId, xlsx bytes or None, error message or None) as the grids finish rendering.
+    Small batches, or workers=0, are rendered in this process.
+    """
+    if workers <= 0 or len(masks) < MIN_GRIDS_FOR_POOL:
+        for studentId, dayMasks in masks.items():
+            try:
+                yield _render_grid(studentId, dayMasks, color, spec) + (None,)
+            except Exception as e:
+                yield studentId, None, str(e)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(), initializer=_init_worker,
+                             initargs=(spec,)) as pool:
+        futures = {pool.submit(_render_grid, studentId, dayMasks, color, spec): studentId
+                   for studentId, dayMasks in masks.items()}
+        for future in as_completed(futures):
+            try:
+                yield future.result() + (None,)
+            except Exception as e:
+                yield futures[future], None, str(e)
+
+
+def _report(requested, succeeded, failures, started, fetched):
+    """Builds the end-of-export report"""
+    finished = time.perf_counter()
+    elapsed = finished - started
+    return {
+        "requested": requested,
+        "succeeded": succeeded,
+        "failed": len(failures),
+        "failures": dict(sorted(failures.items())),
+        "fetch_seconds": round(fetched - started, 3),
+        "render_seconds": round(finished - fetched, 3),
+        "elapsed_seconds": round(elapsed, 3),
+        "grids_per_second": round(succeeded / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def iter_zip_export(studentIds, color=GRID_FILL_COLOR, workers=DEFAULT_RENDER_WORKERS, force_refresh=False,
+                    report=None, spec=DEFAULT_GRID_SPEC):
+    """
+    Yields a zip archive of per-employee grids, one chunk per finished entry.
+
+    Entries are named `schedule_<id>.xlsx` and appear in the order the renders finish. The last entry is
+    `report.json` with the per-ID failures and the throughput.
+
+    Parameters:
+        studentIds: iterable of str
+            The roster
+        color: str
+            The color used for unavailable time
+        workers: int
+            Render processes (0 renders in this process)
+        force_refresh: bool
+            Fetch every employee from Schedule Source instead of using the cache
+        report: dict, optional
+            Filled with the report once the archive is complete, for callers that also want it as data
+        spec: GridSpec
+            Geometry of the grids
+
+    Yields:
+        bytes: Consecutive pieces of the archive
+    """
+    started = time.perf_counter()
+    studentIds = read_ids(studentIds)
+    masks, failures = fetch_masks(studentIds, force_refresh=force_refresh, spec=spec)
+    fetched = time.perf_counter()
+
+    sink = ChunkSink()
+    succeeded = 0
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for studentId, data, error in _iter_rendered(masks, color, workers, spec):
+            if error is not None:
+                failures[studentId] = error
+                continue
+            # The grids are already deflated inside, so they are stored as is
+            archive.writestr(zipfile.ZipInfo(f"schedule_{studentId}.xlsx", date_time=ZIP_DATE_TIME), data)
+            succeeded += 1
+            yield sink.drain()
+
+        result = _report(len(studentIds), succeeded, failures, started, fetched)
+        archive.writestr(zipfile.ZipInfo(REPORT_ENTRY, date_time=ZIP_DATE_TIME), json.dumps(result, indent=2))
+    yield sink.drain()
+
+    if report is not None:
+        report.update(result)
+
+
+def build_workbook_export(studentIds, color=GRID_FILL_COLOR, force_refresh=False, spec=DEFAULT_GRID_SPEC):
+    """
+    Builds one workbook with a sheet per employee, named after their ID (see `sheet_title`), in roster order.
+
+    openpyxl sheets belong to one workbook object, so they are painted in this process; the sheets are copies
+    of the cleared template sheet, painted from the day masks.
+
+    Returns:
+        tuple: (openpyxl.Workbook, dict): The workbook and the report
+    """
+    started = time.perf_counter()
+    studentIds = read_ids(studentIds)
+    masks, failures = fetch_masks(studentIds, force_refresh=force_refresh, spec=spec)
+    fetched = time.perf_counter()
+
+    wb = new_grid_workbook(spec)
+    template = wb.active
+    succeeded = 0
+    for studentId in studentIds:
+        dayMasks = masks.get(studentId)
+        if dayMasks is None:
+            continue
+        ws = wb.copy_worksheet(template)
+        try:
+            # openpyxl appends a number to titles already taken, e.g. IDs equal once cut to 31 characters
+            ws.title = sheet_title(studentId)
+            for dayId, mask in dayMasks.items():
+                fill_in_day_mask(ws, dayId, mask, color, spec)
+        except Exception as e:
+            wb.remove(ws)
+            failures[studentId] = str(e)
+            continue
+        succeeded += 1
+
+    if succeeded:
+        wb.remove(template)
+    return wb, _report(len(studentIds), succeeded, failures, started, fetched)
+
+
+def export_roster(studentIds, output, export_format="zip", color=GRID_FILL_COLOR,
+                  workers=DEFAULT_RENDER_WORKERS, force_refresh=False, spec=DEFAULT_GRID_SPEC):
+    """
+    Exports a roster to a file.
+
+    Parameters:
+        studentIds: iterable of str or str
+            The roster, or CSV text (see `read_ids`)
+        output: str or Path
+            Destination file
+        export_format: str
+            "zip" for one .xlsx per employee or "workbook" for one sheet per employee
+        workers: int
+            Render processes for the zip format
+        spec: GridSpec
+            Geometry of the grids
+
+    Returns:
+        dict: The report
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+    if export_format == "workbook":
+        wb, report = build_workbook_export(studentIds, color=color, force_refresh=force_refresh, spec=spec)
+        wb.save(output)
+        return report
+
+    report = {}
+    with open(output, "wb") as f:
+        for chunk in iter_zip_export(studentIds, color=color, workers=workers, force_refresh=force_refresh,
+                                     report=report, spec=spec):
+            f.write(chunk)
+    return report
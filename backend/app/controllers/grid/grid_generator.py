@@ -8,11 +8,18 @@ Overview:
 
 Key Functions:
 1. `fill_in_day`: Marks the cells in the grid for a specific day based on the student's availability.
+   The day's ranges are converted once into a slot bitmask (`availability_mask`) and only the unavailable spans are painted.
 2. `is_available`: Checks if a specific time falls within the student's availability ranges.
-3. `fill_in_cell`: Colors a specific cell in the worksheet.
-4. `clear_row`: Resets all cells in a specific row (day) to a blank state.
+3. `fill_in_cell` / `fill_in_span`: Colors a cell or a contiguous run of cells, reusing one shared fill per color.
+4. `clear_row`: Resets all cells in a specific row (day) to a blank state, skipping cells that are already blank.
 5. `clear_grid`: Clears the entire grid, resetting all rows and columns.
-6. `fill_in_schedule`: Updates the grid with a student's availability fetched using their `studentId`.
+6. `load_template` / `new_grid_workbook`: Parse and clear the template once per process, then hand out in-memory copies.
+7. `fill_in_schedule`: Updates the grid with a student's availability fetched using their `studentId`
+   (served from the availability cache when possible, or passed in by the caller).
+
+Every function that maps times to cells takes an optional `spec` (`GridSpec`: hours, cell length, grid origin and day
+order) and uses the default 6:00-22:00, 5-minute grid when it is omitted. Templates for other specs are generated
+from `Timetable template.xlsx` (see `template_builder`).
 
 Dependencies:
 - OpenPyXL: For manipulating Excel files.
@@ -23,42 +30,47 @@ Inputs:
 - Excel template: The script expects the template file `Timetable template.xlsx` to exist in the same directory.
 
 Outputs:
-- A modified Excel file with the grid updated to reflect the student's schedule.
+- A new Excel file with the grid updated to reflect the student's schedule.
 
 Usage:
-- Run the script directly, and it will prompt the user to enter a `studentId`.
-- The updated Excel file will be saved with the same name, overwriting the template.
+- Run `python backend/app/cli.py grid`, and it will prompt the user to enter a `studentId`.
+- The updated Excel file will be saved as `schedule_<studentId>.xlsx` in the current directory; the template is left untouched.
+- Pass `--ids` or `--csv` to export a whole roster as a zip or a multi-sheet workbook instead (see `batch_export`).
+- Pass `--resolution 15` or `--resolution 30` for an overview grid with 15- or 30-minute cells.
+- OpenPyXL is imported the first time a fill or a template is needed, so importing this module stays cheap.
 
 """
 #------------------------------------------------------- Imports ------------------------------------------------------#
-import sys
 import os
+import copy
+import threading
 from pathlib import Path
-import datetime
-from openpyxl.styles import PatternFill
-from openpyxl import load_workbook
-
-# Get the absolute path of the current file and resolve any symlinks
-# Then navigate up 3 levels to reach app directory:
-# grid_generator.py -> grid -> controllers -> app
-root_dir = Path(__file__).resolve().parents[2]
-sys.path.append(str(root_dir))
 
-# Now we can import our local modules
-from controllers.grid.helper_classes.availability_parser import parse_availability
+from controllers.grid.helper_classes.availability_cache import get_availability
+from controllers.grid.helper_classes.availability_mask import ranges_to_mask, unavailable_runs
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+from controllers.grid.template_builder import build_template
+from controllers.metrics.timing import span, timed
 
 
 #------------------------------------------------------- Constants ------------------------------------------------------#
-FINAL_HOUR_IN_GRID = 22
-NUM_INTERVALS_PER_HOUR = 6
 GRID_FILE_NAME = Path(__file__).parent / "Timetable template.xlsx"
 GRID_FILL_COLOR = "ffa07a"
 
+# Shared PatternFill objects, one per color (see `get_fill`)
+_FILLS = {}
+
+# Cleared template workbooks, one per GridSpec, built once per process (see `load_template`)
+_templates = {}
+_template_lock = threading.Lock()
+
 
-def fill_in_day(ws, dayId, availableRanges, color): 
+def fill_in_day(ws, dayId, availableRanges, color, spec=None):
     """
     Fills in the day/row for the students' class schedule based on the student's availability
 
+    The ranges are turned into a slot bitmask once, instead of scanning every range for every slot.
+
     Parameters:
         ws: openpyxl.Worksheet
             The Excel worksheet object to update.
@@ -66,6 +78,8 @@ def fill_in_day(ws, dayId, availableRanges, color):
             The integer id representing the day of week
         availableRanges: list
             The list of start/end times for when the student is available (i.e. List of classes for the day)
+        spec: GridSpec, optional
+            Geometry of the grid on the sheet, the default grid when omitted
 
     Returns:
         None
@@ -73,20 +87,36 @@ def fill_in_day(ws, dayId, availableRanges, color):
     Side Effects:
         - Modifies the provided Excel workbook in place.
     """
-    # Sunday (ID = 1) starts at row 3 (1 + 2) = 3
-    rowNum = dayId + 2
-    colNum = 2
+    fill_in_day_mask(ws, dayId, ranges_to_mask(availableRanges, spec), color, spec)
 
-    for hour in range(6, FINAL_HOUR_IN_GRID):
-        minute = 0
-        while(minute < 60):
-            currentTime = datetime.time(hour=hour, minute=minute)
 
-            if (not is_available(currentTime, availableRanges)):
-                fill_in_cell(ws, rowNum, colNum, color)
+def fill_in_day_mask(ws, dayId, mask, color, spec=None):
+    """
+    Fills in the day/row for the students' class schedule from a precomputed availability mask
 
-            minute += 5
-            colNum += 1
+    Parameters:
+        ws: openpyxl.Worksheet
+            The Excel worksheet object to update.
+        dayId: int
+            The integer id representing the day of week
+        mask: int
+            The day's availability bitmask (see `availability_mask.ranges_to_mask`), one bit per slot of `spec`
+        spec: GridSpec, optional
+            Geometry of the grid on the sheet, the default grid when omitted
+
+    Returns:
+        None
+
+    Side Effects:
+        - Modifies the provided Excel workbook in place.
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    # With the default grid, Sunday (ID = 1) is row 3 and the first slot is column B
+    rowNum = spec.row_of(dayId)
+
+    # Only the unavailable slots are painted, one contiguous span at a time
+    for startSlot, endSlot in unavailable_runs(mask, spec):
+        fill_in_span(ws, rowNum, spec.column_of(startSlot), spec.column_of(endSlot - 1), color)
 
 
 def is_available(currentTime, availableRanges):
@@ -144,22 +174,91 @@ def fill_in_cell(ws, row, col, color):
         - Modifies the excel file directly
 
      """
-    # Create a PatternFill object with the given color (in hexadecimal format)
-    fill_color = PatternFill(start_color=color, end_color=color, fill_type="solid")
+    # Use the row and column to get the cell and apply the shared fill for this color
+    ws.cell(row=row, column=col).fill = get_fill(color)
 
-    # Use the row and column to get the cell and apply the fill color
-    ws.cell(row=row, column=col).fill = fill_color
 
+def fill_in_span(ws, row, firstCol, lastCol, color):
+    """
+    Fills a contiguous run of cells in one row with the specified color.
 
-def clear_row(ws, dayId):
+    Parameters:
+        ws: openpyxl.Worksheet
+             The Excel worksheet object to update.
+        row: int
+            The row of the cells to be filled
+        firstCol: int
+            The first column of the span
+        lastCol: int
+            The last column of the span (inclusive)
+        color:
+            the color of the cells to be filled specified by a 6-digit hex code
+
+    Returns:
+        None
+
+    Side Effects:
+        - Modifies the excel file directly
     """
-    Resets the grid within the scope of one row
+    fill = get_fill(color)
+    for (cell,) in ws.iter_cols(min_row=row, max_row=row, min_col=firstCol, max_col=lastCol):
+        cell.fill = fill
+
+
+def get_fill(color):
+    """
+    Returns the solid PatternFill for a color, creating it only the first time the color is used.
+
+    openpyxl stores one style record per distinct fill anyway, so every cell painted with the same color
+    can share the same object instead of allocating a new one per cell.
+    """
+    fill = _FILLS.get(color)
+    if fill is None:
+        from openpyxl.styles import PatternFill
+
+        fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        _FILLS[color] = fill
+    return fill
+
+
+def has_fill(cell, color):
+    """Returns True if the cell already has a solid fill of the given 6-digit hex color"""
+    fill = cell.fill
+    rgb = fill.fgColor.rgb
+    return fill.fill_type == "solid" and isinstance(rgb, str) and rgb[-6:].lower() == color.lower()
+
+
+def day_blank_color(dayId):
+    """
+    Returns the background color of an empty row in the template
+
+    Parameters:
+        dayId: int
+            The integer id representing the day of week
+
+    Returns:
+        str: 6-digit hex code
+    """
+    # if we are on Monday, Wednesday, or Friday
+    if dayId % 2 == 0:
+        return "FFFFFF"
+    elif dayId == 1 or dayId == 7:
+        return "bababa"
+    else:
+        return "e0e0e0"
+
+
+def clear_row(ws, dayId, spec=None):
+    """
+    Resets the grid within the scope of one row, leaving cells that are already blank untouched
 
     Parameters:
         ws: openpyxl.Worksheet
             The Excel worksheet object to update.
         dayId: int
             The integer id representing the day of week
+        spec: GridSpec, optional
+            Geometry of the grid on the sheet, the default grid when omitted
 
     Returns:
         None
@@ -171,31 +270,27 @@ def clear_row(ws, dayId):
 
     """
 
-    rowNum = dayId + 2
-    colNum = 2
+    spec = spec or DEFAULT_GRID_SPEC
+    rowNum = spec.row_of(dayId)
+    color = day_blank_color(dayId)
+    fill = get_fill(color)
 
-    for hour in range(6, FINAL_HOUR_IN_GRID):
-        minute = 0
-        while(minute < 60):
-            # if we are on Monday, Wednesday, or Friday
-            if dayId % 2 == 0:
-                fill_in_cell(ws, rowNum, colNum, "FFFFFF")
-            elif dayId == 1 or dayId == 7:
-                fill_in_cell(ws, rowNum, colNum, "bababa")
-            else:
-                fill_in_cell(ws, rowNum, colNum, "e0e0e0")
+    # Only cells that differ from the blank template are restyled, so clearing a blank sheet writes nothing
+    for (cell,) in ws.iter_cols(min_row=rowNum, max_row=rowNum, min_col=spec.first_col, max_col=spec.last_col):
+        if not has_fill(cell, color):
+            cell.fill = fill
 
-            colNum += 1
-            minute += 5
 
-
-def clear_grid(ws):
+@timed("clear_grid")
+def clear_grid(ws, spec=None):
     """
     Resets the grid to a blank template
 
     Parameters:
         ws: openpyxl.Worksheet
             The Excel worksheet object to update.
+        spec: GridSpec, optional
+            Geometry of the grid on the sheet, the default grid when omitted
 
     Returns:
         None
@@ -203,12 +298,13 @@ def clear_grid(ws):
     Side Effects:
         - Modifies the provided Excel workbook in place.
     """
-    for i in range(7):
-        dayId = i + 1
-        clear_row(ws, dayId)
+    spec = spec or DEFAULT_GRID_SPEC
+    for dayId in spec.day_order:
+        clear_row(ws, dayId, spec)
 
 
-def fill_in_schedule(ws, studentId, color):
+@timed("fill")
+def fill_in_schedule(ws, studentId, color, avail=None, spec=None):
     """
     Updates a schedule in an Excel workbook based on a student's availability.
 
@@ -219,6 +315,11 @@ def fill_in_schedule(ws, studentId, color):
             Unique identifier for the student
         color: str or openpyxl.styles.Color
             The color to use when marking availability in the workbook.
+        avail: list of dict, optional
+            Availability already parsed by the caller. When omitted it is looked up through the
+            availability cache, which only contacts Schedule Source on a miss.
+        spec: GridSpec, optional
+            Geometry of the grid on the sheet; must match the template the worksheet comes from
 
     Returns:
         None
@@ -231,32 +332,88 @@ def fill_in_schedule(ws, studentId, color):
           the function may raise an app aropriate exception.
     """
     try:
-        avail = parse_availability(studentId)
+        if avail is None:
+            avail = get_availability(studentId)
         if avail:
             for day in avail:
-                print(day)
-                fill_in_day(ws, day["DayId"], day["DayRanges"], color)
+                fill_in_day(ws, day["DayId"], day["DayRanges"], color, spec)
         else:
             print("NO AVAILABILITY PARSED")
     except Exception as e:
         print("ERROR OCCURRED WHILE FILLING IN SCHEDULE: ", e)
 
 
-def main():
-    """
-    Main file for running and debugging the grid generator on its own
+def load_template(spec=None):
     """
+    Returns the blank template workbook of a grid spec, building it the first time only.
 
-    wb = load_workbook(GRID_FILE_NAME)
-    ws = wb.active
-    clear_grid(ws)
+    The default spec uses `Timetable template.xlsx` itself; other specs get a template generated from it.
+    The returned workbook is shared by the whole process and must never be modified or saved;
+    use `new_grid_workbook` to get a copy to paint on.
 
-    studentId = input("Enter the Student ID Number: ")
-    fill_in_schedule(ws, studentId, GRID_FILL_COLOR)
+    Parameters:
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
 
-    wb.save(GRID_FILE_NAME)
+    Returns:
+        openpyxl.Workbook: The cleared template
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    wb = _templates.get(spec)
+    if wb is None:
+        if spec != DEFAULT_GRID_SPEC:
+            # Generated from a private copy of the master, outside the lock the master itself is loaded under
+            template = load_template()
+            with span("template_load"):
+                wb = build_template(spec, _clone_workbook(template))
+                clear_grid(wb.active, spec)
+        with _template_lock:
+            if spec not in _templates:
+                if wb is None:
+                    from openpyxl import load_workbook
+
+                    with span("template_load"):
+                        wb = load_workbook(GRID_FILE_NAME)
+                        clear_grid(wb.active)
+                _templates[spec] = wb
+            wb = _templates[spec]
+    return wb
+
+
+@timed("template_clone")
+def new_grid_workbook(spec=None):
+    """
+    Returns a fresh, blank grid workbook for one schedule.
 
+    The copy is cloned in memory from the template parsed at startup, which is much cheaper than
+    re-reading and re-parsing the .xlsx file and repainting it for every request.
 
-if __name__ == "__main__":
-    main()
+    Parameters:
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
 
+    Returns:
+        openpyxl.Workbook: A blank workbook owned by the caller
+    """
+    return _clone_workbook(load_template(spec))
+
+
+def _clone_workbook(template):
+    """Returns a deep copy of a workbook"""
+    # The workbook's style tables are IndexedLists, which copy.deepcopy restores empty (their lookup dict
+    # is copied before the items, so every item looks like a duplicate). Seed the memo with proper copies;
+    # the style objects themselves are immutable and can be shared.
+    from openpyxl.utils.indexed_list import IndexedList
+
+    memo = {}
+    for value in vars(template).values():
+        if isinstance(value, IndexedList):
+            memo[id(value)] = IndexedList(value)
+
+    clone = copy.deepcopy(template, memo)
+    # The row and column dimension holders come back without their factories (defaultdict pickling hands the
+    # factory to their `worksheet` argument), so looking up a row or column without a dimension would raise
+    for ws in clone.worksheets:
+        ws.row_dimensions.default_factory = ws._add_row
+        ws.column_dimensions.default_factory = ws._add_column
+    return clone
@@ -0,0 +1,165 @@
+"""
+This file defines the geometry of a grid: which hours it covers, how long one cell is, where the grid starts on the
+sheet and in which order the days are listed.
+
+Overview:
+- Every module that maps times to cells (masks, painting, clearing, the streaming writer, the heatmap and the
+  templates) takes a `GridSpec` instead of hard-coding 6:00-22:00, 5-minute cells and row 3 / column B.
+- A spec precomputes everything those modules look up per cell: the number of slots, the full mask, the column of
+  every slot and the row of every day.
+- `DEFAULT_GRID_SPEC` is the layout of the hand-made `Timetable template.xlsx`. Coarser specs (`GRID_SPECS`) give
+  overview grids with 15- or 30-minute cells, 3 to 6 times fewer cells to render; their templates are generated from
+  the default one (see `template_builder`).
+
+Key Classes and Functions:
+1. `GridSpec`: Immutable, hashable grid geometry.
+2. `get_grid_spec`: Returns the registered spec for a cell length in minutes.
+
+Usage:
+    spec = get_grid_spec(15)
+    spec.num_slots          # 64
+    spec.column_of(0)       # 2 (column B)
+    spec.row_of(1)          # 3 (Sunday)
+"""
+#------------------------------------------------------- Constants ------------------------------------------------------#
+DEFAULT_DAY_ORDER = (1, 2, 3, 4, 5, 6, 7)      # Sunday to Saturday, top to bottom
+DAY_IDS = frozenset(DEFAULT_DAY_ORDER)          # Schedule Source DayIds
+
+
+class GridSpec:
+    """
+    Geometry of a grid.
+
+    Parameters:
+        start_hour: int
+            Hour the first cell starts at (0-23)
+        end_hour: int
+            Hour the last cell ends at (1-24)
+        step_minutes: int
+            Length of one cell in minutes. Must divide an hour evenly.
+        first_row: int
+            Sheet row of the first day
+        first_col: int
+            Sheet column of the first slot (1 = column A)
+        day_order: tuple of int
+            DayIds from the top row to the bottom row: some or all of 1 (Sunday) to 7 (Saturday), each at most once
+
+    Attributes (derived):
+        start_minute / end_minute: Minutes of the day the grid starts and ends at
+        num_slots: Number of cells per day
+        full_mask: Mask with every slot set
+        slot_columns: Column of every slot, index = slot
+        day_rows: DayId -> row
+        last_col: Column of the last slot
+    """
+
+    def __init__(self, start_hour=6, end_hour=22, step_minutes=5, first_row=3, first_col=2,
+                 day_order=DEFAULT_DAY_ORDER):
+        if not 0 <= start_hour < end_hour <= 24:
+            raise ValueError(f"Invalid grid hours: {start_hour} to {end_hour}")
+        if step_minutes <= 0 or 60 % step_minutes:
+            raise ValueError(f"The cell length must divide an hour evenly, got {step_minutes} minutes")
+        if first_row < 1 or first_col < 1:
+            raise ValueError("The grid origin must be on the sheet")
+        day_order = tuple(day_order)
+        if not day_order:
+            raise ValueError("The day order needs at least one day")
+        unknown = [dayId for dayId in day_order if type(dayId) is not int or dayId not in DAY_IDS]
+        if unknown:
+            raise ValueError(f"Unknown days in the day order: {unknown} (DayIds are 1 to 7)")
+        if len(set(day_order)) != len(day_order):
+            raise ValueError(f"Duplicate days in the day order: {day_order}")
+
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.step_minutes = step_minutes
+        self.first_row = first_row
+        self.first_col = first_col
+        self.day_order = day_order
+
+        self.start_minute = start_hour * 60
+        self.end_minute = end_hour * 60
+        self.slots_per_hour = 60 // step_minutes
+        self.num_slots = (self.end_minute - self.start_minute) // step_minutes
+        self.full_mask = (1 << self.num_slots) - 1
+        self.slot_columns = tuple(first_col + slot for slot in range(self.num_slots))
+        self.last_col = self.slot_columns[-1]
+        self.day_rows = {dayId: first_row + index for index, dayId in enumerate(self.day_order)}
+        self._row_days = {row: dayId for dayId, row in self.day_rows.items()}
+
+    def _key(self):
+        return (self.start_hour, self.end_hour, self.step_minutes, self.first_row, self.first_col, self.day_order)
+
+    def __eq__(self, other):
+        return isinstance(other, GridSpec) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return (f"GridSpec(start_hour={self.start_hour}, end_hour={self.end_hour}, step_minutes={self.step_minutes}, "
+                f"first_row={self.first_row}, first_col={self.first_col}, day_order={self.day_order})")
+
+    @property
+    def name(self):
+        """Short label used in file names, e.g. "6-22_15min" """
+        return f"{self.start_hour}-{self.end_hour}_{self.step_minutes}min"
+
+    def row_of(self, dayId):
+        """Returns the sheet row of a day"""
+        return self.day_rows[dayId]
+
+    def day_at(self, row):
+        """Returns the DayId shown on a sheet row, or None if the row is not a grid row"""
+        return self._row_days.get(row)
+
+    def column_of(self, slot):
+        """Returns the sheet column of a slot"""
+        return self.slot_columns[slot]
+
+    def slot_at(self, col):
+        """Returns the slot shown in a sheet column, or None if the column is not a grid column"""
+        slot = col - self.first_col
+        return slot if 0 <= slot < self.num_slots else None
+
+    def slot_start_minute(self, slot):
+        """Returns the minute of the day a slot starts at"""
+        return self.start_minute + slot * self.step_minutes
+
+    def minute_to_slot(self, minute):
+        """Returns the index of the first slot that starts at or after `minute`, clamped to [0, num_slots]"""
+        slot = -((self.start_minute - minute) // self.step_minutes)   # ceil((minute - start) / step)
+        return min(max(slot, 0), self.num_slots)
+
+
+#------------------------------------------------------- Registered Specs ------------------------------------------------------#
+DEFAULT_GRID_SPEC = GridSpec()
+
+# Cell length in minutes -> spec, for the resolutions offered to users
+GRID_SPECS = {
+    5: DEFAULT_GRID_SPEC,
+    15: GridSpec(step_minutes=15),
+    30: GridSpec(step_minutes=30),
+}
+
+
+def get_grid_spec(step_minutes=None):
+    """
+    Returns the registered spec for a cell length.
+
+    Parameters:
+        step_minutes: int or str, optional
+            5, 15 or 30. None returns the default (5-minute) spec.
+
+    Returns:
+        GridSpec
+
+    Raises:
+        ValueError: If no spec is registered for that length
+    """
+    if step_minutes is None or step_minutes == "":
+        return DEFAULT_GRID_SPEC
+    try:
+        return GRID_SPECS[int(step_minutes)]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported grid resolution: {step_minutes} (choose from {sorted(GRID_SPECS)})")
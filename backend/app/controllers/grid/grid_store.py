@@ -0,0 +1,497 @@
+"""
+grid_store.py
+
+OVERVIEW:
+    This module keeps generated grid files (the bytes of an .xlsx) between the request that generates a grid
+    and the request that downloads it. Every store is bounded by a number of entries and a number of bytes,
+    and entries expire after a TTL, so memory does not grow across a semester of generations.
+
+    Three backends share the same interface:
+        - memory:     per-process LRU. Each file is held in a spooled temporary file, so small grids stay in
+                      memory and anything above `spool_threshold` bytes is moved to disk.
+        - filesystem: one file per grid in a directory. Every worker pointed at the same directory sees the
+                      same grids, so a download works whichever worker generated the file.
+        - sqlite:     one row per grid in a SQLite file, shared the same way.
+
+    Every stored grid carries a content hash of its bytes, computed when it is stored (when it is read for files
+    written by the filesystem backend before it kept the hash). `get_entry` returns it with the time the grid was
+    stored, so downloads can be answered with a strong ETag and a Last-Modified date, and repeated downloads of an
+    unchanged file with 304.
+
+    A grid can also carry a small JSON-serializable `meta` value (e.g. the day fingerprints of the incremental
+    renderer). It is stored in the grid's own entry, so it is written, expired and evicted together with the bytes
+    and never counts as a grid of its own.
+
+FUNCTIONS AND CLASSES:
+    - class GridStore: Interface and shared counters (hits, misses, evictions, expirations).
+    - class MemoryGridStore, FilesystemGridStore, SqliteGridStore: The backends.
+    - class GridEntry: A stored grid with its content hash, the time it was stored and its meta.
+    - content_hash(data): The hash used as ETag of a stored grid.
+    - create_grid_store(backend="memory", path=None, **options): Builds a store by backend name.
+
+USAGE:
+    store = create_grid_store("sqlite", path="/var/tmp/grids.db")
+    store.put(studentId, data)
+    store.put(studentId, data, meta={"spec": "5min"})
+    data = store.get(studentId)      # bytes, or None if missing or expired
+    entry = store.get_entry(studentId)  # GridEntry(data, etag, stored_at, meta), or None
+    store.stats()
+"""
+
+import os
+import json
+import time
+import struct
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+from collections import OrderedDict, namedtuple
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+DEFAULT_MAX_ENTRIES = 512               # Grids kept before the least recently used is evicted
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024    # Total size of the stored grids
+DEFAULT_TTL = 60 * 60                   # Seconds a grid can be downloaded after it was generated
+DEFAULT_SPOOL_THRESHOLD = 256 * 1024    # Memory backend: files larger than this are kept on disk
+GRID_FILE_SUFFIX = ".grid"
+CONTENT_HASH_SIZE = 16                  # Bytes of the BLAKE2b digest used as content hash
+GRID_FILE_MAGIC = b"SSGRID1\n"          # Filesystem backend: start of a file with a header (hash and meta)
+
+
+# A stored grid: its bytes, the hex content hash of the bytes, the time (epoch seconds) it was stored and the meta
+# stored with it (None when there is none)
+GridEntry = namedtuple("GridEntry", ("data", "etag", "stored_at", "meta"), defaults=(None,))
+
+
+def content_hash(data):
+    """Returns the hex content hash of a file, used as its strong ETag"""
+    return hashlib.blake2b(data, digest_size=CONTENT_HASH_SIZE).hexdigest()
+
+
+class GridStore:
+    """
+    Bounded, expiring key -> bytes store for generated grids.
+
+    Subclasses implement `_get`, `_put`, `_delete`, `_clear` and `_usage`; this class keeps the counters
+    and the shared argument handling. Keys are converted to strings. `_get` returns (data, stored_at, hash, meta),
+    with None as hash when the backend did not keep one; meta is passed to `_put` and returned as JSON text.
+
+    Parameters:
+        max_entries (int): Maximum number of grids kept
+        max_bytes (int): Maximum total size of the grids kept
+        ttl (float): Seconds a grid stays available
+    """
+
+    backend = None
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key):
+        """
+        Returns the stored grid.
+
+        Parameters:
+            key (str): Usually the student ID
+
+        Returns:
+            bytes or None: The file contents, or None if the grid is missing or expired
+        """
+        entry = self.get_entry(key)
+        return entry.data if entry is not None else None
+
+    def get_entry(self, key):
+        """
+        Returns the stored grid with its content hash and the time it was stored.
+
+        Parameters:
+            key (str): Usually the student ID
+
+        Returns:
+            GridEntry or None: None if the grid is missing or expired
+        """
+        found = self._get(str(key), time.time())
+        with self._lock:
+            if found is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        if found is None:
+            return None
+        data, stored_at, digest, meta = found
+        return GridEntry(data, digest or content_hash(data), stored_at, json.loads(meta) if meta else None)
+
+    def put(self, key, data, meta=None):
+        """
+        Stores a grid, replacing any previous one under the same key, and evicts the least recently used
+        grids until the store fits its limits again. A grid larger than `max_bytes` is not stored.
+
+        Parameters:
+            key (str): Usually the student ID
+            data (bytes): The file contents
+            meta (JSON-serializable, optional): Kept with the grid and returned by `get_entry`
+        """
+        data = bytes(data)
+        if len(data) > self.max_bytes:
+            self.delete(key)
+            return
+        meta = json.dumps(meta, sort_keys=True) if meta is not None else None
+        self._put(str(key), data, time.time(), content_hash(data), meta)
+
+    def delete(self, key):
+        """
+        Removes one grid.
+
+        Returns:
+            bool: True if a grid was removed
+        """
+        return self._delete(str(key))
+
+    def clear(self):
+        """Removes every grid"""
+        self._clear()
+
+    def stats(self):
+        """
+        Returns the store counters.
+
+        Returns:
+            dict: backend, hits, misses, evictions, expirations, entries, bytes, limits, and for the memory
+                  backend how many of those bytes are held in memory and how many grids were spooled to disk
+        """
+        with self._lock:
+            result = {
+                "backend": self.backend,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+        result.update(self._usage())
+        result.update({"max_entries": self.max_entries, "max_bytes": self.max_bytes, "ttl": self.ttl})
+        return result
+
+    def _count(self, evictions=0, expirations=0):
+        with self._lock:
+            self._evictions += evictions
+            self._expirations += expirations
+
+    def _is_expired(self, stored_at, now):
+        return now - stored_at >= self.ttl
+
+
+#------------------------------------------------------------------------ Memory Backend ------------------------------------------------------------------------#
+class MemoryGridStore(GridStore):
+    """
+    Per-process LRU store. Each grid is written to a `SpooledTemporaryFile`, which stays in memory up to
+    `spool_threshold` bytes and rolls over to an anonymous temporary file beyond that.
+
+    Parameters:
+        spool_threshold (int): Size above which a grid is kept on disk instead of in memory
+        (other parameters as GridStore)
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL,
+                 spool_threshold=DEFAULT_SPOOL_THRESHOLD):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self.spool_threshold = spool_threshold
+        self._entries = OrderedDict()   # key -> (stored_at, size, spooled file, content hash, meta)
+        self._bytes = 0
+
+    def _get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry[0], now):
+                self._remove(key)
+                self._expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            spooled = entry[2]
+            spooled.seek(0)
+            return spooled.read(), entry[0], entry[3], entry[4]
+
+    def _put(self, key, data, now, digest, meta):
+        spooled = tempfile.SpooledTemporaryFile(max_size=self.spool_threshold)
+        spooled.write(data)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (now, len(data), spooled, digest, meta)
+            self._bytes += len(data)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def _delete(self, key):
+        with self._lock:
+            return self._remove(key)
+
+    def _clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _usage(self):
+        with self._lock:
+            # A spooled file rolls over to disk once more than `spool_threshold` bytes are written to it
+            spooled = [entry for entry in self._entries.values() if entry[1] > self.spool_threshold]
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "memory_bytes": self._bytes - sum(entry[1] for entry in spooled),
+                "spooled_entries": len(spooled),
+            }
+
+    def _remove(self, key):
+        """Drops one entry and closes its file. Lock must be held."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[1]
+        entry[2].close()
+        return True
+
+
+#------------------------------------------------------------------------ Filesystem Backend ------------------------------------------------------------------------#
+class FilesystemGridStore(GridStore):
+    """
+    Store holding one file per grid in a directory, shared by every process using the same directory.
+
+    File names are a hash of the key, the modification time is the time the grid was stored and the access
+    order is tracked with the access time (set explicitly on every read, so `noatime` mounts are fine).
+    Files are written to a temporary name and renamed, so a reader never sees a partial grid. Each file starts
+    with a small header (GRID_FILE_MAGIC, its length, then JSON with the content hash and the meta) followed by
+    the grid bytes; files written before the header existed hold the bytes only and are hashed when read.
+
+    Parameters:
+        directory (str or Path): Directory holding the grids. Created if missing.
+        (other parameters as GridStore)
+    """
+
+    backend = "filesystem"
+
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / (hashlib.sha256(key.encode("utf-8")).hexdigest() + GRID_FILE_SUFFIX)
+
+    def _get(self, key, now):
+        path = self._path(key)
+        try:
+            stored_at = path.stat().st_mtime
+            if self._is_expired(stored_at, now):
+                if _unlink(path):
+                    self._count(expirations=1)
+                return None
+            raw = path.read_bytes()
+            os.utime(path, (now, stored_at))
+        except FileNotFoundError:
+            return None
+
+        if not raw.startswith(GRID_FILE_MAGIC):
+            return raw, stored_at, None, None
+        start = len(GRID_FILE_MAGIC) + 4
+        (length,) = struct.unpack(">I", raw[len(GRID_FILE_MAGIC):start])
+        header = json.loads(raw[start:start + length])
+        return raw[start + length:], stored_at, header["hash"], header["meta"]
+
+    def _put(self, key, data, now, digest, meta):
+        path = self._path(key)
+        header = json.dumps({"hash": digest, "meta": meta}).encode("utf-8")
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(GRID_FILE_MAGIC + struct.pack(">I", len(header)) + header)
+                f.write(data)
+            os.utime(tmp_name, (now, now))
+            os.replace(tmp_name, path)
+        except BaseException:
+            _unlink(Path(tmp_name))
+            raise
+        self._enforce_limits(now)
+
+    def _delete(self, key):
+        return _unlink(self._path(key))
+
+    def _clear(self):
+        for path, _ in self._scan():
+            _unlink(path)
+
+    def _usage(self):
+        files = self._scan()
+        return {"entries": len(files), "bytes": sum(st.st_size for _, st in files)}
+
+    def _scan(self):
+        """Returns (path, stat) for every stored grid"""
+        files = []
+        for path in self.directory.glob("*" + GRID_FILE_SUFFIX):
+            try:
+                files.append((path, path.stat()))
+            except FileNotFoundError:
+                pass    # Removed by another worker meanwhile
+        return files
+
+    def _enforce_limits(self, now):
+        """Removes expired grids, then the least recently read ones until the limits hold"""
+        files = []
+        expired = 0
+        for path, st in self._scan():
+            if self._is_expired(st.st_mtime, now):
+                expired += _unlink(path)
+            else:
+                files.append((path, st))
+
+        files.sort(key=lambda item: item[1].st_atime)
+        total = sum(st.st_size for _, st in files)
+        evicted = 0
+        while files and (len(files) > self.max_entries or total > self.max_bytes):
+            path, st = files.pop(0)
+            total -= st.st_size
+            evicted += _unlink(path)
+        self._count(evictions=evicted, expirations=expired)
+
+
+def _unlink(path):
+    """Deletes a file, returning False if it was already gone"""
+    try:
+        path.unlink()
+        return True
+    except FileNotFoundError:
+        return False
+
+
+#------------------------------------------------------------------------ SQLite Backend ------------------------------------------------------------------------#
+class SqliteGridStore(GridStore):
+    """
+    Store holding one row per grid in a SQLite file, shared by every process using the same file.
+
+    Parameters:
+        db_path (str or Path): SQLite file
+        (other parameters as GridStore)
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, db_path, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS grids ("
+            " grid_key TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " content_hash TEXT,"
+            " meta TEXT)"
+        )
+        # Databases created before grids carried a content hash or meta get the columns; their rows are hashed
+        # on read and have no meta
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(grids)")]
+        if "content_hash" not in columns:
+            self._db.execute("ALTER TABLE grids ADD COLUMN content_hash TEXT")
+        if "meta" not in columns:
+            self._db.execute("ALTER TABLE grids ADD COLUMN meta TEXT")
+        self._db.execute("CREATE INDEX IF NOT EXISTS grids_accessed_at ON grids (accessed_at)")
+
+    def _get(self, key, now):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT data, stored_at, content_hash, meta FROM grids WHERE grid_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self._is_expired(row[1], now):
+                cursor = self._db.execute("DELETE FROM grids WHERE grid_key = ? AND stored_at = ?", (key, row[1]))
+                self._count(expirations=cursor.rowcount)
+                return None
+            self._db.execute("UPDATE grids SET accessed_at = ? WHERE grid_key = ?", (now, key))
+            return bytes(row[0]), row[1], row[2], row[3]
+
+    def _put(self, key, data, now, digest, meta):
+        with self._db_lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO grids (grid_key, data, size, stored_at, accessed_at, content_hash, meta)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, sqlite3.Binary(data), len(data), now, now, digest, meta)
+                )
+                expired = self._db.execute("DELETE FROM grids WHERE stored_at <= ?", (now - self.ttl,)).rowcount
+                evicted = self._evict()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        self._count(evictions=evicted, expirations=expired)
+
+    def _evict(self):
+        """Deletes the least recently read grids until the limits hold. Runs inside the put transaction."""
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM grids").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return 0
+
+        victims = []
+        for key, size in self._db.execute("SELECT grid_key, size FROM grids ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self._db.executemany("DELETE FROM grids WHERE grid_key = ?", victims)
+        return len(victims)
+
+    def _delete(self, key):
+        with self._db_lock:
+            return self._db.execute("DELETE FROM grids WHERE grid_key = ?", (key,)).rowcount > 0
+
+    def _clear(self):
+        with self._db_lock:
+            self._db.execute("DELETE FROM grids")
+
+    def _usage(self):
+        with self._db_lock:
+            count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM grids").fetchone()
+        return {"entries": count, "bytes": total}
+
+
+#------------------------------------------------------------------------ Factory ------------------------------------------------------------------------#
+def create_grid_store(backend="memory", path=None, **options):
+    """
+    Builds a grid store by backend name.
+
+    Parameters:
+        backend (str): "memory", "filesystem" or "sqlite"
+        path (str or Path): Directory (filesystem) or database file (sqlite). Ignored by the memory backend.
+        **options: max_entries, max_bytes, ttl, and spool_threshold for the memory backend
+
+    Returns:
+        GridStore: The new store
+    """
+    if backend == "memory":
+        return MemoryGridStore(**options)
+    if backend in ("filesystem", "sqlite") and not path:
+        raise ValueError(f"The {backend} grid store needs a path")
+    if backend == "filesystem":
+        return FilesystemGridStore(path, **options)
+    if backend == "sqlite":
+        return SqliteGridStore(path, **options)
+    raise ValueError(f"Unknown grid store backend: {backend}")
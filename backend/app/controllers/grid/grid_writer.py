@@ -0,0 +1,332 @@
+"""
+This file is responsible for writing grid spreadsheets straight to a file or a response stream, without building an
+openpyxl workbook for every grid.
+
+Overview:
+- The blank template (loaded and cleared once by `grid_generator.load_template`) is serialized a single time and split
+  into its static package parts and the XML of the seven grid rows.
+- For every grid cell the XML of its blank and painted variants is precomputed. A painted variant is the same cell
+  with a cloned style record whose only change is the solid fill, so borders, fonts and sizes match the template.
+- Writing a grid is then a matter of choosing the variant of each cell from the compact availability model
+  (one bitmask per day, see `availability_mask`) and streaming the result into a zip archive.
+
+Key Functions:
+1. `GridXlsxWriter.write`: Writes one grid as .xlsx into a file object or path.
+2. `GridXlsxWriter.iter_xlsx`: Yields the .xlsx bytes chunk by chunk, e.g. for a streamed HTTP response.
+3. `get_grid_writer`: Returns the process-wide writer built from the template of a grid spec.
+4. `write_schedule`: Writes a student's grid from their availability, the streaming counterpart of `fill_in_schedule`.
+
+Dependencies:
+- OpenPyXL: Only to load the template once; no workbook object graph is built per grid.
+- zipfile: To emit the SpreadsheetML package.
+
+Outputs:
+- An .xlsx file equivalent to the one produced by painting the template with `fill_in_schedule`.
+"""
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import io
+import re
+import zipfile
+import threading
+
+from controllers.grid.grid_generator import load_template, GRID_FILL_COLOR
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+from controllers.grid.helper_classes.availability_mask import runs_from_masks, availability_to_masks
+from controllers.grid.helper_classes.availability_cache import get_availability
+from controllers.metrics.timing import span
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+SHEET_PART = "xl/worksheets/sheet1.xml"
+STYLES_PART = "xl/styles.xml"
+# Fixed timestamp for every zip entry so identical grids produce identical bytes
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_COMPRESS_LEVEL = 1
+
+CELL_PATTERN = re.compile(r'<c r="([A-Z]+)(\d+)"([^>]*?)(/>|>.*?</c>)', re.S)
+STYLE_ATTR_PATTERN = re.compile(r' s="(\d+)"')
+XF_PATTERN = re.compile(r'<xf\b[^>]*?(?:/>|>.*?</xf>)', re.S)
+
+
+class GridXlsxWriter:
+    """
+    Writes grid spreadsheets from day masks by patching a pre-rendered template.
+
+    Parameters:
+        workbook: openpyxl.Workbook
+            The blank template. It is serialized once here and not used afterwards.
+        colors: iterable of str
+            The 6-digit hex colors cells may be painted with. A style record is prepared for each one.
+        spec: GridSpec, optional
+            Geometry of the grid in the template, the default grid when omitted
+    """
+
+    def __init__(self, workbook, colors=(GRID_FILL_COLOR,), spec=None):
+        self.spec = spec or DEFAULT_GRID_SPEC
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        with zipfile.ZipFile(buffer) as package:
+            self._parts = [(name, package.read(name)) for name in package.namelist()]
+
+        parts = dict(self._parts)
+        self.colors = tuple(color.lower() for color in colors)
+        styles, self._painted_style = self._add_fill_styles(parts[STYLES_PART].decode("utf-8"), parts[SHEET_PART].decode("utf-8"))
+        self._parts = [(name, styles.encode("utf-8") if name == STYLES_PART else data) for name, data in self._parts]
+        self._split_sheet(parts[SHEET_PART].decode("utf-8"))
+
+
+#------------------------------------------------------- Template Preparation ------------------------------------------------------#
+    def _grid_cells(self, sheet):
+        """Yields (dayId, slot, match) for every grid cell of the sheet XML"""
+        for match in CELL_PATTERN.finditer(sheet):
+            dayId = self.spec.day_at(int(match.group(2)))
+            if dayId is None:
+                continue
+            slot = self.spec.slot_at(_column_number(match.group(1)))
+            if slot is not None:
+                yield dayId, slot, match
+
+    def _add_fill_styles(self, styles, sheet):
+        """
+        Appends one solid fill per color and, for every style used by a grid cell, a copy of that style
+        using the fill. Returns the new styles XML and a {(base style, color): painted style} mapping.
+        """
+        fills = re.search(r'<fills count="(\d+)"\s*>(.*?)</fills>', styles, re.S)
+        first_fill = int(fills.group(1))
+        new_fills = "".join(
+            f'<fill><patternFill patternType="solid"><fgColor rgb="00{c}" /><bgColor rgb="00{c}" /></patternFill></fill>'
+            for c in self.colors
+        )
+        styles = (styles[:fills.start()] + f'<fills count="{first_fill + len(self.colors)}">'
+                  + fills.group(2) + new_fills + "</fills>" + styles[fills.end():])
+
+        cell_xfs = re.search(r'<cellXfs count="(\d+)"\s*>(.*?)</cellXfs>', styles, re.S)
+        xfs = XF_PATTERN.findall(cell_xfs.group(2))
+        base_styles = sorted({int(STYLE_ATTR_PATTERN.search(m.group(3)).group(1))
+                              for _, _, m in self._grid_cells(sheet) if STYLE_ATTR_PATTERN.search(m.group(3))} | {0})
+
+        painted = {}
+        new_xfs = []
+        for base in base_styles:
+            for offset, color in enumerate(self.colors):
+                xf = re.sub(r'fillId="\d+"', f'fillId="{first_fill + offset}"', xfs[base], count=1)
+                if "applyFill" in xf:
+                    xf = re.sub(r'applyFill="\d"', 'applyFill="1"', xf, count=1)
+                else:
+                    xf = xf.replace("<xf ", '<xf applyFill="1" ', 1)
+                painted[(base, color)] = len(xfs) + len(new_xfs)
+                new_xfs.append(xf)
+
+        styles = (styles[:cell_xfs.start()] + f'<cellXfs count="{len(xfs) + len(new_xfs)}">'
+                  + cell_xfs.group(2) + "".join(new_xfs) + "</cellXfs>" + styles[cell_xfs.end():])
+        return styles, painted
+
+    def _split_sheet(self, sheet):
+        """
+        Splits the sheet XML into literal chunks and one placeholder per grid row, and precomputes
+        the blank and painted XML of every grid cell.
+        """
+        numSlots = self.spec.num_slots
+        self._blank = {dayId: [None] * numSlots for dayId in self.spec.day_order}
+        self._painted = {color: {dayId: [None] * numSlots for dayId in self.spec.day_order} for color in self.colors}
+        bounds = {}
+
+        for dayId, slot, match in self._grid_cells(sheet):
+            cell = match.group(0)
+            style = STYLE_ATTR_PATTERN.search(match.group(3))
+            base = int(style.group(1)) if style else 0
+            self._blank[dayId][slot] = cell
+            for color in self.colors:
+                painted = self._painted_style[(base, color)]
+                if style:
+                    self._painted[color][dayId][slot] = cell.replace(style.group(0), f' s="{painted}"', 1)
+                else:
+                    self._painted[color][dayId][slot] = cell.replace(f'<c r="{match.group(1)}{match.group(2)}"',
+                                                                     f'<c r="{match.group(1)}{match.group(2)}" s="{painted}"', 1)
+            start, end = bounds.get(dayId, (match.start(), match.end()))
+            bounds[dayId] = (min(start, match.start()), max(end, match.end()))
+
+        for dayId in self.spec.day_order:
+            if None in self._blank[dayId]:
+                raise ValueError(f"Template row for day {dayId} does not contain every grid cell")
+
+        # Literal XML between the grid rows, with the day id in place of each row's grid cells
+        self._chunks = []
+        position = 0
+        for dayId in sorted(bounds, key=lambda d: bounds[d][0]):
+            start, end = bounds[dayId]
+            self._chunks.append(sheet[position:start])
+            self._chunks.append(dayId)
+            position = end
+        self._chunks.append(sheet[position:])
+        self._blank_rows = {dayId: "".join(cells) for dayId, cells in self._blank.items()}
+
+
+#------------------------------------------------------- Rendering ------------------------------------------------------#
+    def _render_row(self, dayId, runs):
+        """Returns the XML of one grid row given its painted runs [(first_slot, end_slot, color), ...]"""
+        if not runs:
+            return self._blank_rows[dayId]
+
+        blank = self._blank[dayId]
+        pieces = []
+        position = 0
+        for start, end, color in runs:
+            painted = self._painted.get(color.lower())
+            if painted is None:
+                raise ValueError(f"Color {color} was not prepared by this writer")
+            pieces.extend(blank[position:start])
+            pieces.extend(painted[dayId][start:end])
+            position = end
+        pieces.extend(blank[position:])
+        return "".join(pieces)
+
+    def _iter_sheet(self, rows):
+        """Yields the sheet XML chunk by chunk"""
+        for chunk in self._chunks:
+            if isinstance(chunk, str):
+                yield chunk
+            else:
+                yield self._render_row(chunk, rows.get(chunk))
+
+    def _write_package(self, output, rows):
+        """Writes the whole .xlsx package into `output`, yielding after each part so callers can drain it"""
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESS_LEVEL) as package:
+            for name, data in self._parts:
+                info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                if name == SHEET_PART:
+                    with package.open(info, "w") as sheet:
+                        for chunk in self._iter_sheet(rows):
+                            sheet.write(chunk.encode("utf-8"))
+                            yield
+                else:
+                    package.writestr(info, data, compress_type=zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESS_LEVEL)
+                    yield
+        yield
+
+    def runs_from_masks(self, masks, color=GRID_FILL_COLOR):
+        """
+        Converts day availability masks into painted runs: every unavailable span gets `color`.
+
+        Parameters:
+            masks: dict
+                DayId -> availability mask. Days that are missing stay blank.
+            color: str
+                6-digit hex code used for unavailable time
+
+        Returns:
+            dict: DayId -> [(first_slot, end_slot, color), ...]
+        """
+        return runs_from_masks(masks, color, self.spec)
+
+    def write(self, masks, output, color=GRID_FILL_COLOR, runs=None):
+        """
+        Writes one grid as an .xlsx file.
+
+        Parameters:
+            masks: dict
+                DayId -> availability mask; unavailable slots are painted with `color`
+            output: str, Path or binary file object
+                Destination. File objects do not need to be seekable.
+            color: str
+                6-digit hex code used for unavailable time (must be one of the writer's colors)
+            runs: dict, optional
+                DayId -> [(first_slot, end_slot, color), ...] to paint instead of deriving runs from `masks`
+
+        Returns:
+            None
+        """
+        if runs is None:
+            runs = self.runs_from_masks(masks, color)
+        with span("serialize"):
+            for _ in self._write_package(output, runs):
+                pass
+
+    def iter_xlsx(self, masks, color=GRID_FILL_COLOR, runs=None):
+        """
+        Yields the .xlsx bytes of one grid as they are produced, without holding the whole file.
+
+        Parameters are the same as `write`. Suitable as the body of a streamed HTTP response.
+        """
+        if runs is None:
+            runs = self.runs_from_masks(masks, color)
+        sink = ChunkSink()
+        for _ in self._write_package(sink, runs):
+            data = sink.drain()
+            if data:
+                yield data
+
+
+class ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable buffer that hands its contents out in pieces"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _column_number(letters):
+    """Returns the 1-based column number of spreadsheet column letters"""
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+#------------------------------------------------------- Default Writers ------------------------------------------------------#
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_grid_writer(spec=None):
+    """Returns the process-wide writer for a spec's template and the standard fill color, building it on first use"""
+    spec = spec or DEFAULT_GRID_SPEC
+    writer = _writers.get(spec)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(spec)
+            if writer is None:
+                writer = GridXlsxWriter(load_template(spec), spec=spec)
+                _writers[spec] = writer
+    return writer
+
+
+def write_schedule(studentId, output, color=GRID_FILL_COLOR, avail=None, spec=None):
+    """
+    Writes a student's grid straight to `output`, the streaming counterpart of `fill_in_schedule`.
+
+    Parameters:
+        studentId: str
+            Unique identifier for the student
+        output: str, Path or binary file object
+            Destination of the .xlsx file
+        color: str
+            The color to use when marking unavailable time
+        avail: list of dict, optional
+            Availability already parsed by the caller; looked up through the availability cache when omitted
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
+
+    Returns:
+        bool: False if no availability could be parsed (nothing is written), True otherwise
+    """
+    if avail is None:
+        avail = get_availability(studentId)
+    if not avail:
+        return False
+
+    get_grid_writer(spec).write(availability_to_masks(avail, spec), output, color=color)
+    return True
@@ -0,0 +1,169 @@
+"""
+This file is responsible for generating a coverage heatmap: one grid that shows, for every slot of the week,
+how many of a group of employees are available.
+
+Overview:
+- The heatmap uses the same template layout as a single student's grid (one row per day, one column per slot; by
+  default 5-minute slots from 6:00 to 22:00, or any other `GridSpec`).
+- Every employee's availability is turned into one bitmask per day (`availability_mask`). The per-slot counts of a day
+  are then computed for the whole group at once with a bit-sliced counter (`slot_counts`), so adding an employee costs
+  a few integer operations per day instead of a pass over 192 cells.
+- Each slot is shaded with a color from `HEATMAP_COLORS` according to the share of the group available in it; cells
+  with the same shade are painted together as one span. The counts themselves can optionally be written into the cells.
+
+Key Functions:
+1. `coverage_counts`: Per-day, per-slot number of available employees.
+2. `heatmap_runs`: Converts the counts into painted spans, in the format used by `grid_writer`.
+3. `fill_in_heatmap`: Paints a worksheet from the counts.
+4. `generate_heatmap`: Fetches the group's availability (through the availability cache) and returns a painted workbook.
+
+Dependencies:
+- OpenPyXL: For manipulating Excel files.
+- `grid_generator`: For the cleared template and the shared span painting helpers.
+
+Usage:
+- Run `python backend/app/cli.py heatmap` and enter the employee IDs separated by commas.
+- The heatmap is saved as `heatmap.xlsx` in the current directory.
+"""
+#------------------------------------------------------- Imports ------------------------------------------------------#
+from controllers.grid.grid_generator import new_grid_workbook, fill_in_span
+from controllers.grid.helper_classes.availability_cache import get_availability_many
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+from controllers.grid.helper_classes.availability_mask import availability_to_masks, slot_counts
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+# Shade per coverage level: the first color means nobody is available, the last one means everybody is
+HEATMAP_COLORS = ("f8696b", "fa9473", "fcbf7b", "ffeb84", "c3df80", "86cc7d", "63be7b")
+
+
+def coverage_counts(availabilities, spec=None):
+    """
+    Counts, for every day and slot, how many employees are available.
+
+    Parameters:
+        availabilities: iterable of list
+            One parsed availability per employee (the list of `'DayId'`/`'DayRanges'` dictionaries
+            returned by `parse_availability`)
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
+
+    Returns:
+        dict: DayId -> list of counts, one per slot
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    dayMasks = {dayId: [] for dayId in spec.day_order}
+    for avail in availabilities:
+        for dayId, mask in availability_to_masks(avail, spec).items():
+            if dayId in dayMasks:
+                dayMasks[dayId].append(mask)
+
+    return {dayId: slot_counts(masks, spec) for dayId, masks in dayMasks.items()}
+
+
+def heatmap_color(count, total, colors=HEATMAP_COLORS):
+    """
+    Returns the shade of a slot in which `count` of `total` employees are available.
+
+    Zero always gets the first color and a full group the last one; the other colors split the shares in
+    between evenly, each covering shares up to and including its upper bound.
+    """
+    if count <= 0 or total <= 0:
+        return colors[0]
+    return colors[-(-min(count, total) * (len(colors) - 1) // total)]
+
+
+def heatmap_runs(counts, total, colors=HEATMAP_COLORS):
+    """
+    Groups consecutive slots with the same shade into spans.
+
+    Parameters:
+        counts: dict
+            DayId -> per-slot counts (see `coverage_counts`)
+        total: int
+            Number of employees in the group
+        colors: tuple of str
+            Shades from no coverage to full coverage
+
+    Returns:
+        dict: DayId -> [(first_slot, end_slot, color), ...], the `runs` format accepted by `GridXlsxWriter`
+    """
+    runs = {}
+    for dayId, dayCounts in counts.items():
+        dayRuns = []
+        start = 0
+        color = heatmap_color(dayCounts[0], total, colors)
+        for slot in range(1, len(dayCounts)):
+            slotColor = heatmap_color(dayCounts[slot], total, colors)
+            if slotColor != color:
+                dayRuns.append((start, slot, color))
+                start, color = slot, slotColor
+        dayRuns.append((start, len(dayCounts), color))
+        runs[dayId] = dayRuns
+    return runs
+
+
+def fill_in_heatmap(ws, counts, total, show_counts=False, colors=HEATMAP_COLORS, spec=None):
+    """
+    Paints a coverage heatmap on a blank grid worksheet.
+
+    Parameters:
+        ws: openpyxl.Worksheet
+            The Excel worksheet object to update.
+        counts: dict
+            DayId -> per-slot counts (see `coverage_counts`)
+        total: int
+            Number of employees in the group
+        show_counts: bool
+            Also write the number of available employees into every cell
+        colors: tuple of str
+            Shades from no coverage to full coverage
+        spec: GridSpec, optional
+            Geometry of the grid; must match the one the counts were computed with
+
+    Returns:
+        None
+
+    Side Effects:
+        - Modifies the provided Excel workbook in place.
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    for dayId, dayRuns in heatmap_runs(counts, total, colors).items():
+        rowNum = spec.row_of(dayId)
+        for startSlot, endSlot, color in dayRuns:
+            fill_in_span(ws, rowNum, spec.column_of(startSlot), spec.column_of(endSlot - 1), color)
+
+        if show_counts:
+            for slot, count in enumerate(counts[dayId]):
+                ws.cell(row=rowNum, column=spec.column_of(slot)).value = count
+
+    # The title row holds the template's name fields; the label goes in the empty cell right of them
+    ws.cell(row=spec.first_row - 2, column=spec.last_col + 1).value = f"Coverage: {total} employees"
+
+
+def generate_heatmap(studentIds, show_counts=False, force_refresh=False, spec=None):
+    """
+    Builds the coverage heatmap of a group of employees.
+
+    Parameters:
+        studentIds: iterable of str
+            Employees in the group. Their availability is looked up through the availability cache and
+            the misses are fetched in one batch.
+        show_counts: bool
+            Also write the number of available employees into every cell
+        force_refresh: bool
+            Fetch every employee from Schedule Source instead of using the cache
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
+
+    Returns:
+        tuple: (openpyxl.Workbook, dict, dict)
+            - The painted workbook
+            - The availability used, keyed by student ID
+            - The exception of each student whose availability could not be fetched (left out of the counts)
+    """
+    found, errors = get_availability_many(studentIds, force_refresh=force_refresh)
+
+    wb = new_grid_workbook(spec)
+    fill_in_heatmap(wb.active, coverage_counts(found.values(), spec), len(found), show_counts=show_counts, spec=spec)
+    return wb, found, errors
@@ -0,0 +1,3 @@
+"""
+Availability fetching, parsing, caching and storage used by the grid modules.
+"""
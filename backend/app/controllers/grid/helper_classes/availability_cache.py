@@ -0,0 +1,387 @@
+"""
+availability_cache.py
+
+OVERVIEW:
+    This module keeps parsed availability (the `DayId`/`DayRanges` list returned by `parse_availability`)
+    in memory so repeated grid requests for the same student do not re-authenticate and re-download it.
+    Availability rarely changes more than once a day, so entries live for a configurable TTL.
+
+    The in-memory layer is an LRU with a maximum number of entries. It can optionally be backed by a local
+    SQLite file, which survives restarts and lets several worker processes share what one of them fetched.
+
+FUNCTIONS AND CLASSES:
+    - class AvailabilityCache:
+        LRU + TTL cache keyed by student ID, with an optional SQLite backing store,
+        explicit invalidation, entry ages and hit/miss/eviction statistics.
+
+    - get_availability(studentId, force_refresh=False, cache=None, session_manager=None):
+        Drop-in replacement for `parse_availability` that answers from the cache when it can.
+
+    - get_availability_many(studentIds, force_refresh=False, cache=None, session_manager=None):
+        Batch version for a roster: answers the hits from the cache and fetches only the misses, in one batch.
+
+    - get_default_cache() / configure_default_cache(...):
+        Access or replace the process-wide cache.
+
+    When an `availability_store` is configured, misses that cannot be fetched are answered from it, and an
+    offline store answers every miss without calling Schedule Source.
+
+USAGE:
+    avail = get_availability(studentId)                       # cached
+    avail = get_availability(studentId, force_refresh=True)   # always re-fetched, cache updated
+    get_default_cache().invalidate(studentId)
+"""
+
+import json
+import time
+import sqlite3
+import datetime
+import threading
+from collections import OrderedDict
+
+from controllers.grid.helper_classes.availability_parser import parse_availability, parse_availability_many
+from controllers.grid.helper_classes.availability_store import get_availability_store
+from controllers.jobs.single_flight import SingleFlight
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+DEFAULT_MAX_ENTRIES = 1024          # Students kept in memory
+DEFAULT_TTL = 6 * 60 * 60           # Seconds an entry is served before it is fetched again
+
+
+class AvailabilityCache:
+    """
+    LRU cache with a time-to-live for parsed availability, keyed by student ID.
+
+    Thread-safe. Only successful parses are stored; a failed fetch (None) is never cached.
+
+    Parameters:
+        max_entries (int): Maximum number of students kept in memory before the least recently used is evicted
+        ttl (float): Seconds an entry stays valid
+        db_path (str or Path, optional): SQLite file used as a persistent second level. When omitted the cache
+            is memory only.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, db_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # studentId -> (stored_at, avail)
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        self._db = None
+        if db_path is not None:
+            self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS availability_cache ("
+                " student_id TEXT PRIMARY KEY,"
+                " payload TEXT NOT NULL,"
+                " stored_at REAL NOT NULL)"
+            )
+
+    def get(self, studentId):
+        """
+        Returns the cached availability for a student, or None on a miss or an expired entry.
+
+        Parameters:
+            studentId (str): The student's unique identifier
+
+        Returns:
+            list of dict or None: The same structure `parse_availability` returns
+        """
+        studentId = str(studentId)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(studentId)
+            if entry is not None:
+                if now - entry[0] < self.ttl:
+                    self._entries.move_to_end(studentId)
+                    self._hits += 1
+                    return entry[1]
+                del self._entries[studentId]
+                self._expirations += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload, stored_at FROM availability_cache WHERE student_id = ?", (studentId,)
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    avail = _decode(row[0])
+                    self._store(studentId, avail, row[1])
+                    self._disk_hits += 1
+                    return avail
+
+            self._misses += 1
+            return None
+
+    def put(self, studentId, avail, stored_at=None):
+        """
+        Stores a student's parsed availability. None is ignored so failures are retried next time.
+
+        Parameters:
+            studentId (str): The student's unique identifier
+            avail (list of dict): Output of `parse_availability`
+            stored_at (float, optional): When the availability was fetched, now by default. Availability older
+                than the TTL is not stored.
+        """
+        if avail is None:
+            return
+
+        studentId = str(studentId)
+        stored_at = time.time() if stored_at is None else stored_at
+        if time.time() - stored_at >= self.ttl:
+            return
+        with self._lock:
+            self._store(studentId, avail, stored_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO availability_cache (student_id, payload, stored_at) VALUES (?, ?, ?)",
+                    (studentId, _encode(avail), stored_at)
+                )
+
+    def age(self, studentId):
+        """
+        Returns how many seconds ago a student's availability was stored, expired or not.
+
+        Does not count as a hit or a miss and does not change the LRU order.
+
+        Returns:
+            float or None: Age in seconds, None if the student is not cached
+        """
+        studentId = str(studentId)
+        with self._lock:
+            entry = self._entries.get(studentId)
+            if entry is not None:
+                return time.time() - entry[0]
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT stored_at FROM availability_cache WHERE student_id = ?", (studentId,)
+                ).fetchone()
+                if row is not None:
+                    return time.time() - row[0]
+            return None
+
+    def invalidate(self, studentId):
+        """
+        Removes one student from the cache (memory and disk), so the next request fetches it again.
+
+        Returns:
+            bool: True if an entry was removed
+        """
+        studentId = str(studentId)
+        with self._lock:
+            removed = self._entries.pop(studentId, None) is not None
+            if self._db is not None:
+                cursor = self._db.execute("DELETE FROM availability_cache WHERE student_id = ?", (studentId,))
+                removed = removed or cursor.rowcount > 0
+            return removed
+
+    def clear(self):
+        """Removes every entry (memory and disk)"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM availability_cache")
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: hits, disk_hits, misses, evictions, expirations, size and max_entries
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def _store(self, studentId, avail, stored_at):
+        """Inserts into the in-memory LRU, evicting the least recently used entries. Lock must be held."""
+        self._entries[studentId] = (stored_at, avail)
+        self._entries.move_to_end(studentId)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+def _encode(avail):
+    """Serializes parsed availability to JSON, writing times as "HH:MM" strings"""
+    return json.dumps([
+        {
+            "DayId": day["DayId"],
+            "DayRanges": [
+                None if rng is None else [rng["start_time"].strftime("%H:%M"), rng["end_time"].strftime("%H:%M")]
+                for rng in day["DayRanges"]
+            ]
+        }
+        for day in avail
+    ])
+
+
+def _decode(payload):
+    """Inverse of `_encode`"""
+    return [
+        {
+            "DayId": day["DayId"],
+            "DayRanges": [
+                None if rng is None else {
+                    "start_time": datetime.time.fromisoformat(rng[0]),
+                    "end_time": datetime.time.fromisoformat(rng[1])
+                }
+                for rng in day["DayRanges"]
+            ]
+        }
+        for day in json.loads(payload)
+    ]
+
+
+#------------------------------------------------------------------------ Default Cache ------------------------------------------------------------------------#
+# Concurrent misses for the same student share one Schedule Source fetch
+fetch_flight = SingleFlight("availability_fetch")
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """Returns the process-wide cache, creating a memory-only one with the default settings on first use"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = AvailabilityCache()
+        return _default_cache
+
+
+def configure_default_cache(max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, db_path=None):
+    """
+    Replaces the process-wide cache.
+
+    Parameters:
+        max_entries (int): Maximum number of students kept in memory
+        ttl (float): Seconds an entry stays valid
+        db_path (str or Path, optional): SQLite file backing the cache
+
+    Returns:
+        AvailabilityCache: The new default cache
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = AvailabilityCache(max_entries=max_entries, ttl=ttl, db_path=db_path)
+        return _default_cache
+
+
+def get_availability(studentId, force_refresh=False, cache=None, session_manager=None):
+    """
+    Returns a student's parsed availability, using the cache in front of `parse_availability`.
+
+    Concurrent misses (or forced refreshes) for the same student wait for one shared fetch.
+
+    Parameters:
+        studentId (str): The student's unique identifier
+        force_refresh (bool): Skip the cache lookup and fetch from Schedule Source; the fresh result replaces
+            the cached one
+        cache (AvailabilityCache, optional): Cache to use. Defaults to the process-wide cache.
+        session_manager (SessionManager, optional): Passed to `parse_availability` on a miss
+
+    Returns:
+        list of dict or None: The same value `parse_availability` returns
+    """
+    cache = cache or get_default_cache()
+
+    if not force_refresh:
+        avail = cache.get(studentId)
+        if avail is not None:
+            return avail
+
+    return fetch_flight.do((id(cache), str(studentId)), _fetch, studentId, cache, session_manager)
+
+
+def _fetch(studentId, cache, session_manager):
+    """
+    Fetches one student from Schedule Source and stores the result in the cache.
+
+    With an availability store configured, an offline store answers instead of Schedule Source, and a failed
+    fetch is answered from the store. Stored availability is cached with the time it was fetched, so it is not
+    served as fresh and the warmer still sees it as due.
+    """
+    store = get_availability_store()
+    if store is None or not store.offline:
+        avail = parse_availability(studentId, session_manager=session_manager)
+        if avail is not None or store is None:
+            cache.put(studentId, avail)
+            return avail
+
+    avail = store.load(studentId)
+    if avail is not None:
+        cache.put(studentId, avail, stored_at=store.fetched_at(studentId))
+    return avail
+
+
+def get_availability_many(studentIds, force_refresh=False, cache=None, session_manager=None, strategy="auto"):
+    """
+    Returns the parsed availability of many students, fetching only the ones the cache cannot answer.
+
+    The misses are fetched together with `parse_availability_many`, so a cold roster costs one batch
+    instead of one round trip per student.
+
+    Parameters:
+        studentIds (iterable of str): The students' unique identifiers. Duplicates are looked up once.
+        force_refresh (bool): Skip the cache lookup and fetch every student
+        cache (AvailabilityCache, optional): Cache to use. Defaults to the process-wide cache.
+        session_manager (SessionManager, optional): Passed to `parse_availability_many` for the misses
+        strategy (str): Fetch strategy of the misses ("auto", "unfiltered" or "concurrent"),
+            see `ScheduleSourceAPI.get_global_availability_many`
+
+    Returns:
+        tuple: (dict, dict): Availability keyed by student ID, and the exception of each student that failed
+    """
+    cache = cache or get_default_cache()
+    studentIds = list(dict.fromkeys(str(studentId) for studentId in studentIds))
+
+    found = {}
+    missing = []
+    for studentId in studentIds:
+        avail = None if force_refresh else cache.get(studentId)
+        if avail is None:
+            missing.append(studentId)
+        else:
+            found[studentId] = avail
+
+    errors = {}
+    fallback = {}
+    store = get_availability_store()
+    if missing and store is not None and store.offline:
+        # Offline: answer the misses from the store, never from Schedule Source
+        fallback, notStored = store.load_many(missing)
+        errors = {studentId: LookupError("Not in the availability store") for studentId in notStored}
+    elif missing:
+        fetched, errors = parse_availability_many(missing, session_manager=session_manager, strategy=strategy)
+        for studentId, avail in fetched.items():
+            cache.put(studentId, avail)
+            found[studentId] = avail
+        if errors and store is not None:
+            # Students whose fetch failed are answered from the store when it has them
+            fallback, _ = store.load_many(errors)
+            errors = {studentId: e for studentId, e in errors.items() if studentId not in fallback}
+
+    # Stored availability keeps the time it was fetched (see `_fetch`)
+    if fallback:
+        fetchedAt = store.fetched_at_many(fallback)
+        for studentId, avail in fallback.items():
+            cache.put(studentId, avail, stored_at=fetchedAt.get(studentId))
+            found[studentId] = avail
+
+    return found, errors
@@ -0,0 +1,243 @@
+"""
+availability_mask.py
+
+OVERVIEW:
+    This module provides a compact representation of one day of availability: a bitmask with one bit per
+    slot of the grid (by default 5-minute slots from 6:00 to 22:00, 192 slots). Bit `i` is set when the student
+    is available at the start of slot `i`, which is exactly the check `is_available` performs for that cell.
+
+    The slot geometry comes from a `GridSpec`; every function that depends on it takes an optional `spec`
+    and uses `DEFAULT_GRID_SPEC` when it is omitted.
+
+    A mask is built once from a day's `DayRanges`, after which deciding which cells to fill is a bit test
+    instead of a scan over every range for every slot. Masks are plain Python integers, so combining the
+    availability of many students (union, intersection, per-slot counts) is a handful of integer operations.
+
+FUNCTIONS:
+    - ranges_to_mask(dayRanges, spec=None): Builds a day mask from the `DayRanges` list produced by the parser.
+    - mask_to_ranges(mask, spec=None): Converts a mask back into the `DayRanges` dict format.
+    - availability_to_masks(avail, spec=None) / masks_to_availability(masks, spec=None): Same conversion for a whole week.
+    - available_runs(mask), unavailable_runs(mask): Contiguous spans of slots, for painting a row span by span.
+    - runs_from_masks(masks, color, spec=None): The painted runs of a week, shared by the grid writer and renderer.
+    - is_slot_available(mask, slot), unavailable_slots(mask), count_available(mask): Single-mask queries.
+    - union(masks), intersection(masks), slot_counts(masks): Cross-student operations.
+
+DEPENDENCIES:
+    - datetime: The `DayRanges` format uses `datetime.time` objects.
+    - grid_spec: The grid window and slot length.
+"""
+
+import datetime
+
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+# Geometry of the default grid, see `GridSpec` for other resolutions
+GRID_START_MINUTE = DEFAULT_GRID_SPEC.start_minute      # First slot starts at 6:00
+GRID_END_MINUTE = DEFAULT_GRID_SPEC.end_minute          # Last slot ends at 22:00
+SLOT_MINUTES = DEFAULT_GRID_SPEC.step_minutes
+NUM_SLOTS = DEFAULT_GRID_SPEC.num_slots
+FULL_MASK = DEFAULT_GRID_SPEC.full_mask
+
+
+def time_to_minute(t):
+    """Returns the minute of the day of a `datetime.time`"""
+    return t.hour * 60 + t.minute
+
+
+def minute_to_slot(minute, spec=None):
+    """
+    Returns the index of the first slot that starts at or after `minute`, clamped to [0, num_slots].
+    """
+    return (spec or DEFAULT_GRID_SPEC).minute_to_slot(minute)
+
+
+def span_mask(start_minute, end_minute, spec=None):
+    """
+    Returns the mask of slots whose start time falls in [start_minute, end_minute).
+
+    Parameters:
+        start_minute (int): Minute of the day the span starts (inclusive)
+        end_minute (int): Minute of the day the span ends (exclusive)
+        spec (GridSpec, optional): Grid geometry, the default grid when omitted
+
+    Returns:
+        int: Bitmask with one bit per covered slot
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    lo = spec.minute_to_slot(start_minute)
+    hi = spec.minute_to_slot(end_minute)
+    if hi <= lo:
+        return 0
+    return ((1 << (hi - lo)) - 1) << lo
+
+
+def ranges_to_mask(dayRanges, spec=None):
+    """
+    Builds the availability mask of one day.
+
+    Parameters:
+        dayRanges (list of dict):
+            The day's ranges as produced by `parse_availability_for_one_day`, each with
+            `'start_time'` and `'end_time'` (`datetime.time`). Ranges that failed to parse (None) are skipped.
+        spec (GridSpec, optional): Grid geometry, the default grid when omitted
+
+    Returns:
+        int: Bitmask with bit `i` set when the student is available at the start of slot `i`
+    """
+    mask = 0
+    for rng in dayRanges:
+        if rng is None:
+            continue
+        mask |= span_mask(time_to_minute(rng["start_time"]), time_to_minute(rng["end_time"]), spec)
+    return mask
+
+
+def mask_to_ranges(mask, spec=None):
+    """
+    Converts a mask back into the `DayRanges` format, one range per run of available slots.
+
+    Parameters:
+        mask (int): Day availability mask
+        spec (GridSpec, optional): Grid geometry the mask was built with
+
+    Returns:
+        list of dict: Ranges with `'start_time'` and `'end_time'` (`datetime.time`), in order
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    ranges = []
+    for start, end in available_runs(mask):
+        start_minute = spec.slot_start_minute(start)
+        end_minute = spec.slot_start_minute(end)
+        ranges.append({
+            "start_time": datetime.time(start_minute // 60, start_minute % 60),
+            "end_time": datetime.time(end_minute // 60, end_minute % 60)
+        })
+    return ranges
+
+
+def available_runs(mask):
+    """
+    Returns the runs of consecutive available slots as (first_slot, end_slot) pairs, end exclusive.
+    """
+    runs = []
+    slot = 0
+    while mask:
+        # Skip the unavailable slots, then measure the run of available ones
+        skip = (mask & -mask).bit_length() - 1
+        mask >>= skip
+        slot += skip
+        length = (~mask & (mask + 1)).bit_length() - 1
+        runs.append((slot, slot + length))
+        mask >>= length
+        slot += length
+    return runs
+
+
+def unavailable_runs(mask, spec=None):
+    """
+    Returns the runs of consecutive unavailable slots as (first_slot, end_slot) pairs, end exclusive.
+    """
+    return available_runs((spec or DEFAULT_GRID_SPEC).full_mask & ~mask)
+
+
+def runs_from_masks(masks, color, spec=None):
+    """
+    Converts day availability masks into painted runs: every unavailable span gets `color`.
+
+    Returns:
+        dict: DayId -> [(first_slot, end_slot, color), ...], the `runs` format of `GridXlsxWriter` and `render_grid`
+    """
+    return {dayId: [(start, end, color) for start, end in unavailable_runs(mask, spec)] for dayId, mask in masks.items()}
+
+
+def availability_to_masks(avail, spec=None):
+    """
+    Converts the output of `parse_availability` into one mask per day.
+
+    Parameters:
+        avail (list of dict): Days with `'DayId'` and `'DayRanges'`
+        spec (GridSpec, optional): Grid geometry, the default grid when omitted
+
+    Returns:
+        dict: DayId -> mask. Days missing from `avail` are missing from the result.
+    """
+    return {day["DayId"]: ranges_to_mask(day["DayRanges"], spec) for day in avail}
+
+
+def masks_to_availability(masks, spec=None):
+    """
+    Converts a DayId -> mask dictionary back into the `parse_availability` format.
+    """
+    return [{"DayId": dayId, "DayRanges": mask_to_ranges(mask, spec)} for dayId, mask in sorted(masks.items())]
+
+
+def is_slot_available(mask, slot):
+    """Returns True when slot `slot` is available in `mask`"""
+    return (mask >> slot) & 1 == 1
+
+
+def unavailable_slots(mask, spec=None):
+    """Yields the index of every unavailable slot, in order"""
+    blocked = (spec or DEFAULT_GRID_SPEC).full_mask & ~mask
+    while blocked:
+        low = blocked & -blocked
+        yield low.bit_length() - 1
+        blocked ^= low
+
+
+def count_available(mask, spec=None):
+    """Returns the number of available slots in `mask`"""
+    return bin(mask & (spec or DEFAULT_GRID_SPEC).full_mask).count("1")
+
+
+def union(masks):
+    """Returns the mask of slots in which at least one of the masks is available"""
+    result = 0
+    for mask in masks:
+        result |= mask
+    return result
+
+
+def intersection(masks, spec=None):
+    """Returns the mask of slots in which every mask is available (the full mask for no masks)"""
+    result = (spec or DEFAULT_GRID_SPEC).full_mask
+    for mask in masks:
+        result &= mask
+    return result
+
+
+def slot_counts(masks, spec=None):
+    """
+    Counts, for every slot, how many of the masks are available.
+
+    The masks are summed with a bit-sliced counter (plane `k` holds bit `k` of every slot's count),
+    so adding a mask costs a few integer operations regardless of the number of slots.
+
+    Parameters:
+        masks (iterable of int): One mask per student
+        spec (GridSpec, optional): Grid geometry the masks were built with
+
+    Returns:
+        list of int: One count per slot, index = slot
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    planes = []
+    for mask in masks:
+        carry = mask & spec.full_mask
+        for k in range(len(planes)):
+            if not carry:
+                break
+            planes[k], carry = planes[k] ^ carry, planes[k] & carry
+        if carry:
+            planes.append(carry)
+
+    counts = [0] * spec.num_slots
+    for k, plane in enumerate(planes):
+        weight = 1 << k
+        while plane:
+            low = plane & -plane
+            counts[low.bit_length() - 1] += weight
+            plane ^= low
+    return counts
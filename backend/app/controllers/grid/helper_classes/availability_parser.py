@@ -10,40 +10,41 @@ OVERVIEW:
     a student's available time slots in a structured format and output their time slots onto an Excel grid
 
 FUNCTIONS:
-    -parse_availability(studentId)
+    -parse_availability(studentId, session_manager=None)
         Parses the full global availability data from Schedule Source and converts the date into
         an iterable dictionary list used to generate the grid
 
-    - parse_availability_for_one_day(availStr):
+    -parse_availability_many(studentIds, session_manager=None, strategy="auto")
+        Batch version of parse_availability for a whole roster. Returns the parsed availability keyed by
+        student ID together with the per-student errors, so one failure does not fail the batch
+
+    -parse_availability_many_async(studentIds, api=None)
+        asyncio version of parse_availability_many built on AsyncScheduleSourceAPI
+
+    -parse_availability_json(availJson, errors=None)
+        Converts the raw availability rows of one student into the day/range structure
+
+    - parse_availability_for_one_day(availStr, errors=None):
         Parses a single day's availability string into a list of time range dictionaries.
 
 DEPENDENCIES:
     - datetime: Used for parsing and handling time-related data.
-    - convert_to_time: Helper function for converting string representations of time into `datetime.time` objects.
-    - time_range_to_dict: Utility function for converting time range strings into structured dictionaries.
+    - range_parser: Precompiled, memoized parser of the `AvailableRanges` strings, reporting malformed ranges
+      as `RangeParseError` values.
+    - availability_store: When configured, every fetched student's rows are saved into it.
 
 """
 
-
-import sys
-from pathlib import Path
 import datetime
 
-#------------------------------------------------------------------------ Path Setup ------------------------------------------------------------------------#
-# Get the absolute path of the current file and resolve any symlinks
-# Then navigate up 4 levels to reach app directory:
-# availability_parser.py -> helper_classes -> grid -> controllers -> app
-root_dir = Path(__file__).resolve().parents[3]
-sys.path.append(str(root_dir))
-
-# Now we can import our local modules
-from controllers.api.schedule_source_api import ScheduleSourceAPI
 from utils.Credentials import load_creds
 from utils.URLs import URLs
-from controllers.grid.helper_classes.time_converter import time_range_to_dict, convert_to_time
+from controllers.grid.helper_classes.range_parser import parse_day, minutes_to_day_ranges
+from controllers.metrics.timing import timed
+from controllers.grid.helper_classes.availability_store import get_availability_store
 
 
-def parse_availability(studentId):
+def parse_availability(studentId, session_manager=None):
     """
        Parses a student's availability by retrieving data from the Schedule Source API.
 
@@ -54,6 +55,9 @@ def parse_availability(studentId):
        Parameters:
            studentId : str
                The unique identifier of the student whose availability is being queried.
+           session_manager : SessionManager, optional
+               Session owner used for the API call. Defaults to the process-wide manager,
+               so repeated calls reuse one Schedule Source session instead of logging in each time.
 
        Returns:
            list : dict:
@@ -65,55 +69,181 @@ def parse_availability(studentId):
 
     """
 
-    creds = load_creds()
-    credentials = {
-        "code": creds.code,
-        "user": creds.user,
-        "password": creds.password
-    }
-
-    api = ScheduleSourceAPI(URLs.TEST_SITE_AUTH.value, credentials)
+    api = _build_api(session_manager)
     if api.authenticate():
-        print("Authentication Successful")
         try:
-            # Will Hold the entire dictionary for all the days and their available ranges
-            dict = []
-
             # Get the Global Availability from Schedule Source API
             availJson = api.get_global_availability(studentId)
+            _remember({studentId: availJson})
+            return parse_availability_json(availJson)
+
+        except Exception as e:
+            print("ERROR OCCURRED ", e)
+            return None
 
-            # Parsing one day at a time
-            for day in availJson:
-                #Extract the ranges for 1 day from entire availability
-                dayRangeStr = day["AvailableRanges"]
-                dayId = day["DayId"]
 
-                #Use helper function to get a dictionary of start/end times for 1 day
-                dayRangeDict = parse_availability_for_one_day(dayRangeStr)
-                dict.append({
-                    "DayId": dayId,
-                    "DayRanges": dayRangeDict
-                })
+def parse_availability_many(studentIds, session_manager=None, strategy="auto"):
+    """
+       Parses the availability of many students with a single batch fetch from the Schedule Source API.
+
+       Uses `ScheduleSourceAPI.get_global_availability_many`, so a whole roster costs one unfiltered
+       query (or a bounded number of concurrent requests) instead of one sequential round trip per student.
+
+       Parameters:
+           studentIds : iterable of str
+               The unique identifiers of the students whose availability is being queried.
+           session_manager : SessionManager, optional
+               Session owner used for the API calls. Defaults to the process-wide manager.
+           strategy : str
+               Fetch strategy passed to `get_global_availability_many` ("auto", "unfiltered" or "concurrent").
 
-            return dict
+       Returns:
+           tuple : (dict, dict):
+               - A dictionary mapping each student ID to the same list of `'DayId'`/`'DayRanges'`
+                 dictionaries that `parse_availability` returns.
+               - A dictionary mapping each student ID that failed to the exception raised for it.
+    """
+    studentIds = list(studentIds)
+    api = _build_api(session_manager)
+    if not api.authenticate():
+        error = Exception("Failed to authenticate with the API")
+        return {}, {str(studentId): error for studentId in studentIds}
 
+    availJsons, errors = api.get_global_availability_many(studentIds, strategy=strategy)
+    _remember(availJsons)
+
+    parsed = {}
+    for studentId, availJson in availJsons.items():
+        try:
+            parsed[studentId] = parse_availability_json(availJson)
         except Exception as e:
-            print("ERROR OCCURRED ", e)
-            return None
+            errors[studentId] = e
 
+    return parsed, errors
 
-def parse_availability_for_one_day(availStr):
+
+async def parse_availability_many_async(studentIds, api=None):
+    """
+       asyncio version of `parse_availability_many`, for async web handlers and batch scripts.
+
+       Fetches with `AsyncScheduleSourceAPI`, whose semaphore bounds how many requests are in flight,
+       and returns exactly the same structures as the synchronous version.
+
+       Parameters:
+           studentIds : iterable of str
+               The unique identifiers of the students whose availability is being queried.
+           api : AsyncScheduleSourceAPI, optional
+               Client to use. When omitted, a client for the configured credentials is created and closed.
+
+       Returns:
+           tuple : (dict, dict):
+               The parsed availability keyed by student ID and the per-student errors.
+    """
+    from controllers.api.async_schedule_source_api import AsyncScheduleSourceAPI
+
+    studentIds = list(studentIds)
+    if api is None:
+        async with AsyncScheduleSourceAPI(URLs.TEST_SITE_AUTH.value, _load_credentials()) as own_api:
+            return await parse_availability_many_async(studentIds, api=own_api)
+
+    availJsons, errors = await api.get_global_availability_many(studentIds)
+    _remember(availJsons)
+
+    parsed = {}
+    for studentId, availJson in availJsons.items():
+        try:
+            parsed[studentId] = parse_availability_json(availJson)
+        except Exception as e:
+            errors[studentId] = e
+
+    return parsed, errors
+
+
+@timed("parse")
+def parse_availability_json(availJson, errors=None):
+    """
+    Converts the raw global availability rows of one student into the structure used to generate the grid.
+
+    Parameters:
+        availJson (list of dict):
+            Rows returned by `ScheduleSourceAPI.get_global_availability`, each with `'DayId'` and `'AvailableRanges'`.
+        errors (list, optional):
+            Receives a `RangeParseError` for every malformed range. When omitted, each one is printed instead.
+
+    Returns:
+        list of dict:
+            One dictionary per day with `'DayId'` and `'DayRanges'` (see `parse_availability`).
+    """
+    # Will Hold the entire dictionary for all the days and their available ranges
+    dict = []
+
+    # Parsing one day at a time
+    for day in availJson:
+        #Extract the ranges for 1 day from entire availability
+        dayRangeStr = day["AvailableRanges"]
+        dayId = day["DayId"]
+
+        #Use helper function to get a dictionary of start/end times for 1 day
+        dayErrors = []
+        dayRangeDict = parse_availability_for_one_day(dayRangeStr, errors=dayErrors)
+        if errors is not None:
+            errors.extend(dayErrors)
+        else:
+            for error in dayErrors:
+                print(f"MALFORMED AVAILABILITY FOR DAY {dayId}: {error}")
+        dict.append({
+            "DayId": dayId,
+            "DayRanges": dayRangeDict
+        })
+
+    return dict
+
+
+def _remember(availJsons):
+    """Saves fetched rows (studentId -> rows) into the availability store, when one is configured"""
+    store = get_availability_store()
+    if store is None or not availJsons:
+        return
+    try:
+        store.save_many(availJsons)
+    except Exception as e:
+        print(f"\n[WARNING] Could not save availability to the store: {str(e)}")
+
+
+def _build_api(session_manager=None):
+    """Creates a ScheduleSourceAPI client for the configured credentials"""
+    # Imported here because the client pulls in requests, which only the first fetch needs
+    from controllers.api.schedule_source_api import ScheduleSourceAPI
+
+    return ScheduleSourceAPI(URLs.TEST_SITE_AUTH.value, _load_credentials(), session_manager=session_manager)
+
+
+def _load_credentials():
+    """Returns the configured Schedule Source credentials as the dictionary the API clients expect"""
+    creds = load_creds()
+    return {
+        "code": creds.code,
+        "user": creds.user,
+        "password": creds.password
+    }
+
+
+def parse_availability_for_one_day(availStr, errors=None):
     """
     Parses a single day's availability string into a structured list of time ranges.
     by processing a string representation of availability for a single day,
     splits it into individual time ranges, and converts each range into a dictionary
     containing `start_time` and `end_time`.
 
+    The string is parsed by `range_parser.parse_day` (precompiled pattern, memoized per string).
+
     Parameters:
         availStr (str):
             A string representing the availability for a single day.
             Each time range is separated by a semicolon (`;`) and is in the format
             "startTime-endTime" (e.g., "9am-11am;1pm-3pm").
+        errors (list, optional):
+            Receives a `RangeParseError` for every malformed range. Malformed ranges are left out of the result.
 
     Returns:
         list of dict:
@@ -121,23 +251,8 @@ def parse_availability_for_one_day(availStr):
                 - `'start_time'`: A `datetime.time` object marking the start of the range.
                 - `'end_time'`: A `datetime.time` object marking the end of the range.
     """
+    ranges, rangeErrors = parse_day(availStr)
+    if errors is not None:
+        errors.extend(rangeErrors)
 
-    if not availStr:
-        return [{
-            "start_time": convert_to_time("", -1),
-            "end_time": convert_to_time("", 1)
-        }]
-
-    rangesDict = []
-
-    # String array with each time range
-    rangesStr = availStr.split(';')
-    rangesStr = [s for s in rangesStr if s]
-
-    for rangeStr in rangesStr:
-        rangeDict = time_range_to_dict(rangeStr)
-        rangesDict.append(rangeDict)
-
-    return rangesDict
-
-
+    return minutes_to_day_ranges(ranges)
@@ -0,0 +1,296 @@
+"""
+availability_store.py
+
+OVERVIEW:
+    This module keeps a persistent local copy of the availability fetched from Schedule Source in a SQLite file,
+    so grids and reports can be produced from it when the upstream is slow or down.
+
+    Unlike the availability cache, which keeps the parsed structure of a student for a TTL, the store keeps what
+    Schedule Source sent, day by day, together with the parsed ranges:
+        - availability_days:    one row per student and DayId with the raw `AvailableRanges` string and the
+                                time it was fetched
+        - availability_ranges:  one row per parsed range, as minutes of the day, indexed by (day, start, end)
+                                so "who is available on this day during this window" is an index range scan;
+                                touching and overlapping ranges of a day are merged into one row
+
+    Reading a whole roster is one query over `availability_days`; the strings are parsed again with the
+    memoized `range_parser`, which turns a thousand students into their `DayRanges` in a few milliseconds.
+
+    When a store is configured (`configure_availability_store`), every fetch made through `availability_parser`
+    is saved into it, and `availability_cache` falls back to it when a fetch fails. In offline mode the cache
+    answers from the store only and never calls Schedule Source.
+
+FUNCTIONS AND CLASSES:
+    - merge_ranges(ranges): Merges touching and overlapping ranges of a day before they are indexed.
+    - class AvailabilityStore:
+        save/save_many raw rows, load/load_many parsed availability, available_during for window queries,
+        fetched_at/fetched_at_many and stats.
+    - get_availability_store() / configure_availability_store(path, offline=False):
+        Access or replace the process-wide store (None until configured).
+
+USAGE:
+    store = configure_availability_store("availability.db")
+    avail = parse_availability(studentId)            # saved into the store as a side effect
+    roster, missing = store.load_many()              # every stored student, parsed
+    store.available_during(3, 11 * 60, 13 * 60 + 30) # IDs available all of Tuesday 11:00-13:30
+
+DEPENDENCIES:
+    - sqlite3: Storage and indexes.
+    - range_parser: Parsing of the stored `AvailableRanges` strings.
+"""
+
+import time
+import sqlite3
+import threading
+
+from controllers.grid.helper_classes.range_parser import parse_day, minutes_to_day_ranges
+
+
+#------------------------------------------------------------------------ Schema ------------------------------------------------------------------------#
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS availability_days ("
+    " employee_id TEXT NOT NULL,"
+    " day_id INTEGER NOT NULL,"
+    " available_ranges TEXT NOT NULL,"
+    " fetched_at REAL NOT NULL,"
+    " PRIMARY KEY (employee_id, day_id)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS availability_ranges ("
+    " employee_id TEXT NOT NULL,"
+    " day_id INTEGER NOT NULL,"
+    " start_minute INTEGER NOT NULL,"
+    " end_minute INTEGER NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS availability_ranges_window ON availability_ranges (day_id, start_minute, end_minute)",
+    "CREATE INDEX IF NOT EXISTS availability_ranges_employee ON availability_ranges (employee_id)",
+)
+
+
+def merge_ranges(ranges):
+    """
+    Merges touching and overlapping (start_minute, end_minute) ranges, so a window spanning
+    "8am-10am;10am-12pm" is covered by one row like it is by one painted span on the grid.
+
+    Returns:
+        list of tuple: Disjoint ranges, sorted
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class AvailabilityStore:
+    """
+    SQLite store of the raw and parsed availability of every student fetched so far.
+
+    Thread-safe: one connection shared behind a lock, in WAL mode so several processes can read while one writes.
+
+    Parameters:
+        path (str or Path): SQLite file, created if missing (":memory:" for a private in-memory store)
+        offline (bool): When True, `availability_cache` answers from this store without calling Schedule Source
+    """
+
+    def __init__(self, path, offline=False):
+        self.path = str(path)
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            self._db.execute(statement)
+
+        self._reads = 0
+        self._writes = 0
+
+    def save(self, studentId, rows, fetched_at=None):
+        """
+        Replaces a student's stored availability with the rows Schedule Source returned.
+
+        Parameters:
+            studentId (str): The student's unique identifier
+            rows (list of dict): Availability rows with `'DayId'` and `'AvailableRanges'`
+            fetched_at (float, optional): When the rows were fetched, now by default
+        """
+        self.save_many({studentId: rows}, fetched_at)
+
+    def save_many(self, rowsById, fetched_at=None):
+        """
+        Replaces the stored availability of many students in one transaction.
+
+        Parameters:
+            rowsById (dict): studentId -> availability rows
+            fetched_at (float, optional): When the rows were fetched, now by default
+        """
+        fetched_at = fetched_at or time.time()
+        days = []
+        ranges = []
+        for studentId, rows in rowsById.items():
+            studentId = str(studentId)
+            for row in rows:
+                availStr = row.get("AvailableRanges") or ""
+                days.append((studentId, row["DayId"], availStr, fetched_at))
+                ranges.extend((studentId, row["DayId"], start, end)
+                              for start, end in merge_ranges(parse_day(availStr)[0]))
+
+        ids = [(str(studentId),) for studentId in rowsById]
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany("DELETE FROM availability_days WHERE employee_id = ?", ids)
+                self._db.executemany("DELETE FROM availability_ranges WHERE employee_id = ?", ids)
+                self._db.executemany("INSERT INTO availability_days VALUES (?, ?, ?, ?)", days)
+                self._db.executemany("INSERT INTO availability_ranges VALUES (?, ?, ?, ?)", ranges)
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+            self._writes += len(ids)
+
+    def load(self, studentId):
+        """
+        Returns a student's stored availability in the `parse_availability` format, or None if never stored.
+        """
+        found, _ = self.load_many([studentId])
+        return found.get(str(studentId))
+
+    def load_many(self, studentIds=None):
+        """
+        Returns the stored availability of many students with one read.
+
+        Parameters:
+            studentIds (iterable of str, optional): Students to read; every stored student when omitted
+
+        Returns:
+            tuple: (dict, list): studentId -> availability in the `parse_availability` format, and the
+            requested IDs that are not stored
+        """
+        with self._lock:
+            if studentIds is None:
+                rows = self._db.execute(
+                    "SELECT employee_id, day_id, available_ranges FROM availability_days ORDER BY employee_id, day_id"
+                ).fetchall()
+            else:
+                studentIds = list(dict.fromkeys(str(studentId) for studentId in studentIds))
+                self._db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_ids (employee_id TEXT PRIMARY KEY)")
+                self._db.execute("DELETE FROM wanted_ids")
+                self._db.executemany("INSERT INTO wanted_ids VALUES (?)", [(i,) for i in studentIds])
+                rows = self._db.execute(
+                    "SELECT d.employee_id, d.day_id, d.available_ranges FROM availability_days d"
+                    " JOIN wanted_ids USING (employee_id) ORDER BY d.employee_id, d.day_id"
+                ).fetchall()
+            self._reads += 1
+
+        found = {}
+        for studentId, dayId, availStr in rows:
+            found.setdefault(studentId, []).append({
+                "DayId": dayId,
+                "DayRanges": minutes_to_day_ranges(parse_day(availStr)[0])
+            })
+        missing = [] if studentIds is None else [i for i in studentIds if i not in found]
+        return found, missing
+
+    def available_during(self, dayId, start_minute, end_minute):
+        """
+        Returns the students available for the whole window on a day (touching or overlapping ranges count as one).
+
+        Parameters:
+            dayId (int): Day of the week (1 = Sunday)
+            start_minute, end_minute (int): The window, as minutes of the day
+
+        Returns:
+            list of str: Student IDs, sorted
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT employee_id FROM availability_ranges"
+                " WHERE day_id = ? AND start_minute <= ? AND end_minute >= ? ORDER BY employee_id",
+                (dayId, start_minute, end_minute)
+            ).fetchall()
+            self._reads += 1
+        return [row[0] for row in rows]
+
+    def fetched_at(self, studentId):
+        """Returns when a student's availability was last stored (oldest day), or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT MIN(fetched_at) FROM availability_days WHERE employee_id = ?", (str(studentId),)
+            ).fetchone()
+        return row[0]
+
+    def fetched_at_many(self, studentIds):
+        """Returns studentId -> when the student's availability was last stored (oldest day), for stored students"""
+        studentIds = list(dict.fromkeys(str(studentId) for studentId in studentIds))
+        with self._lock:
+            self._db.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_ids (employee_id TEXT PRIMARY KEY)")
+            self._db.execute("DELETE FROM wanted_ids")
+            self._db.executemany("INSERT INTO wanted_ids VALUES (?)", [(i,) for i in studentIds])
+            rows = self._db.execute(
+                "SELECT d.employee_id, MIN(d.fetched_at) FROM availability_days d"
+                " JOIN wanted_ids USING (employee_id) GROUP BY d.employee_id"
+            ).fetchall()
+        return dict(rows)
+
+    def delete(self, studentId):
+        """
+        Removes a student from the store.
+
+        Returns:
+            bool: True if the student was stored
+        """
+        with self._lock:
+            cursor = self._db.execute("DELETE FROM availability_days WHERE employee_id = ?", (str(studentId),))
+            self._db.execute("DELETE FROM availability_ranges WHERE employee_id = ?", (str(studentId),))
+            return cursor.rowcount > 0
+
+    def stats(self):
+        """
+        Returns the store counters.
+
+        Returns:
+            dict: employees, days and ranges stored, oldest_fetch (seconds ago), reads, writes and offline
+        """
+        with self._lock:
+            employees, days, oldest = self._db.execute(
+                "SELECT COUNT(DISTINCT employee_id), COUNT(*), MIN(fetched_at) FROM availability_days"
+            ).fetchone()
+            ranges = self._db.execute("SELECT COUNT(*) FROM availability_ranges").fetchone()[0]
+            return {
+                "employees": employees,
+                "days": days,
+                "ranges": ranges,
+                "oldest_fetch": time.time() - oldest if oldest is not None else None,
+                "reads": self._reads,
+                "writes": self._writes,
+                "offline": self.offline,
+            }
+
+
+#------------------------------------------------------------------------ Default Store ------------------------------------------------------------------------#
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_availability_store():
+    """Returns the process-wide store, or None when no store is configured"""
+    with _default_store_lock:
+        return _default_store
+
+
+def configure_availability_store(path, offline=False):
+    """
+    Replaces the process-wide store.
+
+    Parameters:
+        path (str or Path): SQLite file of the store; None removes the store
+        offline (bool): Answer from the store only, never calling Schedule Source
+
+    Returns:
+        AvailabilityStore or None: The new default store
+    """
+    global _default_store
+    with _default_store_lock:
+        _default_store = AvailabilityStore(path, offline=offline) if path is not None else None
+        return _default_store
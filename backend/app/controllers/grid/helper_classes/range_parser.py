@@ -0,0 +1,164 @@
+"""
+range_parser.py
+
+OVERVIEW:
+    This module parses the `AvailableRanges` strings returned by Schedule Source, e.g. "8am-10:30am;1pm-5pm".
+
+    Grammar (case-insensitive, spaces allowed around every token):
+        day    := [range (";" range)*]        empty items between semicolons are ignored
+        range  := [time] "-" [time]           a missing start means midnight, a missing end means 23:59
+        time   := hour [":" minute] ("am" | "pm")        hour 1-12, minute 00-59
+
+    An empty day string means the whole day (00:00 to 23:59), as before.
+
+    Each range is matched with one precompiled pattern and converted straight to minutes of the day, with no
+    `strptime` and no intermediate strings. Day strings repeat a lot across a roster ("9am-5pm" on every weekday of
+    half the students), so results are memoized per string. Malformed ranges are returned as `RangeParseError`
+    values describing where and why, instead of being printed and replaced by None.
+
+FUNCTIONS AND CLASSES:
+    - class RangeParseError: Structured description of one malformed range.
+    - parse_day(availStr): Returns ((start_minute, end_minute), ...) and the errors, memoized.
+    - parse_day_strict(availStr): Same, but raises the first RangeParseError.
+    - minutes_to_day_ranges(ranges): Converts minute pairs to the `'start_time'`/`'end_time'` dictionaries.
+    - minute_to_time(minute): Shared `datetime.time` for a minute of the day.
+
+DEPENDENCIES:
+    - re, datetime, functools
+"""
+
+import re
+import datetime
+from functools import lru_cache
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+DAY_START_MINUTE = 0                # Value of a missing start time (midnight)
+DAY_END_MINUTE = 23 * 60 + 59       # Value of a missing end time (23:59)
+PARSE_CACHE_SIZE = 4096             # Distinct day strings memoized
+
+_TIME = r"(?:(\d{1,2})(?::(\d{2}))?\s*([ap])m)?"
+RANGE_PATTERN = re.compile(r"\s*" + _TIME + r"\s*-\s*" + _TIME + r"\s*", re.IGNORECASE)
+
+# One datetime.time per minute of the day, shared by every parsed range
+_TIMES = tuple(datetime.time(minute // 60, minute % 60) for minute in range(24 * 60))
+
+
+class RangeParseError(ValueError):
+    """
+    One malformed range of an `AvailableRanges` string.
+
+    Attributes:
+        text (str): The whole day string
+        segment (str): The range that could not be parsed
+        position (int): Offset of the segment in `text`
+        reason (str): What is wrong with it
+    """
+
+    def __init__(self, text, segment, position, reason):
+        super().__init__(f"{reason}: {segment!r} at position {position} of {text!r}")
+        self.text = text
+        self.segment = segment
+        self.position = position
+        self.reason = reason
+
+    def to_dict(self):
+        """Returns the error as a JSON-serializable dictionary"""
+        return {"text": self.text, "segment": self.segment, "position": self.position, "reason": self.reason}
+
+
+def _to_minute(hour, minute, meridiem):
+    """Converts the groups of one matched time to a minute of the day, or returns an error reason"""
+    hour = int(hour)
+    minute = int(minute) if minute else 0
+    if not 1 <= hour <= 12:
+        return None, f"hour {hour} is not between 1 and 12"
+    if minute > 59:
+        return None, f"minute {minute} is not between 0 and 59"
+    # 12am is midnight and 12pm is noon
+    hour = hour % 12 + (12 if meridiem in "pP" else 0)
+    return hour * 60 + minute, None
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_day(availStr):
+    """
+    Parses one day's `AvailableRanges` string.
+
+    Parameters:
+        availStr (str): The day string, e.g. "8am-10:30am;1pm-5pm". None or "" means the whole day.
+
+    Returns:
+        tuple: (ranges, errors)
+            - ranges: tuple of (start_minute, end_minute) pairs, in the order they appear
+            - errors: tuple of RangeParseError, one per malformed range (left out of `ranges`)
+
+        The result is memoized and shared between callers, hence the tuples.
+    """
+    if not availStr:
+        return ((DAY_START_MINUTE, DAY_END_MINUTE),), ()
+
+    ranges = []
+    errors = []
+    position = 0
+    for segment in availStr.split(";"):
+        start = position
+        position += len(segment) + 1
+        if not segment.strip():
+            continue
+
+        match = RANGE_PATTERN.fullmatch(segment)
+        if match is None:
+            errors.append(RangeParseError(availStr, segment, start, "expected '<time>-<time>' like '8am-10:30am'"))
+            continue
+
+        startHour, startMinute, startMeridiem, endHour, endMinute, endMeridiem = match.groups()
+        startValue, endValue = DAY_START_MINUTE, DAY_END_MINUTE
+        reason = None
+        if startHour is not None:
+            startValue, reason = _to_minute(startHour, startMinute, startMeridiem)
+        if reason is None and endHour is not None:
+            endValue, reason = _to_minute(endHour, endMinute, endMeridiem)
+
+        if reason is not None:
+            errors.append(RangeParseError(availStr, segment, start, reason))
+        else:
+            ranges.append((startValue, endValue))
+
+    return tuple(ranges), tuple(errors)
+
+
+def parse_day_strict(availStr):
+    """
+    Parses one day's `AvailableRanges` string, raising on the first malformed range.
+
+    Returns:
+        tuple: (start_minute, end_minute) pairs
+
+    Raises:
+        RangeParseError: If any range is malformed
+    """
+    ranges, errors = parse_day(availStr)
+    if errors:
+        raise errors[0]
+    return ranges
+
+
+def minute_to_time(minute):
+    """Returns the shared `datetime.time` of a minute of the day"""
+    return _TIMES[minute]
+
+
+def minutes_to_day_ranges(ranges):
+    """
+    Converts (start_minute, end_minute) pairs into the `DayRanges` format used by the grid.
+
+    Returns:
+        list of dict: `'start_time'` and `'end_time'` as `datetime.time`, a new list the caller may modify
+    """
+    return [{"start_time": _TIMES[start], "end_time": _TIMES[end]} for start, end in ranges]
+
+
+def cache_info():
+    """Returns the memoization statistics of `parse_day` (hits, misses, maxsize, currsize)"""
+    return parse_day.cache_info()
@@ -14,9 +14,15 @@ Key Functions:
 
 Usage:
 - These utilities are intended to preprocess time-related input strings and convert them into structured Python objects for further processing.
+- The availability parser now uses `range_parser`, which handles whole `AvailableRanges` strings in one pass; these functions
+  are kept for single values and as the reference in `benchmarks/bench_range_parser.py`.
 
 """
-from datetime import datetime
+from datetime import datetime, time
+
+# Fallback values for an empty start or end time
+MIDNIGHT = time(0, 0)
+LATE_NIGHT = time(23, 59)
 
 
 def convert_to_time(time_str, indicator):
@@ -41,14 +47,10 @@ def convert_to_time(time_str, indicator):
         """
     if not time_str:
         if indicator == -1:
-            midnight = datetime.strptime("00:00", "%H:%M")
-            midnight_time = midnight.time()
-            return midnight_time
+            return MIDNIGHT
 
         elif indicator == 1:
-            latenight = datetime.strptime("23:59", "%H:%M")
-            latenight_time = latenight.time()
-            return latenight_time
+            return LATE_NIGHT
 
     # Handle cases where the input time_str may have missing minutes (e.g., "8am")
     if len(time_str) == 4:  # For time strings like "8am" or "12am"
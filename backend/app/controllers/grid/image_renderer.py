@@ -0,0 +1,354 @@
+"""
+This file is responsible for rendering grids as images, PDF or an HTML table straight from the day masks, for managers
+who only want to view or print a schedule.
+
+Overview:
+- No workbook is involved: the input is the compact availability model (one bitmask per day, see `availability_mask`)
+  or already painted runs, the same input as the streaming `grid_writer`.
+- The grid is first laid out once as a small scene: one background per day row, one rectangle per painted span,
+  the hour lines and the labels. Each format then only serializes that scene:
+    - SVG and HTML are plain text; the HTML table merges every span into one cell (colspan) for inline previews,
+    - PDF is a single vector page (US Letter, landscape) using the built-in Helvetica font,
+    - PNG is rasterized row band by row band with a built-in 5x7 pixel font, so no imaging library is needed.
+- The layout mirrors the spreadsheet: same day order and labels, same blank colors per day, one hour is always
+  `HOUR_WIDTH` pixels wide whatever the cell length of the `GridSpec`.
+- `render_key` hashes everything an output depends on, so rendered files can be cached and revalidated by content.
+
+Key Functions:
+1. `render_grid`: Renders one grid in a given format and returns the bytes.
+2. `render_key`: Content hash of a render, for caching.
+3. `runs_from_masks` (from `availability_mask`): Converts day masks into painted runs.
+
+Dependencies:
+- zlib / struct: For the PNG and PDF streams.
+"""
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import zlib
+import struct
+import hashlib
+from html import escape
+
+from controllers.grid.grid_generator import day_blank_color, GRID_FILL_COLOR
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+from controllers.grid.template_builder import hour_label
+from controllers.grid.helper_classes.availability_mask import runs_from_masks
+from controllers.metrics.timing import span
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+RENDER_FORMATS = ("png", "svg", "pdf", "html")
+MIME_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+    "html": "text/html; charset=utf-8",
+}
+
+# Same labels as the template's first column
+DAY_LABELS = {1: "SUN", 2: "MON", 3: "TUES", 4: "WED", 5: "THUR", 6: "FRI", 7: "SAT"}
+
+# Layout, in pixels (points in the PDF before scaling)
+HOUR_WIDTH = 48
+LABEL_WIDTH = 44
+TITLE_HEIGHT = 20
+HEADER_HEIGHT = 16
+ROW_HEIGHT = 22
+LINE_COLOR = "808080"
+HOUR_LINE_COLOR = "404040"
+TEXT_COLOR = "000000"
+HEADER_COLOR = "ffffff"
+
+# PDF page: US Letter, landscape, half-inch margins
+PDF_PAGE = (792, 612)
+PDF_MARGIN = 36
+
+
+#------------------------------------------------------- Scene ------------------------------------------------------#
+class _Scene:
+    """
+    Format-independent layout of one grid.
+
+    Attributes:
+        width, height: Size in pixels
+        rects: [(x0, y0, x1, y1, color), ...] filled rectangles, drawn in order
+        lines: [(x0, y0, x1, y1, color), ...] 1-pixel lines
+        texts: [(x, y, text, anchor), ...] labels; y is the vertical middle, anchor is "start" or "middle"
+        rows: [(dayId, y0, y1, [(first_slot, end_slot, color), ...]), ...] the day rows, for the HTML table
+        slot_x: x of every slot boundary (num_slots + 1 values)
+    """
+
+    def __init__(self, runs, spec, title):
+        self.spec = spec
+        self.title = title
+        top = TITLE_HEIGHT if title else 0
+        self.slot_x = [LABEL_WIDTH + round(slot * HOUR_WIDTH / spec.slots_per_hour) for slot in range(spec.num_slots + 1)]
+        self.width = self.slot_x[-1] + 1
+        gridTop = top + HEADER_HEIGHT
+        self.height = gridTop + ROW_HEIGHT * len(spec.day_order) + 1
+
+        self.rects = [(LABEL_WIDTH, top, self.width, gridTop, HEADER_COLOR)]
+        self.lines = []
+        self.texts = []
+        self.rows = []
+        if title:
+            self.texts.append((4, TITLE_HEIGHT / 2, title, "start"))
+
+        # Day rows: blank background, then the painted spans
+        for index, dayId in enumerate(spec.day_order):
+            y0 = gridTop + index * ROW_HEIGHT
+            y1 = y0 + ROW_HEIGHT
+            dayRuns = sorted(runs.get(dayId, ()))
+            self.rows.append((dayId, y0, y1, dayRuns))
+            self.rects.append((LABEL_WIDTH, y0, self.width, y1, day_blank_color(dayId).lower()))
+            for start, end, color in dayRuns:
+                self.rects.append((self.slot_x[start], y0, self.slot_x[end], y1, color.lower()))
+            self.lines.append((0, y0, self.width, y0, LINE_COLOR))
+            self.texts.append((4, (y0 + y1) / 2, DAY_LABELS.get(dayId, str(dayId)), "start"))
+        self.lines.append((0, self.height - 1, self.width, self.height - 1, LINE_COLOR))
+
+        # Hour lines and labels
+        for hour in range(spec.start_hour, spec.end_hour + 1):
+            x = self.slot_x[min((hour - spec.start_hour) * spec.slots_per_hour, spec.num_slots)]
+            self.lines.append((x, top, x, self.height, HOUR_LINE_COLOR))
+            if hour < spec.end_hour:
+                self.texts.append((x + HOUR_WIDTH / 2, top + HEADER_HEIGHT / 2, hour_label(hour), "middle"))
+        self.lines.append((0, gridTop, 0, self.height, LINE_COLOR))
+        self.lines.append((LABEL_WIDTH - 1, top, LABEL_WIDTH - 1, self.height, LINE_COLOR))
+
+
+def _rgb(color):
+    return bytes.fromhex(color[-6:])
+
+
+#------------------------------------------------------- SVG ------------------------------------------------------#
+def _render_svg(scene):
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{scene.width}" height="{scene.height}" '
+             f'viewBox="0 0 {scene.width} {scene.height}" shape-rendering="crispEdges">',
+             f'<rect width="{scene.width}" height="{scene.height}" fill="#ffffff"/>']
+    parts.extend(f'<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" fill="#{color}"/>'
+                 for x0, y0, x1, y1, color in scene.rects)
+    parts.extend(f'<line x1="{x0 + 0.5}" y1="{y0 + 0.5}" x2="{x1 + 0.5}" y2="{y1 + 0.5}" stroke="#{color}"/>'
+                 for x0, y0, x1, y1, color in scene.lines)
+    parts.append(f'<g font-family="Helvetica, Arial, sans-serif" font-size="10" fill="#{TEXT_COLOR}" '
+                 f'dominant-baseline="central">')
+    parts.extend(f'<text x="{x}" y="{y}" text-anchor="{anchor}">{escape(text)}</text>'
+                 for x, y, text, anchor in scene.texts)
+    parts.append("</g></svg>")
+    return "".join(parts).encode("utf-8")
+
+
+#------------------------------------------------------- HTML ------------------------------------------------------#
+def _render_html(scene):
+    """A self-contained table: one header cell per hour and one cell per blank or painted span"""
+    spec = scene.spec
+    cell = "padding:0;height:18px;border:0;"
+    parts = ['<table class="grid-preview" style="border-collapse:collapse;table-layout:fixed;'
+             'font:11px Helvetica,Arial,sans-serif;border:1px solid #808080">']
+    if scene.title:
+        parts.append(f'<caption style="text-align:left;font-weight:600">{escape(scene.title)}</caption>')
+
+    parts.append('<tr><th style="width:44px"></th>')
+    for hour in range(spec.start_hour, spec.end_hour):
+        parts.append(f'<th colspan="{spec.slots_per_hour}" style="border-left:1px solid #{HOUR_LINE_COLOR};'
+                     f'font-weight:500">{hour_label(hour)}</th>')
+    parts.append("</tr>")
+
+    for dayId, _, _, dayRuns in scene.rows:
+        blank = day_blank_color(dayId).lower()
+        parts.append(f'<tr><th style="text-align:left;{cell}">{DAY_LABELS.get(dayId, dayId)}</th>')
+        position = 0
+        for start, end, color in dayRuns + [(spec.num_slots, spec.num_slots, None)]:
+            if start > position:
+                parts.append(f'<td colspan="{start - position}" style="{cell}background:#{blank}"></td>')
+            if end > start:
+                parts.append(f'<td colspan="{end - start}" style="{cell}background:#{color.lower()}"></td>')
+            position = max(position, end)
+        parts.append("</tr>")
+    parts.append("</table>")
+    return "".join(parts).encode("utf-8")
+
+
+#------------------------------------------------------- PDF ------------------------------------------------------#
+def _pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _render_pdf(scene):
+    pageWidth, pageHeight = PDF_PAGE
+    scale = min((pageWidth - 2 * PDF_MARGIN) / scene.width, (pageHeight - 2 * PDF_MARGIN) / scene.height)
+    left = PDF_MARGIN
+    top = pageHeight - PDF_MARGIN
+
+    def color(hexColor, op):
+        r, g, b = _rgb(hexColor)
+        return f"{r / 255:.3f} {g / 255:.3f} {b / 255:.3f} {op}"
+
+    ops = []
+    for x0, y0, x1, y1, fill in scene.rects:
+        ops.append(f"{color(fill, 'rg')} {left + x0 * scale:.2f} {top - y1 * scale:.2f} "
+                   f"{(x1 - x0) * scale:.2f} {(y1 - y0) * scale:.2f} re f")
+    ops.append(f"{0.5 * scale:.2f} w")
+    for x0, y0, x1, y1, stroke in scene.lines:
+        ops.append(f"{color(stroke, 'RG')} {left + (x0 + 0.5) * scale:.2f} {top - (y0 + 0.5) * scale:.2f} m "
+                   f"{left + (x1 + 0.5) * scale:.2f} {top - (y1 + 0.5) * scale:.2f} l S")
+    fontSize = 9 * scale
+    ops.append(color(TEXT_COLOR, "rg"))
+    for x, y, text, anchor in scene.texts:
+        # Helvetica's average glyph is about 0.55 em wide, close enough to center short labels
+        width = len(text) * fontSize * 0.55 if anchor == "middle" else 0
+        ops.append(f"BT /F1 {fontSize:.2f} Tf {left + x * scale - width / 2:.2f} "
+                   f"{top - y * scale - fontSize * 0.35:.2f} Td ({_pdf_text(text)}) Tj ET")
+    content = zlib.compress("\n".join(ops).encode("latin-1", "replace"))
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {pageWidth} {pageHeight}] "
+        f"/Resources << /Font << /F1 5 0 R >> >> /Contents 4 0 R >>".encode("ascii"),
+        f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode("ascii") + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("ascii")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii")
+    return bytes(out)
+
+
+#------------------------------------------------------- PNG ------------------------------------------------------#
+# 5x7 pixel font: 7 rows per glyph, the 5 low bits of each row are the pixels from left to right
+FONT_5X7 = {
+    "0": (0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E), "1": (0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E),
+    "2": (0x0E, 0x11, 0x01, 0x02, 0x04, 0x08, 0x1F), "3": (0x1F, 0x02, 0x04, 0x02, 0x01, 0x11, 0x0E),
+    "4": (0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02), "5": (0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E),
+    "6": (0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E), "7": (0x1F, 0x01, 0x02, 0x04, 0x08, 0x08, 0x08),
+    "8": (0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E), "9": (0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C),
+    "A": (0x0E, 0x11, 0x11, 0x11, 0x1F, 0x11, 0x11), "B": (0x1E, 0x11, 0x11, 0x1E, 0x11, 0x11, 0x1E),
+    "C": (0x0E, 0x11, 0x10, 0x10, 0x10, 0x11, 0x0E), "D": (0x1C, 0x12, 0x11, 0x11, 0x11, 0x12, 0x1C),
+    "E": (0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x1F), "F": (0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x10),
+    "G": (0x0E, 0x11, 0x10, 0x17, 0x11, 0x11, 0x0F), "H": (0x11, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11),
+    "I": (0x0E, 0x04, 0x04, 0x04, 0x04, 0x04, 0x0E), "J": (0x07, 0x02, 0x02, 0x02, 0x02, 0x12, 0x0C),
+    "K": (0x11, 0x12, 0x14, 0x18, 0x14, 0x12, 0x11), "L": (0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x1F),
+    "M": (0x11, 0x1B, 0x15, 0x15, 0x11, 0x11, 0x11), "N": (0x11, 0x11, 0x19, 0x15, 0x13, 0x11, 0x11),
+    "O": (0x0E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E), "P": (0x1E, 0x11, 0x11, 0x1E, 0x10, 0x10, 0x10),
+    "Q": (0x0E, 0x11, 0x11, 0x11, 0x15, 0x12, 0x0D), "R": (0x1E, 0x11, 0x11, 0x1E, 0x14, 0x12, 0x11),
+    "S": (0x0F, 0x10, 0x10, 0x0E, 0x01, 0x01, 0x1E), "T": (0x1F, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04),
+    "U": (0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E), "V": (0x11, 0x11, 0x11, 0x11, 0x11, 0x0A, 0x04),
+    "W": (0x11, 0x11, 0x11, 0x15, 0x15, 0x15, 0x0A), "X": (0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11),
+    "Y": (0x11, 0x11, 0x11, 0x0A, 0x04, 0x04, 0x04), "Z": (0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F),
+    "-": (0x00, 0x00, 0x00, 0x1F, 0x00, 0x00, 0x00), ":": (0x00, 0x0C, 0x0C, 0x00, 0x0C, 0x0C, 0x00),
+    ".": (0x00, 0x00, 0x00, 0x00, 0x00, 0x0C, 0x0C), "_": (0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x1F),
+}
+GLYPH_ADVANCE = 6
+
+
+def _render_png(scene):
+    width, height = scene.width, scene.height
+    stride = width * 3
+    pixels = bytearray(b"\xff" * (stride * height))
+
+    # Rows of one band are identical, so each band row is built once and copied
+    for x0, y0, x1, y1, color in scene.rects:
+        band = _rgb(color) * (x1 - x0)
+        for y in range(y0, y1):
+            start = y * stride + x0 * 3
+            pixels[start:start + len(band)] = band
+    for x0, y0, x1, y1, color in scene.lines:
+        rgb = _rgb(color)
+        if y0 == y1:
+            start = y0 * stride + x0 * 3
+            pixels[start:start + (x1 - x0) * 3] = rgb * (x1 - x0)
+        else:
+            for y in range(y0, min(y1, height)):
+                start = y * stride + x0 * 3
+                pixels[start:start + 3] = rgb
+
+    ink = _rgb(TEXT_COLOR)
+    for x, y, text, anchor in scene.texts:
+        text = text.upper()
+        left = round(x - (len(text) * GLYPH_ADVANCE - 1) / 2) if anchor == "middle" else round(x)
+        top = round(y - 3.5)
+        for index, char in enumerate(text):
+            glyph = FONT_5X7.get(char)
+            if glyph is None:
+                continue
+            gx = left + index * GLYPH_ADVANCE
+            for dy, bits in enumerate(glyph):
+                py = top + dy
+                if not 0 <= py < height:
+                    continue
+                for dx in range(5):
+                    if bits & (0x10 >> dx) and 0 <= gx + dx < width:
+                        start = py * stride + (gx + dx) * 3
+                        pixels[start:start + 3] = ink
+
+    raw = b"".join(b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+
+_RENDERERS = {"png": _render_png, "svg": _render_svg, "pdf": _render_pdf, "html": _render_html}
+
+
+#------------------------------------------------------- Public API ------------------------------------------------------#
+def render_key(fmt, masks=None, color=GRID_FILL_COLOR, runs=None, spec=None, title=None):
+    """
+    Returns the content hash of a render: equal keys always produce the same bytes.
+
+    Parameters are the same as `render_grid`.
+
+    Returns:
+        str: 32 hex digits
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    if runs is None:
+        runs = runs_from_masks(masks, color, spec)
+    canonical = repr((fmt, spec.name, spec.first_row, spec.first_col, spec.day_order, title,
+                      sorted((dayId, sorted((s, e, c.lower()) for s, e, c in dayRuns)) for dayId, dayRuns in runs.items())))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_grid(fmt, masks=None, color=GRID_FILL_COLOR, runs=None, spec=None, title=None):
+    """
+    Renders one grid without building a workbook.
+
+    Parameters:
+        fmt: str
+            "png", "svg", "pdf" or "html" (a self-contained <table> for inline previews)
+        masks: dict
+            DayId -> availability mask; unavailable slots are painted with `color`
+        color: str
+            6-digit hex code used for unavailable time
+        runs: dict, optional
+            DayId -> [(first_slot, end_slot, color), ...] to paint instead of deriving runs from `masks`
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
+        title: str, optional
+            Shown above the grid
+
+    Returns:
+        bytes: The rendered file
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    renderer = _RENDERERS.get(fmt)
+    if renderer is None:
+        raise ValueError(f"Unsupported render format: {fmt} (choose from {', '.join(RENDER_FORMATS)})")
+
+    spec = spec or DEFAULT_GRID_SPEC
+    if runs is None:
+        runs = runs_from_masks(masks, color, spec)
+    with span("render_" + fmt):
+        return renderer(_Scene(runs, spec, title))
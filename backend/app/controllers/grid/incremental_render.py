@@ -0,0 +1,211 @@
+"""
+This file is responsible for re-rendering a stored grid incrementally: when a student's availability changes on one
+day, only that day's row is repainted instead of clearing and repainting the whole week.
+
+Overview:
+- Every parsed day (its `DayRanges`) gets a short fingerprint (`day_fingerprints`). The fingerprints of a rendered grid
+  are kept as the meta of the grid's own store entry, together with the spec and the color, so they expire and are
+  evicted with the grid and never show up as a downloadable entry. The day masks the grid was painted from are kept
+  there too (`stored_masks`), so images and PDFs of a stored grid show exactly what its workbook shows.
+- On regeneration the new fingerprints are compared with the stored ones:
+    - nothing changed and the grid is still stored: its bytes are reused as they are, nothing is rendered or saved,
+    - some days changed and this process still holds the painted workbook of that grid: only the changed rows are
+      cleared and repainted before saving,
+    - otherwise the grid is rendered from a fresh copy of the template, as before.
+- Painted workbooks are kept in a small per-process LRU (`cache_size`), because reading a saved .xlsx back into
+  openpyxl costs more than rendering it from scratch.
+
+Key Classes and Functions:
+1. `day_fingerprints`: DayId -> fingerprint of the day's ranges.
+2. `stored_masks`: DayId -> mask a stored grid was painted from, read from its meta.
+3. `IncrementalGridRenderer.render`: Returns the grid bytes, rendering only what changed since the last render.
+
+Dependencies:
+- OpenPyXL: For the painted workbooks.
+- `grid_store`: Any backend; the fingerprints are stored as the meta of the grid entry.
+"""
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+
+from controllers.grid.grid_generator import new_grid_workbook, fill_in_day, clear_row, GRID_FILL_COLOR
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+from controllers.metrics.timing import span
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+DEFAULT_CACHE_SIZE = 32         # Painted workbooks kept per process, a few MB each
+BLANK_DAY = ""                  # Fingerprint of a day without availability, left blank on the grid
+
+
+def day_fingerprint(dayRanges):
+    """
+    Returns the fingerprint of one day's parsed ranges.
+
+    Parameters:
+        dayRanges: list of dict
+            The `'start_time'`/`'end_time'` dictionaries of the day
+
+    Returns:
+        str: 16 hex digits, equal for days with the same ranges
+    """
+    text = ";".join(f"{r['start_time']:%H:%M}-{r['end_time']:%H:%M}" for r in dayRanges)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def day_fingerprints(avail, spec=None):
+    """
+    Returns the fingerprint of every day of the grid.
+
+    Parameters:
+        avail: list of dict
+            Parsed availability (`'DayId'`/`'DayRanges'` dictionaries)
+        spec: GridSpec, optional
+            Geometry of the grid, the default grid when omitted
+
+    Returns:
+        dict: DayId -> fingerprint; days missing from `avail` get `BLANK_DAY`
+    """
+    spec = spec or DEFAULT_GRID_SPEC
+    fingerprints = {dayId: BLANK_DAY for dayId in spec.day_order}
+    for day in avail:
+        if day["DayId"] in fingerprints:
+            fingerprints[day["DayId"]] = day_fingerprint(day["DayRanges"])
+    return fingerprints
+
+
+def stored_masks(meta):
+    """
+    Returns the day masks a stored grid was painted from.
+
+    Parameters:
+        meta: dict or None
+            Meta of the grid's store entry, as written by `IncrementalGridRenderer.render`
+
+    Returns:
+        dict: DayId -> availability mask, or None for entries stored without masks
+    """
+    if not meta or "masks" not in meta:
+        return None
+    return {int(dayId): int(mask, 16) for dayId, mask in meta["masks"].items()}
+
+
+class IncrementalGridRenderer:
+    """
+    Renders grids into a grid store, repainting only the days that changed since the previous render.
+
+    Parameters:
+        store: GridStore
+            Where the grids and their fingerprints are kept
+        cache_size: int
+            Painted workbooks kept in this process for partial repaints (0 disables partial repaints)
+    """
+
+    def __init__(self, store, cache_size=DEFAULT_CACHE_SIZE):
+        self.store = store
+        self.cache_size = cache_size
+        self._workbooks = OrderedDict()     # grid id -> (meta, workbook)
+        self._lock = threading.Lock()
+
+        self._reused = 0
+        self._partial = 0
+        self._full = 0
+        self._rows_repainted = 0
+
+    def render(self, grid_id, avail, color=GRID_FILL_COLOR, spec=None):
+        """
+        Renders a grid and keeps it in the store under `grid_id`.
+
+        Parameters:
+            grid_id: str
+                Store key of the grid
+            avail: list of dict
+                Parsed availability
+            color: str
+                The color used for unavailable time
+            spec: GridSpec, optional
+                Geometry of the grid, the default grid when omitted
+
+        Returns:
+            tuple: (bytes, list of int): The .xlsx bytes and the DayIds that were repainted
+            (empty when the stored grid was reused, every day on a full render)
+        """
+        spec = spec or DEFAULT_GRID_SPEC
+        meta = {"spec": spec.name, "color": color.lower(),
+                "days": {str(dayId): fp for dayId, fp in day_fingerprints(avail, spec).items()},
+                "masks": {str(dayId): format(mask, "x") for dayId, mask in availability_to_masks(avail, spec).items()}}
+
+        # Unchanged since the stored render: reuse its bytes
+        stored = self.store.get_entry(grid_id)
+        if stored is not None and stored.meta == meta:
+            with self._lock:
+                self._reused += 1
+            return stored.data, []
+
+        # The workbook is taken out while it is painted, so concurrent renders of one grid never share it
+        with self._lock:
+            previous = self._workbooks.pop(grid_id, None)
+
+        if previous is not None and all(previous[0][k] == meta[k] for k in ("spec", "color")):
+            oldMeta, wb = previous
+            changed = [dayId for dayId in spec.day_order
+                       if oldMeta["days"][str(dayId)] != meta["days"][str(dayId)]]
+            with span("clear_grid"):
+                for dayId in changed:
+                    clear_row(wb.active, dayId, spec)
+            partial = True
+        else:
+            wb = new_grid_workbook(spec)
+            changed = list(spec.day_order)
+            partial = False
+
+        with span("fill"):
+            for day in avail:
+                if day["DayId"] in changed:
+                    fill_in_day(wb.active, day["DayId"], day["DayRanges"], color, spec)
+
+        buffer = io.BytesIO()
+        with span("serialize"):
+            wb.save(buffer)
+        data = buffer.getvalue()
+        self.store.put(grid_id, data, meta=meta)
+
+        with self._lock:
+            if partial:
+                self._partial += 1
+            else:
+                self._full += 1
+            self._rows_repainted += len(changed)
+            if self.cache_size > 0:
+                self._workbooks[grid_id] = (meta, wb)
+                self._workbooks.move_to_end(grid_id)
+                while len(self._workbooks) > self.cache_size:
+                    self._workbooks.popitem(last=False)
+        return data, changed
+
+    def forget(self, grid_id):
+        """Drops the painted workbook and the stored grid with its fingerprints, so its next render is a full one"""
+        with self._lock:
+            self._workbooks.pop(grid_id, None)
+        self.store.delete(grid_id)
+
+    def stats(self):
+        """
+        Returns the render counters.
+
+        Returns:
+            dict: reused (stored bytes returned as is), partial (only changed rows repainted), full (rendered
+            from the template), rows_repainted, workbooks (painted workbooks held) and cache_size
+        """
+        with self._lock:
+            return {
+                "reused": self._reused,
+                "partial": self._partial,
+                "full": self._full,
+                "rows_repainted": self._rows_repainted,
+                "workbooks": len(self._workbooks),
+                "cache_size": self.cache_size,
+            }
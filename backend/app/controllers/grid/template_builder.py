@@ -0,0 +1,165 @@
+"""
+This file is responsible for generating grid templates for any `GridSpec` from the hand-made `Timetable template.xlsx`.
+
+Overview:
+- `Timetable template.xlsx` is the only template maintained by hand. It is laid out for `DEFAULT_GRID_SPEC`
+  (6:00 to 22:00, 5-minute cells, Sunday in row 3, first slot in column B).
+- For another spec, every row of the grid area is rebuilt from the matching row of the master:
+    - the title row (name fields) keeps its merged blocks, remapped to the columns covering the same times,
+    - the hour header rows above and below the days get one merged, labelled block per hour of the spec,
+    - every day row copies its label and, for each cell, the style of the master cell at the same time of day;
+      a cell covering several master cells takes its right border from the last one, so hour lines stay in place,
+    - column widths are scaled with the cell length, so the grid keeps the width of the printed master.
+- The applicant information block below the grid is not part of generated templates; they are meant for overview
+  printouts.
+- Styles are copied inside the master's own workbook, so no style table has to be rebuilt.
+
+Key Functions:
+1. `build_template`: Generates the template workbook of a spec.
+2. `hour_label`: Formats an hour like the master headers ("6a", "12p").
+
+Usage:
+- Run `python backend/app/cli.py templates` to write the template of every registered spec to the current directory,
+  for inspection.
+- OpenPyXL is imported by the functions that use it; `image_renderer` imports `hour_label` without loading it.
+"""
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import copy
+
+from controllers.grid.grid_spec import DEFAULT_GRID_SPEC
+
+
+def hour_label(hour):
+    """Returns the header label of an hour: "12a", "6a", "12p", "1p", ..."""
+    return f"{hour % 12 or 12}{'a' if hour % 24 < 12 else 'p'}"
+
+
+def _copy_cell(source, target, value=True):
+    """Copies a cell's style (and value) to a cell of the same workbook"""
+    target._style = copy.copy(source._style)
+    if value:
+        target.value = source.value
+
+
+def _master_col(master_spec, minute):
+    """Returns the master column showing `minute`, clamped to the master's grid"""
+    minute = min(max(minute, master_spec.start_minute), master_spec.end_minute - master_spec.step_minutes)
+    return master_spec.column_of((minute - master_spec.start_minute) // master_spec.step_minutes)
+
+
+def _copy_grid_row(src, ws, masterRow, row, spec, master_spec):
+    """Fills the grid columns of one row, each cell styled like the master cells covering the same time"""
+    from openpyxl.styles import Border
+
+    for slot in range(spec.num_slots):
+        startMinute = spec.slot_start_minute(slot)
+        first = src.cell(row=masterRow, column=_master_col(master_spec, startMinute))
+        last = src.cell(row=masterRow, column=_master_col(master_spec, startMinute + spec.step_minutes - master_spec.step_minutes))
+        cell = ws.cell(row=row, column=spec.column_of(slot))
+        _copy_cell(first, cell, value=False)
+        if last.border.right != first.border.right:
+            border = first.border
+            cell.border = Border(left=border.left, right=last.border.right, top=border.top, bottom=border.bottom)
+
+
+def _copy_title_row(src, ws, masterRow, row, spec, master_spec):
+    """Copies the title row, remapping its merged blocks to the columns covering the same times"""
+    _copy_grid_row(src, ws, masterRow, row, spec, master_spec)
+    for merged in src.merged_cells.ranges:
+        if merged.min_row != masterRow or merged.max_row != masterRow:
+            continue
+        if merged.min_col < master_spec.first_col or merged.max_col > master_spec.last_col:
+            continue
+
+        startMinute = master_spec.slot_start_minute(master_spec.slot_at(merged.min_col))
+        endMinute = master_spec.slot_start_minute(master_spec.slot_at(merged.max_col) + 1)
+        firstSlot = spec.minute_to_slot(startMinute)
+        lastSlot = spec.minute_to_slot(endMinute) - 1
+        if lastSlot < firstSlot:
+            continue
+
+        ws.cell(row=row, column=spec.column_of(firstSlot)).value = src.cell(row=masterRow, column=merged.min_col).value
+        if lastSlot > firstSlot:
+            ws.merge_cells(start_row=row, start_column=spec.column_of(firstSlot),
+                           end_row=row, end_column=spec.column_of(lastSlot))
+
+
+def _build_hour_row(src, ws, masterRow, row, spec, master_spec):
+    """Builds an hour header row: one merged, labelled block per hour of the spec"""
+    _copy_grid_row(src, ws, masterRow, row, spec, master_spec)
+    for hour in range(spec.start_hour, spec.end_hour):
+        firstSlot = (hour - spec.start_hour) * spec.slots_per_hour
+        lastSlot = firstSlot + spec.slots_per_hour - 1
+        ws.cell(row=row, column=spec.column_of(firstSlot)).value = hour_label(hour)
+        if lastSlot > firstSlot:
+            ws.merge_cells(start_row=row, start_column=spec.column_of(firstSlot),
+                           end_row=row, end_column=spec.column_of(lastSlot))
+
+
+def build_template(spec, workbook, master_spec=DEFAULT_GRID_SPEC):
+    """
+    Generates the template of a spec from the master template.
+
+    Parameters:
+        spec: GridSpec
+            Geometry of the template to generate. Its first row must leave room for the title and header rows (>= 3).
+        workbook: openpyxl.Workbook
+            A private copy of the master template. It is modified: the generated sheet replaces the master sheet.
+        master_spec: GridSpec
+            Geometry of the master template
+
+    Returns:
+        openpyxl.Workbook: `workbook`, now holding the generated template (grid cells keep the master's blank colors)
+    """
+    from openpyxl.utils import get_column_letter
+
+    if spec.first_row < 3 or spec.first_col < 2:
+        raise ValueError(f"A generated template needs the grid at row 3 / column B or later, got {spec!r}")
+
+    src = workbook.active
+    ws = workbook.create_sheet()
+
+    # Row layout relative to the first day: title two rows above, hours right above and right below the days
+    titleRow, headerRow, footerRow = spec.first_row - 2, spec.first_row - 1, spec.first_row + len(spec.day_order)
+    masterTitle, masterHeader = master_spec.first_row - 2, master_spec.first_row - 1
+    masterFooter = master_spec.first_row + len(master_spec.day_order)
+    rows = [(masterTitle, titleRow), (masterHeader, headerRow), (masterFooter, footerRow)]
+    rows += [(master_spec.row_of(dayId), spec.row_of(dayId)) for dayId in spec.day_order]
+
+    labelCol, masterLabelCol = spec.first_col - 1, master_spec.first_col - 1
+    for masterRow, row in rows:
+        _copy_cell(src.cell(row=masterRow, column=masterLabelCol), ws.cell(row=row, column=labelCol))
+        height = src.row_dimensions[masterRow].height
+        if height is not None:
+            ws.row_dimensions[row].height = height
+
+    _copy_title_row(src, ws, masterTitle, titleRow, spec, master_spec)
+    _build_hour_row(src, ws, masterHeader, headerRow, spec, master_spec)
+    _build_hour_row(src, ws, masterFooter, footerRow, spec, master_spec)
+    for dayId in spec.day_order:
+        _copy_grid_row(src, ws, master_spec.row_of(dayId), spec.row_of(dayId), spec, master_spec)
+
+    # Same printed width as the master: cell widths scale with the cell length
+    labelLetter = get_column_letter(labelCol)
+    ws.column_dimensions[labelLetter].width = src.column_dimensions[get_column_letter(masterLabelCol)].width
+    slotWidth = src.column_dimensions[get_column_letter(master_spec.first_col)].width
+    if slotWidth:
+        width = slotWidth * spec.step_minutes / master_spec.step_minutes
+        for col in spec.slot_columns:
+            ws.column_dimensions[get_column_letter(col)].width = width
+
+    # Printing setup
+    ws.sheet_format = copy.copy(src.sheet_format)
+    ws.sheet_properties.pageSetUpPr = copy.copy(src.sheet_properties.pageSetUpPr)
+    ws.page_margins = copy.copy(src.page_margins)
+    ws.print_options = copy.copy(src.print_options)
+    ws.page_setup.orientation = src.page_setup.orientation
+    ws.page_setup.paperSize = src.page_setup.paperSize
+    ws.page_setup.fitToWidth = src.page_setup.fitToWidth
+    ws.page_setup.fitToHeight = src.page_setup.fitToHeight
+
+    title = src.title
+    workbook.remove(src)
+    ws.title = title
+    workbook.active = ws
+    return workbook
@@ -0,0 +1,3 @@
+"""
+Background job queue, single-flight deduplication and the roster warmer.
+"""
@@ -0,0 +1,274 @@
+# Job Queue
+# In-process background job queue used to take slow work (upstream fetch, rendering) out of the request/response cycle.
+# Jobs run on a local thread pool, so no external broker is needed. Each job has an ID that can be polled for its
+# status and progress, and jobs submitted with the same key while one is still queued or running share that job.
+# Finished jobs are kept for `retention` seconds so their result can still be polled, then forgotten.
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATES = frozenset({JOB_SUCCEEDED, JOB_FAILED})
+
+DEFAULT_MAX_WORKERS = 4             # Jobs running at once
+DEFAULT_RETENTION = 15 * 60         # Seconds a finished job can still be polled
+DEFAULT_MAX_FINISHED = 1000         # Finished jobs kept at most, oldest forgotten first
+
+
+#------------------------------------------------------- Job Error ------------------------------------------------------#
+class JobError(Exception):
+    """
+    Raised by a job function to fail the job with a message meant for the user.
+
+    Attributes:
+        status_code (int): HTTP status that describes the failure (e.g. 404 when there is nothing to generate)
+    """
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+#------------------------------------------------------- Job ------------------------------------------------------#
+class Job:
+    """
+    One unit of background work and its observable state.
+
+    Attributes:
+        id (str): Unique job ID
+        key (str): Deduplication key; None for jobs that are never shared
+        status (str): queued, running, succeeded or failed
+        progress (float): Fraction of the work done, 0 to 1
+        message (str): Short description of the current step
+        result: Return value of the job function once it succeeded
+        error (str): Failure message once it failed
+        error_status (int): HTTP status describing the failure
+    """
+
+    def __init__(self, key: str = None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = JOB_QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._done = threading.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def update(self, progress: float = None, message: str = None):
+        """Reports progress from inside the job function"""
+        if progress is not None:
+            self.progress = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            self.message = message
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until the job has finished. Returns False if the timeout expired first."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        """Returns the job state as a JSON-serializable dictionary (the result is left to the caller)"""
+        return {
+            "job_id": self.id,
+            "key": self.key,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "error": self.error,
+            "error_status": self.error_status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+#------------------------------------------------------- Job Queue ------------------------------------------------------#
+class JobQueue:
+    """
+    Thread pool running jobs in the background, with deduplication by key and polling by ID.
+
+    Attributes:
+        max_workers (int): Jobs running at once; further jobs wait in the queue
+        retention (float): Seconds a finished job is kept for polling
+        max_finished (int): Maximum number of finished jobs kept
+    """
+
+#------------------------------------------------------- Constructor ------------------------------------------------------#
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, retention: float = DEFAULT_RETENTION,
+                 max_finished: int = DEFAULT_MAX_FINISHED):
+        self.max_workers = max_workers
+        self.retention = retention
+        self.max_finished = max_finished
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}                     # job ID -> Job, queued, running or recently finished
+        self._active = {}                   # dedup key -> queued or running Job
+        self._finished = OrderedDict()      # job ID -> finished_at, oldest first
+
+        self._submitted = 0
+        self._deduplicated = 0
+        self._succeeded = 0
+        self._failed = 0
+
+
+#------------------------------------------------------- Submit ------------------------------------------------------#
+    def submit(self, fn, *args, key: str = None, **kwargs) -> Job:
+        """
+        Queues `fn(job, *args, **kwargs)` and returns its job without waiting.
+
+        The function receives its Job first so it can call `job.update(progress, message)`.
+        Raising JobError fails the job with that message; any other exception fails it with status 500.
+
+        Args:
+            fn (callable): The work to run
+            key (str): When a job with the same key is queued or running, that job is returned instead
+                       and `fn` is not queued again
+
+        Returns:
+            Job: The new or the shared job
+        """
+        with self._lock:
+            self._prune()
+            if key is not None:
+                active = self._active.get(key)
+                if active is not None:
+                    self._deduplicated += 1
+                    return active
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            if key is not None:
+                self._active[key] = job
+            self._submitted += 1
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Returns a job by ID, or None if it is unknown or was forgotten"""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+
+#------------------------------------------------------- Run ------------------------------------------------------#
+    def _run(self, job: Job, fn, args, kwargs):
+        """Runs one job on a pool thread and records its outcome"""
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        job.update(message="Running")
+        try:
+            result = fn(job, *args, **kwargs)
+        except JobError as e:
+            self._finish(job, error=str(e), error_status=e.status_code)
+        except Exception as e:
+            self._finish(job, error=f"{type(e).__name__}: {e}", error_status=500)
+        else:
+            self._finish(job, result=result)
+
+    def _finish(self, job: Job, result=None, error: str = None, error_status: int = None):
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.error_status = error_status
+            job.finished_at = time.time()
+            if error is None:
+                job.status = JOB_SUCCEEDED
+                job.update(1.0, "Done")
+                self._succeeded += 1
+            else:
+                job.status = JOB_FAILED
+                job.message = "Failed"
+                self._failed += 1
+
+            if job.key is not None and self._active.get(job.key) is job:
+                del self._active[job.key]
+            self._finished[job.id] = job.finished_at
+        job._done.set()
+
+    def _prune(self):
+        """Forgets finished jobs past their retention or beyond `max_finished`. Lock must be held."""
+        cutoff = time.time() - self.retention
+        while self._finished:
+            job_id, finished_at = next(iter(self._finished.items()))
+            if finished_at > cutoff and len(self._finished) <= self.max_finished:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+
+#------------------------------------------------------- Stats ------------------------------------------------------#
+    def stats(self) -> dict:
+        """
+        Returns the queue counters.
+
+        Returns:
+            dict: submitted, deduplicated, succeeded, failed, and the current queued/running/finished counts
+        """
+        with self._lock:
+            self._prune()
+            states = [job.status for job in self._jobs.values()]
+            return {
+                "submitted": self._submitted,
+                "deduplicated": self._deduplicated,
+                "succeeded": self._succeeded,
+                "failed": self._failed,
+                "queued": states.count(JOB_QUEUED),
+                "running": states.count(JOB_RUNNING),
+                "finished": len(self._finished),
+                "max_workers": self.max_workers,
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stops accepting jobs and, if `wait`, lets the running ones finish"""
+        self._executor.shutdown(wait=wait)
+
+
+#------------------------------------------------------- Default Queue ------------------------------------------------------#
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Returns the process-wide job queue, creating it with the default settings on first use"""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue()
+        return _default_queue
+
+
+def configure_job_queue(**options) -> JobQueue:
+    """
+    Replaces the process-wide job queue.
+
+    Args:
+        **options: Any JobQueue constructor argument (max_workers, retention, max_finished)
+
+    Returns:
+        JobQueue: The new default queue
+    """
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is not None:
+            _default_queue.shutdown(wait=False)
+        _default_queue = JobQueue(**options)
+        return _default_queue
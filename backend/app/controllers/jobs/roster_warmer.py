@@ -0,0 +1,266 @@
+# Roster Warmer
+# Background prefetch of a roster's availability, so the first grid of the week does not wait on Schedule Source.
+# On every pass the warmer re-fetches the students whose cached availability is missing or older than
+# `refresh_after` and stores the result in the availability cache (and the who-is-available index when one is given).
+# A pass with at least `roster_query_from` students due is one unfiltered roster-wide query split into the students'
+# rows; smaller passes fetch per employee, in batches of `batch_size` with at most `concurrency` batches in flight
+# (a batch of 25 or more would otherwise turn into the full unfiltered query every time). Passes repeat every `interval` seconds
+# with random jitter and can be limited to off-peak hours. Students that fail are retried with exponential backoff.
+# Runs as a daemon thread inside the Flask process (`start`) or on its own from the command line (`cli.py warm`).
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import time
+import random
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from controllers.grid.helper_classes.availability_cache import get_availability_many, get_default_cache
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+DEFAULT_INTERVAL = 60 * 60          # Seconds between passes
+DEFAULT_CONCURRENCY = 2             # Batches fetched at once
+DEFAULT_BATCH_SIZE = 10             # Students per batch of per-employee requests
+DEFAULT_ROSTER_QUERY_FROM = 25      # Due students from which a pass is one roster-wide query
+DEFAULT_JITTER = 0.1                # Passes start up to 10% of the interval early or late
+DEFAULT_BASE_BACKOFF = 60           # Seconds before the first retry of a failing student
+DEFAULT_MAX_BACKOFF = 6 * 60 * 60   # Longest wait between retries
+
+
+def parse_off_peak(text):
+    """
+    Parses an off-peak window written as hours, e.g. "22-6" (10pm to 6am) or "0-7".
+
+    Returns:
+        tuple: (start_hour, end_hour), or None for an empty string (always allowed)
+    """
+    if not text:
+        return None
+    start, _, end = str(text).partition("-")
+    window = (int(start), int(end))
+    if not all(0 <= hour <= 24 for hour in window) or window[0] == window[1]:
+        raise ValueError(f"Invalid off-peak window: {text!r} (use hours like 22-6)")
+    return window
+
+
+#------------------------------------------------------- Roster Warmer ------------------------------------------------------#
+class RosterWarmer:
+    """
+    Keeps the cached availability of a roster fresh in the background.
+
+    Attributes:
+        interval (float): Seconds between passes
+        concurrency (int): Batches fetched at once
+        batch_size (int): Students per batch of per-employee requests
+        roster_query_from (int): Due students from which a pass is one unfiltered roster-wide query
+        jitter (float): Random share of the interval added to or removed from every wait
+        off_peak (tuple): (start_hour, end_hour) local hours during which passes may run, None for any time
+        refresh_after (float): Age from which a cached student is fetched again (defaults to the interval)
+        base_backoff, max_backoff (float): Retry delays of a failing student, doubled after every failure
+    """
+
+#------------------------------------------------------- Constructor ------------------------------------------------------#
+    def __init__(self, roster=(), interval: float = DEFAULT_INTERVAL, concurrency: int = DEFAULT_CONCURRENCY,
+                 batch_size: int = DEFAULT_BATCH_SIZE, roster_query_from: int = DEFAULT_ROSTER_QUERY_FROM, jitter: float = DEFAULT_JITTER, off_peak=None,
+                 refresh_after: float = None, base_backoff: float = DEFAULT_BASE_BACKOFF,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, cache=None, index=None):
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.roster_query_from = max(1, roster_query_from)
+        self.jitter = jitter
+        self.off_peak = off_peak
+        self.refresh_after = refresh_after if refresh_after is not None else interval
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.cache = cache
+        self.index = index
+
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()       # One pass at a time
+        self._stop = threading.Event()
+        self._thread = None
+        self._roster = []
+        self._failures = {}                     # studentId -> (consecutive failures, last error, retry at)
+        self._last_run = None
+        self._next_run = None
+        self._passes = 0
+        self._refreshed = 0
+        self._failed = 0
+        self.set_roster(roster)
+
+    def set_roster(self, roster):
+        """Replaces the roster; students no longer on it are forgotten"""
+        roster = list(dict.fromkeys(str(studentId) for studentId in roster))
+        with self._lock:
+            self._roster = roster
+            keep = set(roster)
+            self._failures = {k: v for k, v in self._failures.items() if k in keep}
+
+
+#------------------------------------------------------- Pass ------------------------------------------------------#
+    def _cache(self):
+        return self.cache or get_default_cache()
+
+    def due(self, now: float = None) -> list:
+        """Returns the students to fetch now: missing or old in the cache, and not waiting for a retry"""
+        now = now or time.time()
+        cache = self._cache()
+        with self._lock:
+            roster = list(self._roster)
+            failures = dict(self._failures)
+        due = []
+        for studentId in roster:
+            if studentId in failures and failures[studentId][2] > now:
+                continue
+            age = cache.age(studentId)
+            if age is None or age >= self.refresh_after:
+                due.append(studentId)
+        return due
+
+    def run_once(self) -> dict:
+        """
+        Runs one pass over the students that are due.
+
+        Returns:
+            dict: started_at, duration, due, refreshed and failed counts of the pass
+        """
+        with self._run_lock:
+            started = time.time()
+            due = self.due(started)
+            batches = [due[i:i + self.batch_size] for i in range(0, len(due), self.batch_size)]
+
+            refreshed = failed = 0
+            if len(due) >= self.roster_query_from:
+                # One roster-wide query split per student ("auto" falls back to per-employee requests when the
+                # unfiltered query fails)
+                found, errors = self._fetch(due, strategy="auto")
+                refreshed, failed = len(found), len(due) - len(found)
+                self._record(due, found, errors)
+            elif batches:
+                with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches)),
+                                        thread_name_prefix="warmer") as executor:
+                    for batch, (found, errors) in zip(batches, executor.map(self._fetch, batches)):
+                        refreshed += len(found)
+                        failed += len(batch) - len(found)
+                        self._record(batch, found, errors)
+
+            run = {"started_at": started, "duration": time.time() - started, "due": len(due),
+                   "refreshed": refreshed, "failed": failed}
+            with self._lock:
+                self._last_run = run
+                self._passes += 1
+                self._refreshed += refreshed
+                self._failed += failed
+            return run
+
+    def _fetch(self, batch, strategy="concurrent"):
+        """Fetches one batch into the cache; a batch that raises fails every student in it"""
+        try:
+            return get_availability_many(batch, force_refresh=True, cache=self._cache(), strategy=strategy)
+        except Exception as e:
+            return {}, {studentId: e for studentId in batch}
+
+    def _record(self, batch, found, errors):
+        """Updates the index and the retry schedule after a batch"""
+        if self.index is not None:
+            self.index.update_many(found)
+
+        now = time.time()
+        with self._lock:
+            for studentId in found:
+                self._failures.pop(studentId, None)
+            for studentId in batch:
+                if studentId in found:
+                    continue
+                # Students missing from the answer count as failures too
+                error = errors.get(studentId, "No availability returned")
+                count = self._failures.get(studentId, (0, None, 0))[0] + 1
+                delay = min(self.base_backoff * 2 ** (count - 1), self.max_backoff)
+                self._failures[studentId] = (count, str(error), now + delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+#------------------------------------------------------- Schedule ------------------------------------------------------#
+    def in_off_peak(self, when: datetime.datetime = None) -> bool:
+        """Returns True when passes may run at `when` (local time, now by default)"""
+        if self.off_peak is None:
+            return True
+        hour = (when or datetime.datetime.now()).hour
+        start, end = self.off_peak
+        return start <= hour < end if start < end else hour >= start or hour < end
+
+    def seconds_until_off_peak(self, when: datetime.datetime = None) -> float:
+        """Returns how long to wait for the next off-peak window, 0 when already in one"""
+        when = when or datetime.datetime.now()
+        if self.in_off_peak(when):
+            return 0.0
+        opens = when.replace(hour=self.off_peak[0] % 24, minute=0, second=0, microsecond=0)
+        if opens <= when:
+            opens += datetime.timedelta(days=1)
+        return (opens - when).total_seconds()
+
+    def start(self):
+        """Starts the background passes on a daemon thread (the first pass runs as soon as it is allowed)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="roster-warmer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stops the background passes after the current one"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            wait = self.seconds_until_off_peak()
+            if wait == 0:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    print(f"\n[WARNING] Roster warming pass failed: {str(e)}")
+                wait = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            with self._lock:
+                self._next_run = time.time() + wait
+            self._stop.wait(wait)
+
+
+#------------------------------------------------------- Report ------------------------------------------------------#
+    def report(self, now: float = None) -> dict:
+        """
+        Describes how fresh the roster is.
+
+        Returns:
+            dict: roster_size, fresh and stale counts, the stale IDs (missing or older than `refresh_after`)
+            with their age in seconds (None when never fetched), the failing IDs with their consecutive failures,
+            last error and retry time, the last pass, the next pass and the totals
+        """
+        now = now or time.time()
+        cache = self._cache()
+        with self._lock:
+            roster = list(self._roster)
+            failures = dict(self._failures)
+            summary = {"last_run": self._last_run, "next_run": self._next_run, "passes": self._passes,
+                       "refreshed": self._refreshed, "failed": self._failed}
+
+        stale = {}
+        for studentId in roster:
+            age = cache.age(studentId)
+            if age is None or age >= self.refresh_after:
+                stale[studentId] = round(age, 1) if age is not None else None
+
+        return {
+            "roster_size": len(roster),
+            "fresh": len(roster) - len(stale),
+            "stale": stale,
+            "failing": {studentId: {"failures": count, "last_error": error, "retry_at": retryAt}
+                        for studentId, (count, error, retryAt) in failures.items()},
+            "running": self._thread is not None and self._thread.is_alive(),
+            "settings": {"interval": self.interval, "concurrency": self.concurrency, "batch_size": self.batch_size,
+                         "roster_query_from": self.roster_query_from, "jitter": self.jitter, "off_peak": self.off_peak, "refresh_after": self.refresh_after},
+            **summary,
+        }
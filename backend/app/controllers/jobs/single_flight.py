@@ -0,0 +1,100 @@
+# Single Flight
+# Coalesces concurrent calls that would compute the same thing.
+# The first caller for a key runs the function; callers arriving with the same key while it is running wait for
+# it and receive the same result (or the same exception) instead of starting their own computation.
+# Nothing is cached: once the call returns, the next caller for that key runs the function again.
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import threading
+
+
+#------------------------------------------------------- Flight ------------------------------------------------------#
+class _Flight:
+    """One in-flight call and its outcome"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+#------------------------------------------------------- Single Flight ------------------------------------------------------#
+class SingleFlight:
+    """
+    Per-key single-flight group. Thread-safe.
+
+    Attributes:
+        name (str): Label used in stats
+    """
+
+    def __init__(self, name: str = None):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+
+        self._calls = 0
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Runs `fn(*args, **kwargs)`, unless a call with the same key is already running, in which case
+        waits for that call and returns its result.
+
+        Args:
+            key: Hashable identity of the computation (e.g. the external ID and the options)
+            fn (callable): The computation
+
+        Returns:
+            Whatever `fn` returned for the caller that ran it
+
+        Raises:
+            Whatever `fn` raised for the caller that ran it
+        """
+        with self._lock:
+            self._calls += 1
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self._coalesced += 1
+                leader = False
+            else:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._executions += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn(*args, **kwargs)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def stats(self) -> dict:
+        """
+        Returns the group counters.
+
+        Returns:
+            dict: calls, executions (calls that ran the function), coalesced (calls that shared another's result)
+                  and in_flight (keys currently running)
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "calls": self._calls,
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._flights),
+            }
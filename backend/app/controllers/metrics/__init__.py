@@ -0,0 +1,3 @@
+"""
+Per-stage timing spans exported at /metrics.
+"""
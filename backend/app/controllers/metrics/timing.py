@@ -0,0 +1,244 @@
+# Timing
+# Structured timing of the stages of grid generation (authentication, the availability call, parsing, template load,
+# painting, serialization). Every stage is wrapped in a named span; finished spans feed a per-process histogram that is
+# exported in the Prometheus text format, and the spans of one unit of work (e.g. one /generate job) can be collected
+# to report them back to the caller, e.g. as a Server-Timing header.
+# When the registry is disabled a span is a shared no-op context manager, so instrumented code pays one flag check.
+
+#------------------------------------------------------- Imports ------------------------------------------------------#
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+#------------------------------------------------------- Constants ------------------------------------------------------#
+METRIC_NAME = "grid_stage_seconds"
+METRIC_HELP = "Time spent in each stage of grid generation"
+# Upper bounds of the histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Spans of the unit of work running in the current thread/task, if it is being collected (see `collect`)
+_collector = ContextVar("timing_collector", default=None)
+
+
+#------------------------------------------------------- Null Span ------------------------------------------------------#
+class _NullSpan:
+    """Span used while timing is disabled: enters and exits without doing anything"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+#------------------------------------------------------- Span ------------------------------------------------------#
+class _Span:
+    """Times one stage and records it when it exits, whether it succeeded or raised"""
+
+    __slots__ = ("registry", "name", "started")
+
+    def __init__(self, registry, name: str):
+        self.registry = registry
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.registry.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+#------------------------------------------------------- Timing Registry ------------------------------------------------------#
+class TimingRegistry:
+    """
+    Per-process histogram of stage durations.
+
+    Attributes:
+        enabled (bool): When False, `span` returns a no-op and nothing is recorded
+        buckets (tuple): Upper bounds of the histogram buckets, in seconds
+    """
+
+    def __init__(self, enabled: bool = True, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._stages = {}       # name -> [bucket counts..., +Inf count], sum
+
+    def span(self, name: str):
+        """
+        Returns a context manager timing the stage `name`.
+
+        Usage:
+            with registry.span("serialize"):
+                wb.save(buffer)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Adds one duration of a stage to the histogram and to the current collection, if any"""
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = stage[0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            stage[1] += seconds
+
+        spans = _collector.get()
+        if spans is not None:
+            spans.append((name, seconds))
+
+    def snapshot(self) -> dict:
+        """
+        Returns the histograms.
+
+        Returns:
+            dict: stage -> {"count", "sum", "buckets": [(upper bound, cumulative count), ...]}; the last bound is inf
+        """
+        with self._lock:
+            stages = {name: (list(counts), total) for name, (counts, total) in self._stages.items()}
+
+        snapshot = {}
+        for name, (counts, total) in sorted(stages.items()):
+            cumulative = []
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                running += count
+                cumulative.append((bound, running))
+            snapshot[name] = {"count": running, "sum": total, "buckets": cumulative}
+        return snapshot
+
+    def reset(self):
+        """Forgets every recorded duration"""
+        with self._lock:
+            self._stages = {}
+
+    def render_prometheus(self, gauges: dict = None) -> str:
+        """
+        Returns the histograms in the Prometheus text exposition format.
+
+        Args:
+            gauges (dict): Optional extra values, name -> (help text, value), exported as gauges
+
+        Returns:
+            str: The exposition text, ending with a newline
+        """
+        lines = [f"# HELP {METRIC_NAME} {METRIC_HELP}", f"# TYPE {METRIC_NAME} histogram"]
+        for name, stage in self.snapshot().items():
+            label = f'stage="{_escape_label(name)}"'
+            for bound, count in stage["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{METRIC_NAME}_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f"{METRIC_NAME}_sum{{{label}}} {stage['sum']:.6f}")
+            lines.append(f"{METRIC_NAME}_count{{{label}}} {stage['count']}")
+
+        for name, (help_text, value) in (gauges or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+#------------------------------------------------------- Collection ------------------------------------------------------#
+@contextmanager
+def collect():
+    """
+    Collects the spans finished inside the block in the current thread (or asyncio task).
+
+    Work handed to other threads is still recorded in the histograms but not collected here.
+
+    Usage:
+        with collect() as spans:
+            generate()
+        spans       # [(stage, seconds), ...] in the order they finished
+    """
+    spans = []
+    token = _collector.set(spans)
+    try:
+        yield spans
+    finally:
+        _collector.reset(token)
+
+
+def summarize(spans) -> dict:
+    """
+    Totals collected spans per stage.
+
+    Returns:
+        dict: stage -> milliseconds (rounded to 0.1), in the order the stages first finished
+    """
+    totals = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return {name: round(seconds * 1000, 1) for name, seconds in totals.items()}
+
+
+def server_timing(timings: dict) -> str:
+    """
+    Formats stage timings as a Server-Timing header value.
+
+    Args:
+        timings (dict): stage -> milliseconds, as returned by `summarize`
+
+    Returns:
+        str: e.g. "auth;dur=0.4, availability_fetch;dur=183.2, serialize;dur=24.9"
+    """
+    return ", ".join(f"{name};dur={ms}" for name, ms in timings.items())
+
+
+#------------------------------------------------------- Default Registry ------------------------------------------------------#
+_default_registry = TimingRegistry()
+
+
+def get_timing_registry() -> TimingRegistry:
+    """Returns the process-wide registry used by the instrumented modules"""
+    return _default_registry
+
+
+def configure_timing(enabled: bool = True, **options) -> TimingRegistry:
+    """
+    Replaces the process-wide registry, e.g. to disable timing or change the buckets.
+
+    Instrumented modules look the registry up on every span, so the new one takes effect immediately.
+    """
+    global _default_registry
+    _default_registry = TimingRegistry(enabled=enabled, **options)
+    return _default_registry
+
+
+def span(name: str):
+    """Returns a span of the process-wide registry (see `TimingRegistry.span`)"""
+    return _default_registry.span(name)
+
+
+def timed(name: str):
+    """Decorator timing every call of a function as the stage `name`, with whichever process-wide registry is current"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            registry = _default_registry
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            with _Span(registry, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
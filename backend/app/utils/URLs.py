@@ -1,5 +1,8 @@
+import os
 from enum import Enum
 
+# SCHEDULE_SOURCE_AUTH_URL / SCHEDULE_SOURCE_BASE_URL point the clients at another site, e.g. the local stub
+# used by the benchmarks (backend/benchmarks/schedule_source_stub.py)
 class URLs(Enum):
-          TEST_SITE_AUTH = "https://test.tmwork.net/2024.1.2/api/ops/auth"
-          TEST_BASE_URL = "https://test.tmwork.net/2024.1.2"
\ No newline at end of file
+          TEST_SITE_AUTH = os.environ.get("SCHEDULE_SOURCE_AUTH_URL", "https://test.tmwork.net/2024.1.2/api/ops/auth")
+          TEST_BASE_URL = os.environ.get("SCHEDULE_SOURCE_BASE_URL", "https://test.tmwork.net/2024.1.2")
\ No newline at end of file
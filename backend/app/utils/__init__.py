@@ -0,0 +1,3 @@
+"""
+Configuration: credentials, URLs and API paths.
+"""
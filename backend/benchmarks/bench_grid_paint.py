@@ -0,0 +1,93 @@
+"""
+bench_grid_paint.py
+
+OVERVIEW:
+    Micro-benchmark of the grid painting path in `grid_generator`.
+
+    It compares the original per-cell path (a new PatternFill for every cell, `is_available` scanned for all
+    192 slots, and every cell restyled by `clear_grid`) with the current path (one bitmask per day, contiguous
+    unavailable spans, shared fills, and clearing only the cells that differ from the blank template).
+
+    Two schedules are measured:
+        - busy:  many short classes every day, so most rows are split into lots of small spans
+        - empty: no classes at all (empty `AvailableRanges`), so nothing needs painting
+
+USAGE:
+    $ pip install -e .          # once, makes the backend importable
+    $ python backend/benchmarks/bench_grid_paint.py [--repeat N]
+"""
+
+import argparse
+import datetime
+import timeit
+
+from openpyxl import load_workbook
+from openpyxl.styles import PatternFill
+
+from controllers.grid.grid_generator import GRID_FILE_NAME, GRID_FILL_COLOR, clear_grid, fill_in_day, is_available
+from controllers.grid.helper_classes.availability_parser import parse_availability_for_one_day
+
+
+#------------------------------------------------------------------------ Schedules ------------------------------------------------------------------------#
+BUSY_DAY = "6am-6:50am;7:30am-8:20am;9:05am-9:55am;10:30am-11:20am;12:10pm-1pm;1:45pm-2:35pm;3:20pm-4:10pm;5pm-5:50pm;7pm-8:15pm;9pm-9:40pm"
+EMPTY_DAY = ""
+
+SCHEDULES = {
+    "busy": [{"DayId": dayId, "DayRanges": parse_availability_for_one_day(BUSY_DAY)} for dayId in range(1, 8)],
+    "empty": [{"DayId": dayId, "DayRanges": parse_availability_for_one_day(EMPTY_DAY)} for dayId in range(1, 8)],
+}
+
+
+#------------------------------------------------------------------------ Original Path ------------------------------------------------------------------------#
+def legacy_fill_in_cell(ws, row, col, color):
+    ws.cell(row=row, column=col).fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+def legacy_fill_in_day(ws, dayId, availableRanges, color):
+    rowNum = dayId + 2
+    colNum = 2
+    for hour in range(6, 22):
+        minute = 0
+        while minute < 60:
+            if not is_available(datetime.time(hour=hour, minute=minute), availableRanges):
+                legacy_fill_in_cell(ws, rowNum, colNum, color)
+            minute += 5
+            colNum += 1
+
+
+def legacy_clear_grid(ws):
+    for dayId in range(1, 8):
+        colNum = 2
+        for _ in range(192):
+            if dayId % 2 == 0:
+                legacy_fill_in_cell(ws, dayId + 2, colNum, "FFFFFF")
+            elif dayId == 1 or dayId == 7:
+                legacy_fill_in_cell(ws, dayId + 2, colNum, "bababa")
+            else:
+                legacy_fill_in_cell(ws, dayId + 2, colNum, "e0e0e0")
+            colNum += 1
+
+
+#------------------------------------------------------------------------ Benchmark ------------------------------------------------------------------------#
+def run(repeat):
+    wb = load_workbook(GRID_FILE_NAME)
+    ws = wb.active
+    clear_grid(ws)
+
+    print(f"{'schedule':<8} {'path':<8} {'clear (ms)':>11} {'paint (ms)':>11}")
+    for name, avail in SCHEDULES.items():
+        for label, clear, fill in (("old", legacy_clear_grid, legacy_fill_in_day), ("new", clear_grid, fill_in_day)):
+            def paint():
+                for day in avail:
+                    fill(ws, day["DayId"], day["DayRanges"], GRID_FILL_COLOR)
+
+            # Clearing is measured on a blank sheet and painting starts from one, as a request does
+            clear_ms = min(timeit.repeat(lambda: clear(ws), number=1, repeat=repeat)) * 1000
+            paint_ms = min(timeit.repeat(paint, setup=lambda: clear_grid(ws), number=1, repeat=repeat)) * 1000
+            print(f"{name:<8} {label:<8} {clear_ms:>11.3f} {paint_ms:>11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Rounds per measurement (the best one is reported)")
+    run(parser.parse_args().repeat)
@@ -0,0 +1,130 @@
+"""
+bench_range_parser.py
+
+OVERVIEW:
+    Micro-benchmark of the `AvailableRanges` parsing in `availability_parser`.
+
+    It compares the original path (every range split by hand and every time converted by `time_converter`, i.e.
+    one or two `datetime.strptime` calls per time) with `range_parser.parse_day` (one precompiled pattern per range,
+    minutes of the day computed directly). The new parser is measured twice:
+        - cold: memoization cleared before every pass, so every string is really parsed
+        - warm: the memoized results are reused, as happens across a roster
+
+    The corpus imitates a semester roster: day strings built from 1-4 ranges with times on the hour, half hour,
+    quarter hour and 5-minute marks, open-ended ranges, empty days, and a skewed reuse of the common strings.
+    Before timing, every string is checked to produce the same ranges with both parsers.
+
+USAGE:
+    $ pip install -e .          # once, makes the backend importable
+    $ python backend/benchmarks/bench_range_parser.py [--strings N] [--repeat N]
+"""
+
+import random
+import argparse
+import timeit
+
+from controllers.grid.helper_classes.time_converter import time_range_to_dict, convert_to_time
+from controllers.grid.helper_classes.range_parser import parse_day, minutes_to_day_ranges
+
+
+#------------------------------------------------------------------------ Corpus ------------------------------------------------------------------------#
+MINUTE_CHOICES = (0, 0, 0, 30, 30, 15, 45, 5, 50)
+
+
+def format_time(minute):
+    """Formats a minute of the day the way Schedule Source does: "8am", "10:30am", "12pm" """
+    hour, minute = divmod(minute, 60)
+    meridiem = "am" if hour < 12 else "pm"
+    hour = hour % 12 or 12
+    return f"{hour}{meridiem}" if minute == 0 else f"{hour}:{minute:02d}{meridiem}"
+
+
+def random_day(rng):
+    """Returns one realistic day string"""
+    if rng.random() < 0.1:
+        return ""
+
+    ranges = []
+    minute = rng.randrange(6, 11) * 60 + rng.choice(MINUTE_CHOICES)
+    for _ in range(rng.randint(1, 4)):
+        end = minute + rng.randrange(1, 5) * 60 + rng.choice(MINUTE_CHOICES)
+        if end >= 23 * 60:
+            break
+        ranges.append([format_time(minute), format_time(end)])
+        minute = end + rng.randrange(1, 3) * 60 + rng.choice(MINUTE_CHOICES)
+        if minute >= 22 * 60:
+            break
+
+    if not ranges:
+        return ""
+    if rng.random() < 0.1:
+        ranges[0][0] = ""       # available from midnight
+    if rng.random() < 0.1:
+        ranges[-1][1] = ""      # available until the end of the day
+    return ";".join(f"{start}-{end}" for start, end in ranges)
+
+
+def build_corpus(size, seed=7):
+    """Returns `size` day strings where a few common strings account for most of the roster"""
+    rng = random.Random(seed)
+    distinct = [random_day(rng) for _ in range(max(size // 10, 1))]
+    weights = [1 / (rank + 1) for rank in range(len(distinct))]
+    return rng.choices(distinct, weights=weights, k=size)
+
+
+#------------------------------------------------------------------------ Original Path ------------------------------------------------------------------------#
+def legacy_parse_day(availStr):
+    if not availStr:
+        return [{"start_time": convert_to_time("", -1), "end_time": convert_to_time("", 1)}]
+    return [time_range_to_dict(rangeStr) for rangeStr in availStr.split(";") if rangeStr]
+
+
+#------------------------------------------------------------------------ Current Path ------------------------------------------------------------------------#
+def current_parse_day(availStr):
+    return minutes_to_day_ranges(parse_day(availStr)[0])
+
+
+def run_cold(corpus):
+    parse_day.cache_clear()
+    for availStr in corpus:
+        current_parse_day(availStr)
+
+
+def run_warm(corpus):
+    for availStr in corpus:
+        current_parse_day(availStr)
+
+
+def run_legacy(corpus):
+    for availStr in corpus:
+        legacy_parse_day(availStr)
+
+
+#------------------------------------------------------------------------ Main ------------------------------------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strings", type=int, default=20000, help="day strings in the corpus (default: 20000)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed passes per path (default: 5)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.strings)
+    for availStr in set(corpus):
+        if legacy_parse_day(availStr) != current_parse_day(availStr):
+            raise SystemExit(f"Parsers disagree on {availStr!r}")
+
+    print(f"{len(corpus)} day strings, {len(set(corpus))} distinct, {args.repeat} passes each (best pass shown)")
+    run_warm(corpus)
+    results = {
+        "original": min(timeit.repeat(lambda: run_legacy(corpus), number=1, repeat=args.repeat)),
+        "range_parser (cold)": min(timeit.repeat(lambda: run_cold(corpus), number=1, repeat=args.repeat)),
+        "range_parser (warm)": min(timeit.repeat(lambda: run_warm(corpus), number=1, repeat=args.repeat)),
+    }
+
+    baseline = results["original"]
+    for name, seconds in results.items():
+        per_string = seconds / len(corpus) * 1e6
+        print(f"{name:<22} {seconds * 1000:9.2f} ms  {per_string:7.2f} us/string  x{baseline / seconds:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+bench_startup.py
+
+OVERVIEW:
+    Cold-start benchmark of the web app and the command line.
+
+    Every run starts a fresh interpreter with `python -X importtime` that only imports the entry point (`app` from
+    the frontend directory, `cli` from the backend), and reads the import tree Python prints on stderr. The median
+    of the runs is compared with a budget, so a heavy import creeping back into the startup path fails the run.
+
+    Besides the total, it reports the modules that cost the most on their own and checks that the libraries only
+    needed by the first grid or the first Schedule Source call are not loaded at startup:
+        - openpyxl (the grid template is loaded by the first grid request, or at startup with GRID_PRELOAD=1)
+        - requests, httpx (the API clients are created by the first fetch)
+
+USAGE:
+    $ python backend/benchmarks/bench_startup.py [--runs N] [--budget-ms MS] [--top N]
+
+    Exits with status 1 when the median import time is over the budget or a deferred library is imported.
+"""
+
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+project_dir = Path(__file__).resolve().parents[2]
+
+# Entry point -> (directory it is imported from, statement)
+ENTRY_POINTS = {
+    "app": (project_dir / "frontend", "import app"),
+    "cli": (project_dir / "backend" / "app", "import cli"),
+}
+
+# Libraries that must not be imported at startup
+DEFERRED_MODULES = ("openpyxl", "requests", "httpx")
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+#------------------------------------------------------------------------ Measure ------------------------------------------------------------------------#
+def import_profile(entry_point):
+    """
+    Imports an entry point in a fresh interpreter.
+
+    Returns:
+        dict: module -> (self microseconds, cumulative microseconds, nesting level), in import order
+    """
+    cwd, statement = ENTRY_POINTS[entry_point]
+    env = {key: value for key, value in os.environ.items() if key != "GRID_PRELOAD"}
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=cwd, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"`{statement}` failed:\n{result.stderr[-2000:]}")
+
+    profile = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            selfUs, cumulativeUs, indent, module = match.groups()
+            profile[module] = (int(selfUs), int(cumulativeUs), len(indent) // 2)
+    return profile
+
+
+def measure(entry_point, runs):
+    """
+    Imports an entry point `runs` times.
+
+    Returns:
+        dict: median_ms and all runs_ms of the entry point's cumulative import time, the modules costing the most
+        on their own (median self milliseconds) and the deferred libraries that were imported
+    """
+    totals = []
+    selfTimes = {}
+    imported = set()
+    for _ in range(runs):
+        profile = import_profile(entry_point)
+        totals.append(profile[entry_point][1] / 1000)
+        imported.update(profile)
+        for module, (selfUs, _, _) in profile.items():
+            selfTimes.setdefault(module, []).append(selfUs / 1000)
+
+    return {
+        "median_ms": statistics.median(totals),
+        "runs_ms": totals,
+        "modules_ms": sorted(((statistics.median(times), module) for module, times in selfTimes.items()), reverse=True),
+        "deferred_imported": [module for module in DEFERRED_MODULES if module in imported],
+    }
+
+
+#------------------------------------------------------------------------ Main ------------------------------------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per entry point (default: 7)")
+    parser.add_argument("--budget-ms", type=float, default=250,
+                        help="largest median import time of `app` (default: 250); `cli` gets a tenth of it")
+    parser.add_argument("--top", type=int, default=10, help="most expensive modules listed (default: 10)")
+    args = parser.parse_args()
+
+    budgets = {"app": args.budget_ms, "cli": args.budget_ms / 10}
+    failed = False
+    for entry_point, budget in budgets.items():
+        result = measure(entry_point, args.runs)
+        over = result["median_ms"] > budget
+        failed |= over or bool(result["deferred_imported"])
+
+        print(f"{entry_point}: median {result['median_ms']:.1f} ms over {args.runs} runs "
+              f"(min {min(result['runs_ms']):.1f}, max {max(result['runs_ms']):.1f}), "
+              f"budget {budget:.0f} ms{'  OVER BUDGET' if over else ''}")
+        for selfMs, module in result["modules_ms"][:args.top]:
+            print(f"    {selfMs:8.2f} ms  {module}")
+        if result["deferred_imported"]:
+            print(f"    imported at startup: {', '.join(result['deferred_imported'])}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
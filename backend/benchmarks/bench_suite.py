@@ -0,0 +1,315 @@
+"""
+bench_suite.py
+
+OVERVIEW:
+    Reproducible performance suite of the grid backend, run against a local Schedule Source stub
+    (`schedule_source_stub.py`) instead of the real test site.
+
+    The stub runs in its own process with the configured latency, error rate and payload size, and the backend
+    is pointed at it through SCHEDULE_SOURCE_BASE_URL / SCHEDULE_SOURCE_AUTH_URL. Then the suite measures:
+        - end_to_end:  POST /generate (wait=True) through the Flask app, `--requests` distinct employees sent by
+                       `--concurrency` clients: throughput, latency percentiles, status codes, and the mean time
+                       of every stage reported in the Server-Timing header
+        - micro:       per-call times of `fill_in_day`, `clear_grid`, `convert_to_time` and `wb.save`
+        - memory:      peak traced allocations while generating `--memory-requests` grids, and the peak RSS
+
+    Everything is written as JSON with the commit, Python version and options, so runs of two commits can be
+    compared with `--compare`.
+
+USAGE:
+    $ pip install -e .          # once, makes the backend importable
+    $ python backend/benchmarks/bench_suite.py [--requests N] [--concurrency N] [--latency S] [--error-rate R]
+                                               [--ranges-per-day N] [--padding BYTES] [--output FILE]
+    $ python backend/benchmarks/bench_suite.py --compare old.json          # run, then compare with an older run
+    $ python backend/benchmarks/bench_suite.py --compare old.json new.json # compare two saved runs only
+"""
+
+import os
+import io
+import sys
+import importlib.util
+import json
+import time
+import timeit
+import platform
+import argparse
+import resource
+import tracemalloc
+import statistics
+import subprocess
+import multiprocessing
+import contextlib
+from pathlib import Path
+from datetime import datetime, timezone
+from dataclasses import asdict
+from concurrent.futures import ThreadPoolExecutor
+
+# The backend is an installed package; the Flask app is loaded from its file (see `load_flask_app`)
+project_dir = Path(__file__).resolve().parents[2]
+FLASK_APP_FILE = project_dir / "frontend" / "app.py"
+
+from schedule_source_stub import StubServer, StubConfig, FIRST_EMPLOYEE_ID, add_stub_arguments, stub_config_from_args
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BUSY_DAY = "6am-6:50am;7:30am-8:20am;9:05am-9:55am;10:30am-11:20am;12:10pm-1pm;1:45pm-2:35pm;3:20pm-4:10pm;5pm-5:50pm;7pm-8:15pm;9pm-9:40pm"
+PERCENTILES = (50, 90, 95, 99)
+
+
+#------------------------------------------------------------------------ Stub Process ------------------------------------------------------------------------#
+def _serve_stub(config, ready):
+    server = StubServer(("127.0.0.1", 0), config)
+    ready.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_stub_process(config):
+    """Starts the stub in a separate process, so it does not compete with the backend for the GIL"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve_stub, args=(config, ready), daemon=True)
+    process.start()
+    port = ready.get(timeout=10)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def stub_stats(base_url):
+    import requests
+    return requests.get(f"{base_url}/_stub/stats", timeout=5).json()
+
+
+#------------------------------------------------------------------------ Helpers ------------------------------------------------------------------------#
+def percentiles(samples):
+    """Returns the given percentiles of a list of seconds, in milliseconds"""
+    ordered = sorted(samples)
+    result = {}
+    for p in PERCENTILES:
+        index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+        result[f"p{p}_ms"] = round(ordered[index] * 1000, 2)
+    result["mean_ms"] = round(statistics.fmean(ordered) * 1000, 2)
+    result["max_ms"] = round(ordered[-1] * 1000, 2)
+    return result
+
+
+def per_call(samples):
+    """Summarizes per-call times (seconds) in microseconds"""
+    return {"median_us": round(statistics.median(samples) * 1e6, 2), "min_us": round(min(samples) * 1e6, 2),
+            "calls": len(samples)}
+
+
+def parse_server_timing(header):
+    """Returns {stage: milliseconds} from a Server-Timing header"""
+    timings = {}
+    for entry in filter(None, (part.strip() for part in (header or "").split(","))):
+        name, _, duration = entry.partition(";dur=")
+        if duration:
+            timings[name] = float(duration)
+    return timings
+
+
+def load_flask_app():
+    """Imports frontend/app.py as the `app` module (the frontend is not part of the installed package)"""
+    spec = importlib.util.spec_from_file_location("app", FLASK_APP_FILE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["app"] = module
+    spec.loader.exec_module(module)
+    return module.app
+
+
+def git_commit():
+    """Returns (commit, dirty) of the working tree, or (None, None) outside git"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_dir, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_dir,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+#------------------------------------------------------------------------ End To End ------------------------------------------------------------------------#
+def bench_end_to_end(app, ids, concurrency, force_refresh=False):
+    """Sends one /generate per ID from `concurrency` clients and summarizes the responses"""
+    def generate(external_id):
+        client = app.test_client()
+        started = time.perf_counter()
+        response = client.post("/generate", json={"external_id": external_id, "wait": True,
+                                                  "force_refresh": force_refresh})
+        return time.perf_counter() - started, response.status_code, response.headers.get("Server-Timing")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(generate, ids))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    stages = {}
+    for _, status, header in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        for name, ms in parse_server_timing(header).items():
+            stages.setdefault(name, []).append(ms)
+
+    return {
+        "requests": len(ids),
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ids) / elapsed, 2),
+        "latency": percentiles([latency for latency, _, _ in results]),
+        "status_codes": statuses,
+        # Mean over the requests that ran the stage
+        "stages_mean_ms": {name: round(statistics.fmean(values), 2) for name, values in sorted(stages.items())},
+    }
+
+
+#------------------------------------------------------------------------ Micro Benchmarks ------------------------------------------------------------------------#
+def bench_micro(repeat):
+    """Per-call times of the painting, clearing, time conversion and serialization functions"""
+    from controllers.grid.grid_generator import new_grid_workbook, fill_in_day, clear_grid, GRID_FILL_COLOR
+    from controllers.grid.helper_classes.time_converter import convert_to_time
+    from controllers.grid.helper_classes.availability_parser import parse_availability_for_one_day
+
+    busy = parse_availability_for_one_day(BUSY_DAY)
+    wb = new_grid_workbook()
+    ws = wb.active
+
+    fill = []
+    clear = []
+    save = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fill_in_day(ws, 2, busy, GRID_FILL_COLOR)
+        fill.append(time.perf_counter() - started)
+
+        # Clearing is measured on a fully painted grid
+        for dayId in range(1, 8):
+            fill_in_day(ws, dayId, busy, GRID_FILL_COLOR)
+        started = time.perf_counter()
+        wb.save(io.BytesIO())
+        save.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        clear_grid(ws)
+        clear.append(time.perf_counter() - started)
+
+    number = 20000
+    times = ["8am", "10:30am", "12pm", "9:45pm", ""]
+    convert = timeit.repeat(lambda: [convert_to_time(t, 1) for t in times], number=number // len(times), repeat=5)
+    return {
+        "fill_in_day": per_call(fill),
+        "clear_grid": per_call(clear),
+        "wb_save": per_call(save),
+        "convert_to_time": {"median_us": round(statistics.median(convert) / number * 1e6, 3),
+                            "min_us": round(min(convert) / number * 1e6, 3), "calls": number * 5},
+    }
+
+
+#------------------------------------------------------------------------ Memory ------------------------------------------------------------------------#
+def bench_memory(app, ids):
+    """Peak traced allocations while generating grids one after the other"""
+    client = app.test_client()
+    tracemalloc.start()
+    try:
+        for external_id in ids:
+            client.post("/generate", json={"external_id": external_id, "wait": True})
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"requests": len(ids), "traced_peak_mb": round(peak / 2**20, 2), "traced_current_mb": round(current / 2**20, 2)}
+
+
+#------------------------------------------------------------------------ Compare ------------------------------------------------------------------------#
+def flatten(results, prefix=""):
+    """Yields (dotted name, number) for every numeric leaf of a result document"""
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from flatten(value, name + ".")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def compare(old, new):
+    """Prints every metric of two runs side by side with the relative change"""
+    print(f"{'metric':<48} {old['meta'].get('commit') or 'old':>12} {new['meta'].get('commit') or 'new':>12}   change")
+    oldValues = dict(flatten(old["results"]))
+    for name, value in flatten(new["results"]):
+        before = oldValues.get(name)
+        if before is None:
+            continue
+        change = f"{(value - before) / before * 100:+7.1f}%" if before else "      -"
+        print(f"{name:<48} {before:>12} {value:>12}   {change}")
+
+
+#------------------------------------------------------------------------ Main ------------------------------------------------------------------------#
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="/generate requests, one per employee (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients (default: 8)")
+    parser.add_argument("--warmup", type=int, default=10, help="requests sent before measuring (default: 10)")
+    parser.add_argument("--force-refresh", action="store_true", help="bypass the availability cache on every request")
+    parser.add_argument("--repeat", type=int, default=30, help="calls per micro-benchmark (default: 30)")
+    parser.add_argument("--memory-requests", type=int, default=20, help="grids generated under tracemalloc (default: 20)")
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/bench-<commit>.json)")
+    parser.add_argument("--compare", type=Path, nargs="+", metavar="RUN",
+                        help="an older result to compare this run with, or two results to compare without running")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) == 2:
+        compare(json.loads(args.compare[0].read_text()), json.loads(args.compare[1].read_text()))
+        return
+
+    config = stub_config_from_args(args)
+    stub, base_url = start_stub_process(config)
+    try:
+        # Read by the backend at import time
+        os.environ["SCHEDULE_SOURCE_BASE_URL"] = base_url
+        os.environ["SCHEDULE_SOURCE_AUTH_URL"] = base_url + "/api/ops/auth"
+        os.environ.setdefault("GRID_JOB_WORKERS", str(args.concurrency))
+        os.environ.setdefault("GRID_STORE", "memory")
+        with contextlib.redirect_stdout(io.StringIO()):
+            app = load_flask_app()
+
+        ids = [str(FIRST_EMPLOYEE_ID + i) for i in range(args.warmup + args.requests + args.memory_requests)]
+        warmup, measured, memory = (ids[:args.warmup], ids[args.warmup:args.warmup + args.requests],
+                                    ids[args.warmup + args.requests:])
+
+        print(f"Stub on {base_url} with {asdict(config)}")
+        bench_end_to_end(app, warmup, args.concurrency)
+        results = {"end_to_end": bench_end_to_end(app, measured, args.concurrency, args.force_refresh)}
+        print(f"end_to_end: {results['end_to_end']['throughput_rps']} req/s, {results['end_to_end']['latency']}")
+        results["micro"] = bench_micro(args.repeat)
+        print(f"micro: { {name: m['median_us'] for name, m in results['micro'].items()} } us")
+        results["memory"] = bench_memory(app, memory)
+        results["memory"]["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        print(f"memory: {results['memory']}")
+        results["stub"] = stub_stats(base_url)
+    finally:
+        stub.terminate()
+
+    commit, dirty = git_commit()
+    document = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        },
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"bench-{commit or 'local'}{'-dirty' if dirty else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(document, indent=2))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(json.loads(args.compare[0].read_text()), document)
+
+
+if __name__ == "__main__":
+    main()
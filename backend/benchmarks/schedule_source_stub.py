@@ -0,0 +1,240 @@
+"""
+schedule_source_stub.py
+
+OVERVIEW:
+    Local stand-in for the two Schedule Source endpoints the backend calls, so benchmarks never touch the real
+    test site and give the same numbers on every run:
+        - POST <base>/api/ops/auth              login, returns a SessionId and an APIToken
+        - GET  <base>/api/io/GlobalAvailDay/     availability rows, filtered by EmployeeExternalId or not
+
+    The availability of an employee is generated from their ID with a seeded RNG, so every run (and every commit)
+    sees the same payloads. Latency, failures and payload size are configurable:
+        - latency / jitter:    seconds added to every request (uniform jitter on top of the latency)
+        - error_rate:          share of availability requests answered with a 503 (the transport retries them)
+        - ranges_per_day:      ranges in each AvailableRanges string (longer strings, more parsing)
+        - padding:             extra bytes per row, to imitate the wider rows of a real site
+        - roster_size:         employees returned by an unfiltered query
+
+    Tokens are checked, so a stale token gets a 401 like the real site. GET /_stub/stats returns the number of
+    logins, availability requests and injected failures.
+
+USAGE:
+    In-process (bench_suite.py runs the same server in a separate process instead):
+        stub = start_stub(StubConfig(latency=0.05))
+        os.environ["SCHEDULE_SOURCE_BASE_URL"] = stub.base_url
+        os.environ["SCHEDULE_SOURCE_AUTH_URL"] = stub.auth_url
+        ...
+        stub.shutdown()
+
+    Standalone, for pointing a development server at it:
+        $ python backend/benchmarks/schedule_source_stub.py --port 8085 --latency 0.05 --error-rate 0.01
+        $ SCHEDULE_SOURCE_BASE_URL=http://127.0.0.1:8085 \
+          SCHEDULE_SOURCE_AUTH_URL=http://127.0.0.1:8085/api/ops/auth python frontend/app.py
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from dataclasses import dataclass, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+#------------------------------------------------------------------------ Constants ------------------------------------------------------------------------#
+AUTH_PATH = "/api/ops/auth"
+AVAILABILITY_PATH = "/api/io/GlobalAvailDay/"
+STATS_PATH = "/_stub/stats"
+FIRST_EMPLOYEE_ID = 170600000
+
+
+@dataclass
+class StubConfig:
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    ranges_per_day: int = 2
+    padding: int = 0
+    roster_size: int = 300
+    seed: int = 7
+
+
+#------------------------------------------------------------------------ Payloads ------------------------------------------------------------------------#
+def format_time(minute):
+    """Formats a minute of the day the way Schedule Source does: "8am", "10:30am", "12pm" """
+    hour, minute = divmod(minute, 60)
+    meridiem = "am" if hour < 12 else "pm"
+    hour = hour % 12 or 12
+    return f"{hour}{meridiem}" if minute == 0 else f"{hour}:{minute:02d}{meridiem}"
+
+
+def day_ranges(rng, count):
+    """Returns an AvailableRanges string of at most `count` ranges between 6am and 10pm"""
+    if count <= 0 or rng.random() < 0.1:
+        return ""
+
+    # Pick sorted, distinct 15-minute marks and pair them up into ranges
+    marks = sorted(rng.sample(range(6 * 4, 22 * 4), min(count * 2, 64)))
+    return ";".join(f"{format_time(marks[i] * 15)}-{format_time(marks[i + 1] * 15)}" for i in range(0, len(marks) - 1, 2))
+
+
+def employee_rows(employeeId, config):
+    """Returns the seven availability rows of an employee, the same for the same ID and config"""
+    rng = random.Random(f"{config.seed}:{employeeId}")
+    rows = []
+    for dayId in range(1, 8):
+        row = {"DayId": dayId, "AvailableRanges": day_ranges(rng, config.ranges_per_day),
+               "EmployeeExternalId": employeeId, "FirstName": f"Employee{employeeId}"}
+        if config.padding:
+            row["Notes"] = "x" * config.padding
+        rows.append(row)
+    return rows
+
+
+#------------------------------------------------------------------------ Server ------------------------------------------------------------------------#
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _wait(self):
+        config = self.server.config
+        delay = config.latency + (self.server.rng.uniform(0, config.jitter) if config.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if urlparse(self.path).path.rstrip("/") != AUTH_PATH:
+            return self._send_json(404, {"error": "Not found"})
+
+        self._wait()
+        session_id, token = self.server.login()
+        self._send_json(200, {"Response": {"SessionId": session_id, "APIToken": token}})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == STATS_PATH:
+            return self._send_json(200, self.server.stats())
+        if url.path.rstrip("/") != AVAILABILITY_PATH.rstrip("/"):
+            return self._send_json(404, {"error": "Not found"})
+
+        self._wait()
+        if not self.server.count_request():
+            return self._send_json(503, {"error": "Injected failure"})
+        if self.headers.get("x-api-token") not in self.server.tokens:
+            return self._send_json(401, {"error": "Invalid token"})
+
+        query = parse_qs(url.query)
+        config = self.server.config
+        if "EmployeeExternalId" in query:
+            ids = query["EmployeeExternalId"][0].split(",")
+        else:
+            ids = [str(FIRST_EMPLOYEE_ID + i) for i in range(config.roster_size)]
+
+        rows = []
+        for employeeId in ids:
+            rows.extend(employee_rows(employeeId, config))
+        self._send_json(200, rows)
+
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded stub server keeping the issued tokens and the request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, StubHandler)
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.tokens = set()
+        self.logins = 0
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    @property
+    def auth_url(self):
+        return self.base_url + AUTH_PATH
+
+    def login(self):
+        with self._lock:
+            self.logins += 1
+            token = f"token-{self.logins}"
+            self.tokens.add(token)
+            return f"session-{self.logins}", token
+
+    def count_request(self):
+        """Counts an availability request; returns False if it has to fail"""
+        with self._lock:
+            self.requests += 1
+            if self.config.error_rate and self.rng.random() < self.config.error_rate:
+                self.errors += 1
+                return False
+            return True
+
+    def stats(self):
+        with self._lock:
+            return {"logins": self.logins, "requests": self.requests, "errors": self.errors}
+
+
+def start_stub(config=None, host="127.0.0.1", port=0):
+    """Starts the stub on a background thread and returns the server (port 0 picks a free port)"""
+    server = StubServer((host, port), config or StubConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+#------------------------------------------------------------------------ Main ------------------------------------------------------------------------#
+def add_stub_arguments(parser):
+    """Adds the StubConfig options to an argument parser"""
+    defaults = StubConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="seconds added to every stub request")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="uniform extra latency, in seconds")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="share of availability requests failing with 503")
+    parser.add_argument("--ranges-per-day", type=int, default=defaults.ranges_per_day, help="ranges in each AvailableRanges string")
+    parser.add_argument("--padding", type=int, default=defaults.padding, help="extra bytes per availability row")
+    parser.add_argument("--roster-size", type=int, default=defaults.roster_size, help="employees in an unfiltered query")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="seed of the generated availability")
+
+
+def stub_config_from_args(args):
+    return StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      ranges_per_day=args.ranges_per_day, padding=args.padding,
+                      roster_size=args.roster_size, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    config = stub_config_from_args(args)
+    server = StubServer((args.host, args.port), config)
+    print(f"Schedule Source stub on {server.base_url} with {asdict(config)}")
+    print(f"  SCHEDULE_SOURCE_BASE_URL={server.base_url}")
+    print(f"  SCHEDULE_SOURCE_AUTH_URL={server.auth_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,100 @@
 #------------------------------------------------------- Imports ------------------------------------------------------#     
 # Core Flask imports for web application functionality
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response
+from werkzeug.exceptions import HTTPException
 # System and file handling imports
-import sys
-from pathlib import Path
 import os
 import io
-import tempfile
-
-#------------------------------------------------------- Paths ------------------------------------------------------#   
-# Configure system paths to access backend code
-# This setup enables importing modules from the backend directory structure
-root_dir = Path(__file__).resolve().parents[1]      # Get project root directory
-backend_dir = root_dir / 'backend' / 'app'          # Path to backend code
-sys.path.append(str(backend_dir))                   # Add backend to Python path
+import re
+import hashlib
+import time
 
 # Import backend functionality for grid generation
-from controllers.grid.grid_generator import load_workbook, clear_grid, fill_in_schedule, GRID_FILE_NAME, GRID_FILL_COLOR
-from controllers.grid.helper_classes.availability_parser import parse_availability
+# The backend is installed as a package: run `pip install -e .` from the project root once (see pyproject.toml)
+from controllers.grid.grid_generator import load_template, GRID_FILL_COLOR
+from controllers.grid.helper_classes.availability_cache import get_availability, configure_default_cache
+from controllers.grid.helper_classes.availability_mask import availability_to_masks
+from controllers.grid.grid_writer import get_grid_writer
+from controllers.grid.grid_spec import get_grid_spec
+from controllers.grid.grid_store import create_grid_store, content_hash, GridEntry
+from controllers.grid.incremental_render import IncrementalGridRenderer, stored_masks
+from controllers.grid.heatmap_generator import generate_heatmap
+from controllers.grid.availability_index import get_availability_index, build_index
+from controllers.grid.image_renderer import render_grid, render_key, RENDER_FORMATS, MIME_TYPES
+from controllers.jobs.job_queue import configure_job_queue, JobError, JOB_SUCCEEDED, JOB_FAILED
+from controllers.jobs.single_flight import SingleFlight
+from controllers.jobs.roster_warmer import RosterWarmer, parse_off_peak
+from controllers.metrics.timing import configure_timing, get_timing_registry, collect, summarize, server_timing, span
+from controllers.grid.helper_classes.availability_cache import fetch_flight
+from controllers.grid.helper_classes.availability_store import configure_availability_store
+from controllers.grid.batch_export import read_ids, iter_zip_export, build_workbook_export, EXPORT_FORMATS
 
 #------------------------------------------------------- Flask App ------------------------------------------------------#    
 # Initialize Flask application instance
 app = Flask(__name__)
 
-# In-memory storage for temporary grid data
-# Keys are employee IDs, values are file buffers containing Excel data
-temp_grids = {}
+# Per-stage timing of grid generation, exported at /metrics and as Server-Timing on /generate
+# GRID_TIMING=0 turns the spans into no-ops
+configure_timing(enabled=os.environ.get('GRID_TIMING', '1') != '0')
+
+# Parsed availability cache shared by every request in this process
+# Set AVAILABILITY_CACHE_DB to a file path to keep it across restarts and share it between workers
+availability_cache = configure_default_cache(db_path=os.environ.get('AVAILABILITY_CACHE_DB'))
+
+# Persistent copy of everything fetched from Schedule Source, used when a fetch fails
+# Set AVAILABILITY_STORE_DB to enable it, and AVAILABILITY_OFFLINE=1 to serve from it without calling Schedule Source
+availability_store = configure_availability_store(
+    os.environ.get('AVAILABILITY_STORE_DB'),
+    offline=os.environ.get('AVAILABILITY_OFFLINE', '0') == '1'
+)
+
+# The grid template is parsed and cleared once per process and each request works on an in-memory copy;
+# the streaming writer is prepared from the same template. Both are built by the first grid request, so the
+# app starts without loading openpyxl. GRID_PRELOAD=1 builds them at startup instead (e.g. with gunicorn
+# --preload, so every worker inherits them)
+if os.environ.get('GRID_PRELOAD', '0') == '1':
+    load_template()
+    get_grid_writer()
+
+# Bounded, expiring storage for generated grids until they are downloaded
+# Keys are employee IDs, values are the bytes of the Excel file
+# GRID_STORE selects the backend: "memory" (default, per worker), or "filesystem"/"sqlite" with GRID_STORE_PATH
+# pointing at a directory/database shared by every worker
+grid_store = create_grid_store(
+    os.environ.get('GRID_STORE', 'memory'),
+    path=os.environ.get('GRID_STORE_PATH'),
+    max_entries=int(os.environ.get('GRID_STORE_MAX_ENTRIES', 512)),
+    max_bytes=int(os.environ.get('GRID_STORE_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=float(os.environ.get('GRID_STORE_TTL', 60 * 60))
+)
+
+# Regenerated grids only repaint the days whose availability changed
+# GRID_RENDER_CACHE painted workbooks are kept per worker for that
+grid_renderer = IncrementalGridRenderer(grid_store, cache_size=int(os.environ.get('GRID_RENDER_CACHE', 32)))
+
+# Background workers for grid generation, so slow upstream calls never hold a request open
+job_queue = configure_job_queue(max_workers=int(os.environ.get('GRID_JOB_WORKERS', 4)))
+
+# Concurrent identical heatmap requests wait for one computation
+heatmap_flight = SingleFlight('heatmap')
+
+# Who-is-available index over the roster loaded at /available/roster
+availability_index = get_availability_index()
+
+# Background prefetch of a roster so the first grids of the week are served from the cache
+# ROSTER_WARMER_FILE is a CSV roster; passes run every WARMER_INTERVAL seconds with WARMER_CONCURRENCY batches
+# in flight, only between the WARMER_OFF_PEAK hours (e.g. "22-6") when set
+roster_warmer = RosterWarmer(
+    interval=float(os.environ.get('WARMER_INTERVAL', 60 * 60)),
+    concurrency=int(os.environ.get('WARMER_CONCURRENCY', 2)),
+    off_peak=parse_off_peak(os.environ.get('WARMER_OFF_PEAK', '')),
+    cache=availability_cache,
+    index=availability_index
+)
+if os.environ.get('ROSTER_WARMER_FILE'):
+    with open(os.environ['ROSTER_WARMER_FILE'], encoding='utf-8-sig') as roster_file:
+        roster_warmer.set_roster(read_ids(roster_file.read()))
+    roster_warmer.start()
 
 #------------------------------------------------------- Index Route ------------------------------------------------------#  
 @app.route('/')
@@ -38,95 +107,767 @@ def index():
     return render_template('index.html')
 
 #------------------------------------------------------- Generate Grid ------------------------------------------------------#     
+def generate_grid_job(job, external_id, force_refresh, spec):
+    """
+    Background job generating one schedule and keeping it in the grid store
+    
+    Args:
+        job: Job used to report progress
+        external_id: ID of the employee
+        force_refresh: bypass the availability cache
+        spec: GridSpec of the grid (resolution)
+        
+    Returns:
+        dict with the success message, the ID to download, the DayIds that were repainted
+        and the milliseconds spent in each stage
+        
+    Raises:
+        JobError: 404 if no availability could be found for the ID
+    """
+    # The stages timed while this job runs are reported back with its result
+    with collect() as spans:
+        # Attempt to retrieve and validate employee availability
+        # Served from the cache unless the caller asked for fresh data
+        job.update(0.1, 'Fetching availability')
+        avail = get_availability(external_id, force_refresh=force_refresh)
+        
+        if not avail:
+            raise JobError('No schedule available for this ID', status_code=404)
+        
+        # Keep the who-is-available index in step with what was just fetched
+        if external_id in availability_index:
+            availability_index.update(external_id, avail)
+        
+        # Paint the schedule, repainting only the days that changed since this grid was last generated
+        # Overview grids are stored next to the full one, under their own key
+        job.update(0.5, 'Rendering grid')
+        grid_id = external_id if spec == get_grid_spec() else f'{external_id}-{spec.step_minutes}min'
+        _, repainted = grid_renderer.render(grid_id, avail, GRID_FILL_COLOR, spec=spec)
+    
+    return {
+        'message': f'Schedule generated for ID: {external_id}',
+        'external_id': grid_id,
+        'repainted_days': repainted,
+        'timings': summarize(spans)
+    }
+
+
+def job_response(job):
+    """
+    Builds the JSON body describing a job, including its result once it has succeeded
+    
+    Args:
+        job: Job to describe
+        
+    Returns:
+        dict ready for jsonify
+    """
+    body = job.to_dict()
+    body['status_url'] = f'/jobs/{job.id}'
+    if job.status == JOB_SUCCEEDED:
+        body.update(job.result)
+        body['success'] = True
+    return body
+
+
+def job_json(job, status=200):
+    """
+    Builds the JSON response describing a job, with a Server-Timing header once the job has stage timings
+    
+    Args:
+        job: Job to describe
+        status: HTTP status of the response
+        
+    Returns:
+        Flask response
+    """
+    response = jsonify(job_response(job))
+    response.status_code = status
+    timings = (job.result or {}).get('timings') if job.status == JOB_SUCCEEDED else None
+    if timings:
+        response.headers['Server-Timing'] = server_timing(timings)
+    return response
+
+
 @app.route('/generate', methods=['POST'])
 def generate_grid():
     """
     Handles POST requests to generate grid schedules
     
+    The work runs in the background job queue; the response only carries the job to poll at /jobs/<job_id>.
+    Requests for an ID that is already being generated share the same job.
+    
     Expected JSON input:
     {
-        "external_id": "employee_id_here"
+        "external_id": "employee_id_here",
+        "force_refresh": false,         (optional, bypasses the availability cache)
+        "resolution": 5,                (optional, minutes per cell: 5, 15 or 30)
+        "wait": false                   (optional, answer once the grid is ready, as before the job queue)
     }
     
     Returns:
-        JSON response with success/error status and relevant messages
+        202 with the job (job_id, status, progress, status_url), or with "wait" the final result:
+        success message and external_id, or the error with its status code
     """
     try:
         # Extract and validate request data
         data = request.get_json()
         external_id = data.get('external_id')
+        force_refresh = str(data.get('force_refresh', '')).lower() in ('1', 'true')
         
         if not external_id:
             return jsonify({'error': 'Employee ID is required'}), 400
-            
+        
         try:
-            # Initialize Excel workbook and prepare grid
-            wb = load_workbook(GRID_FILE_NAME)
-            ws = wb.active
-            clear_grid(ws)
-            
-            # Attempt to retrieve and validate employee availability
-            avail = parse_availability(external_id)
-            
-            if not avail:
-                return jsonify({
-                    'error': 'No schedule available for this ID'
-                }), 404
-            
-            # Generate schedule and store in memory buffer
-            fill_in_schedule(ws, external_id, GRID_FILL_COLOR)
-            buffer = io.BytesIO()
-            wb.save(buffer)
-            buffer.seek(0)
-            
-            # Cache generated schedule for later download
-            temp_grids[external_id] = buffer
-            
-            return jsonify({
-                'success': True,
-                'message': f'Schedule generated for ID: {external_id}',
-                'external_id': external_id
-            })
-            
-        except Exception as e:
-            return jsonify({'error': f'Grid generation failed: {str(e)}'}), 500
+            spec = get_grid_spec(data.get('resolution'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Requests for the same ID and options while a job is queued or running share that job
+        job_key = f'grid:{external_id}:{GRID_FILL_COLOR}:{spec.name}:{"refresh" if force_refresh else "cached"}'
+        job = job_queue.submit(generate_grid_job, external_id, force_refresh, spec, key=job_key)
+        
+        if not data.get('wait'):
+            return job_json(job, 202)
+        
+        job.wait()
+        if job.status == JOB_FAILED:
+            return jsonify({'error': job.error}), job.error_status
+        return job_json(job)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+#------------------------------------------------------- Jobs ------------------------------------------------------#
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """
+    Reports the status and progress of a background job
+    
+    Args:
+        job_id: ID returned when the job was submitted
+        
+    Returns:
+        JSON with status (queued, running, succeeded, failed), progress from 0 to 1 and message;
+        the result fields once succeeded, or error and error_status once failed
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return job_json(job)
+
+
+@app.route('/jobs/stats')
+def job_stats():
+    """
+    Reports the job queue counters
+    
+    Returns:
+        JSON with submitted, deduplicated, succeeded, failed, queued, running and finished counts
+    """
+    return jsonify(job_queue.stats())
+
+#------------------------------------------------------- Generate Heatmap ------------------------------------------------------#
+def build_heatmap(external_ids, show_counts, force_refresh, spec):
+    """
+    Generates a coverage heatmap and keeps it in the grid store
+    
+    Returns:
+        (heatmap_id, found, errors): the key to download it with, the availability used and the per-ID errors;
+        heatmap_id is None if no availability was found
+    """
+    wb, found, errors = generate_heatmap(external_ids, show_counts=show_counts, force_refresh=force_refresh, spec=spec)
+    if not found:
+        return None, found, errors
+    
+    buffer = io.BytesIO()
+    with span('serialize'):
+        wb.save(buffer)
+    
+    # Same group, same key, so regenerating a heatmap replaces the previous one
+    group = ','.join(sorted(found)) + f'@{spec.name}'
+    heatmap_id = 'heatmap-' + hashlib.sha1(group.encode('utf-8')).hexdigest()[:12]
+    grid_store.put(heatmap_id, buffer.getvalue())
+    return heatmap_id, found, errors
+
+
+@app.route('/heatmap', methods=['POST'])
+def generate_heatmap_grid():
+    """
+    Handles POST requests to generate a coverage heatmap for a group of employees
+    
+    Expected JSON input:
+    {
+        "external_ids": ["id1", "id2", ...],
+        "show_counts": false,           (optional, writes the number of available employees in each cell)
+        "force_refresh": false,         (optional, bypasses the availability cache)
+        "resolution": 5                 (optional, minutes per cell: 5, 15 or 30)
+    }
+    
+    Returns:
+        JSON response with the key to pass to /download and the IDs whose availability could not be fetched
+    """
+    try:
+        data = request.get_json()
+        external_ids = [str(i).strip() for i in data.get('external_ids', []) if str(i).strip()]
+        
+        if not external_ids:
+            return jsonify({'error': 'At least one employee ID is required'}), 400
+        
+        show_counts = str(data.get('show_counts', '')).lower() in ('1', 'true')
+        force_refresh = str(data.get('force_refresh', '')).lower() in ('1', 'true')
+        try:
+            spec = get_grid_spec(data.get('resolution'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Identical heatmap requests arriving together share one computation
+        flight_key = (tuple(sorted(set(external_ids))), show_counts, force_refresh, spec)
+        heatmap_id, found, errors = heatmap_flight.do(flight_key, build_heatmap, external_ids, show_counts,
+                                                      force_refresh, spec)
+        if not found:
+            return jsonify({'error': 'No schedule available for these IDs'}), 404
+        
+        return jsonify({
+            'success': True,
+            'message': f'Heatmap generated for {len(found)} employees',
+            'external_id': heatmap_id,
+            'employees': len(found),
+            'failed_ids': sorted(errors)
+        })
+        
+    except Exception as e:
+        return jsonify({'error': f'Heatmap generation failed: {str(e)}'}), 500
+
+#------------------------------------------------------- Batch Export ------------------------------------------------------#
+@app.route('/batch', methods=['POST'])
+def batch_export():
+    """
+    Exports the grids of a whole roster
+    
+    Accepts either JSON:
+    {
+        "external_ids": ["id1", "id2", ...],   (or "csv": "CSV text")
+        "format": "zip",                        (optional, "zip" or "workbook")
+        "force_refresh": false,                 (optional, bypasses the availability cache)
+        "resolution": 5                         (optional, minutes per cell: 5, 15 or 30)
+    }
+    or a form upload with a CSV "file" and optional "format" / "force_refresh" / "resolution" fields.
+    
+    With "store": true the export is kept in the grid store instead of being sent, and can then be downloaded
+    (and resumed with Range requests) from /download until it expires.
+    
+    Returns:
+        zip: streamed archive of schedule_<id>.xlsx files, ending with report.json (failures and throughput)
+        workbook: one Excel file with a sheet per employee; the report is in the X-Export-* headers
+        store: JSON with the ID and URL to download the export, its size and content hash, and the report
+    """
+    try:
+        if 'file' in request.files:
+            options = request.form
+            ids = read_ids(request.files['file'].read().decode('utf-8-sig'))
+        else:
+            options = request.get_json() or {}
+            ids = read_ids(options['csv']) if options.get('csv') else read_ids(options.get('external_ids', []))
+        
+        export_format = options.get('format', 'zip')
+        force_refresh = str(options.get('force_refresh', '')).lower() in ('1', 'true')
+        
+        if not ids:
+            return jsonify({'error': 'At least one employee ID is required'}), 400
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({'error': f'Unknown format: {export_format}'}), 400
+        try:
+            spec = get_grid_spec(options.get('resolution'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if str(options.get('store', '')).lower() in ('1', 'true'):
+            return store_batch_export(ids, export_format, force_refresh, spec)
+        
+        if export_format == 'zip':
+            # Entries are sent as soon as each grid is rendered
+            return Response(
+                iter_zip_export(ids, color=GRID_FILL_COLOR, force_refresh=force_refresh, spec=spec),
+                mimetype='application/zip',
+                headers={'Content-Disposition': 'attachment; filename="schedules.zip"'}
+            )
+        
+        wb, report = build_workbook_export(ids, color=GRID_FILL_COLOR, force_refresh=force_refresh, spec=spec)
+        buffer = io.BytesIO()
+        with span('serialize'):
+            wb.save(buffer)
+        buffer.seek(0)
+        
+        response = send_file(
+            buffer,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name='schedules.xlsx'
+        )
+        response.headers['X-Export-Succeeded'] = str(report['succeeded'])
+        response.headers['X-Export-Failed'] = ','.join(report['failures'])
+        response.headers['X-Export-Seconds'] = str(report['elapsed_seconds'])
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'Batch export failed: {str(e)}'}), 500
+
+
+def store_batch_export(ids, export_format, force_refresh, spec):
+    """
+    Builds a batch export and keeps it in the grid store under its content hash
+    
+    Returns:
+        JSON response with the download ID, or 413 if the export is larger than the grid store can hold
+    """
+    if export_format == 'zip':
+        report = {}
+        data = b''.join(iter_zip_export(ids, color=GRID_FILL_COLOR, force_refresh=force_refresh, report=report,
+                                        spec=spec))
+    else:
+        wb, report = build_workbook_export(ids, color=GRID_FILL_COLOR, force_refresh=force_refresh, spec=spec)
+        buffer = io.BytesIO()
+        with span('serialize'):
+            wb.save(buffer)
+        data = buffer.getvalue()
+    
+    if len(data) > grid_store.max_bytes:
+        return jsonify({'error': f'The export ({len(data)} bytes) is larger than the grid store can keep; '
+                                 'request it without "store" to stream it'}), 413
+    
+    # Identical exports share one key, so storing the same roster again replaces the previous copy
+    etag = content_hash(data)
+    batch_id = f"batch-{etag[:16]}.{'zip' if export_format == 'zip' else 'xlsx'}"
+    grid_store.put(batch_id, data)
+    return jsonify({
+        'success': True,
+        'external_id': batch_id,
+        'download_url': f'/download/{batch_id}',
+        'size': len(data),
+        'etag': etag,
+        'succeeded': report['succeeded'],
+        'failed_ids': sorted(report['failures']),
+        'elapsed_seconds': report['elapsed_seconds']
+    })
+
 #------------------------------------------------------- Download File ------------------------------------------------------#  
+# Grid IDs of overview grids end with their resolution, e.g. "170600003-15min"
+GRID_ID_PATTERN = re.compile(r'^(?P<external_id>.+?)(?:-(?P<step>\d+)min)?$')
+
+# Stored batch exports: "batch-<content hash>.zip" or "batch-<content hash>.xlsx"
+BATCH_ID_PATTERN = re.compile(r'^batch-[0-9a-f]+\.(?P<ext>zip|xlsx)$')
+
+XLSX_MIME_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Seconds a browser or proxy may reuse a download without asking again. With the default 0 they revalidate
+# every time with If-None-Match / If-Modified-Since, answered with 304 while the file is unchanged
+DOWNLOAD_MAX_AGE = int(os.environ.get('DOWNLOAD_MAX_AGE', 0))
+
+
+def send_stored(data, etag, stored_at, mimetype, as_attachment, download_name):
+    """
+    Sends a stored file as a conditional response
+    
+    The strong ETag is the content hash of the file and Last-Modified the time it was stored, so a client holding
+    the same file gets 304 without a body, and Range requests (e.g. resuming a large batch archive) get 206 with
+    only the requested bytes. An unsatisfiable range raises the 416 error.
+    
+    Args:
+        data: bytes of the file
+        etag: content hash of the file
+        stored_at: epoch seconds the file was stored
+        mimetype, as_attachment, download_name: as for send_file
+        
+    Returns:
+        Flask response: 200, 206 or 304
+    """
+    return send_file(
+        io.BytesIO(data),
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        etag=etag,
+        last_modified=stored_at,
+        max_age=DOWNLOAD_MAX_AGE,
+        conditional=True
+    )
+
+
+def render_stored_grid(grid_id, fmt, entry):
+    """
+    Renders a generated grid as an image, PDF or HTML table, without reading the workbook
+    
+    The render is drawn from the day masks kept with the grid when it was generated, so it always shows the same
+    availability as the stored xlsx, even if the employee's availability has changed since
+    Renders are kept in the grid store under their content hash, so an unchanged grid is rendered only once
+    
+    Args:
+        grid_id: ID returned by /generate
+        fmt: one of RENDER_FORMATS
+        entry: GridEntry of the stored grid
+        
+    Returns:
+        GridEntry: the rendered bytes, their content hash and when they were rendered
+        
+    Raises:
+        JobError: 400 for heatmaps and batch exports, 409 for grids stored without their masks
+    """
+    if grid_id.startswith('heatmap-'):
+        raise JobError('Heatmaps can only be downloaded as xlsx', status_code=400)
+    if BATCH_ID_PATTERN.match(grid_id):
+        raise JobError('Batch exports can only be downloaded in their own format', status_code=400)
+    
+    match = GRID_ID_PATTERN.match(grid_id)
+    spec = get_grid_spec(match.group('step'))
+    external_id = match.group('external_id')
+    
+    masks = stored_masks(entry.meta)
+    if masks is None:
+        raise JobError('This grid was stored without its availability, generate it again to download it as '
+                       f'{fmt}', status_code=409)
+    color = entry.meta['color']
+    
+    key = render_key(fmt, masks, color, spec=spec, title=external_id)
+    rendered = grid_store.get_entry('render-' + key)
+    if rendered is None:
+        data = render_grid(fmt, masks, color, spec=spec, title=external_id)
+        grid_store.put('render-' + key, data)
+        rendered = GridEntry(data, key, time.time())
+    # Renders are named by the hash of what they are drawn from, which is as strong a validator as their bytes
+    return rendered._replace(etag=key)
+
+
 @app.route('/download/<external_id>')
 def download_file(external_id):
     """
-    Handles file downloads for generated schedules
+    Handles file downloads for generated schedules, heatmaps and stored batch exports
+    
+    Every download carries a strong ETag (content hash), Last-Modified and Cache-Control, so repeated downloads
+    of an unchanged file are answered with 304, and supports Range requests
     
     Args:
         external_id: ID of the schedule to download
         
+    Query Parameters:
+        format: xlsx (default), png, svg, pdf or html; batch exports only in their own format (zip or xlsx)
+        inline: "1" to display the file instead of downloading it (HTML is always inline)
+        filename: custom download name
+        
     Returns:
-        Excel file download response or error message
+        File download response (200, 206 or 304) or error message
     """
     try:
-        # Verify schedule exists in temporary storage
-        if external_id not in temp_grids:
+        # Verify schedule exists in the grid store (it may have expired or been evicted)
+        entry = grid_store.get_entry(external_id)
+        if entry is None:
             return jsonify({'error': 'Grid not found'}), 404
+        
+        batch = BATCH_ID_PATTERN.match(external_id)
+        stored_format = batch.group('ext') if batch else 'xlsx'
+        fmt = request.args.get('format', stored_format).lower()
+        if fmt == stored_format:
+            # Get custom filename or use default format
+            default_name = f'schedules.{fmt}' if batch else f'schedule_{external_id}.xlsx'
+            filename = request.args.get('filename', default_name)
             
-        buffer = temp_grids[external_id]
-        buffer.seek(0)
+            # Send file as downloadable attachment
+            mimetype = 'application/zip' if fmt == 'zip' else XLSX_MIME_TYPE
+            return send_stored(entry.data, entry.etag, entry.stored_at, mimetype, True, filename)
         
-        # Get custom filename or use default format
-        filename = request.args.get('filename', f'schedule_{external_id}.xlsx')
+        if fmt not in RENDER_FORMATS:
+            return jsonify({'error': f'Unsupported format: {fmt}'}), 400
         
-        # Send file as downloadable attachment
-        return send_file(
-            buffer,
+        # Other formats are drawn from the masks stored with the grid, the workbook is never read back
+        try:
+            entry = render_stored_grid(external_id, fmt, entry)
+        except (JobError, ValueError) as e:
+            return jsonify({'error': str(e)}), getattr(e, 'status_code', 400)
+        
+        filename = request.args.get('filename', f'schedule_{external_id}.{fmt}')
+        as_attachment = fmt != 'html' and request.args.get('inline') != '1'
+        return send_stored(entry.data, entry.etag, entry.stored_at, MIME_TYPES[fmt], as_attachment, filename)
+    except HTTPException:
+        # 416 for a Range outside the file
+        raise
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+#------------------------------------------------------- Stream Grid ------------------------------------------------------#
+@app.route('/stream/<external_id>')
+def stream_grid(external_id):
+    """
+    Generates a schedule and streams it straight into the response
+    
+    Uses the streaming grid writer: no workbook is built and nothing is kept in memory
+    after the response, which suits exports of many grids.
+    
+    Args:
+        external_id: ID of the employee
+        
+    Query Parameters:
+        force_refresh: "1" or "true" to bypass the availability cache
+        resolution: minutes per cell (5, 15 or 30)
+        filename: custom download name
+        
+    Returns:
+        Streamed Excel file download response or error message
+    """
+    try:
+        force_refresh = str(request.args.get('force_refresh', '')).lower() in ('1', 'true')
+        try:
+            spec = get_grid_spec(request.args.get('resolution'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        avail = get_availability(external_id, force_refresh=force_refresh)
+        if not avail:
+            return jsonify({'error': 'No schedule available for this ID'}), 404
+        
+        filename = request.args.get('filename', f'schedule_{external_id}.xlsx')
+        chunks = get_grid_writer(spec).iter_xlsx(availability_to_masks(avail, spec), color=GRID_FILL_COLOR)
+        return Response(
+            chunks,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
         )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/coalescing/stats')
+def coalescing_stats():
+    """
+    Reports how many requests shared an in-flight computation instead of starting their own
+    
+    Returns:
+        JSON with the coalesced counts of grid generation jobs, availability fetches and heatmaps
+    """
+    jobs = job_queue.stats()
+    return jsonify({
+        'generate': {'calls': jobs['submitted'] + jobs['deduplicated'], 'coalesced': jobs['deduplicated']},
+        'availability_fetch': fetch_flight.stats(),
+        'heatmap': heatmap_flight.stats()
+    })
+
+#------------------------------------------------------- Who Is Available ------------------------------------------------------#
+@app.route('/available/roster', methods=['POST'])
+def load_roster():
+    """
+    Loads a roster into the who-is-available index
+    
+    Accepts JSON {"external_ids": [...]} (or {"csv": "CSV text"}) or a form upload with a CSV "file",
+    with optional "force_refresh" and "replace" (default true: employees missing from the roster are dropped).
+    {"from_store": true} loads every employee of the availability store instead, without calling Schedule Source
+    
+    Returns:
+        JSON with the number of indexed employees and the IDs whose availability could not be fetched
+    """
+    try:
+        if 'file' in request.files:
+            options = request.form
+            ids = read_ids(request.files['file'].read().decode('utf-8-sig'))
+        else:
+            options = request.get_json() or {}
+            ids = read_ids(options['csv']) if options.get('csv') else read_ids(options.get('external_ids', []))
+        
+        force_refresh = str(options.get('force_refresh', '')).lower() in ('1', 'true')
+        replace = str(options.get('replace', 'true')).lower() in ('1', 'true')
+        
+        if str(options.get('from_store', '')).lower() in ('1', 'true'):
+            if availability_store is None:
+                return jsonify({'error': 'No availability store is configured'}), 400
+            stored, _ = availability_store.load_many(ids or None)
+            availability_index.update_many(stored)
+            ids = ids or list(stored)
+            errors = {}
+        elif not ids:
+            return jsonify({'error': 'At least one employee ID is required'}), 400
+        else:
+            _, errors = build_index(ids, force_refresh=force_refresh, index=availability_index)
+        if replace:
+            availability_index.retain(ids)
+        
+        return jsonify({
+            'success': True,
+            'indexed': len(availability_index),
+            'errors': {external_id: str(e) for external_id, e in errors.items()}
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/available')
+def who_is_available():
+    """
+    Lists the employees of the loaded roster who are available on a day during a time window
+    
+    Query Parameters:
+        day: DayId (1 = Sunday) or day name ("tue", "Tuesday")
+        start, end: window within the grid hours (6:00-22:00), e.g. "11:00" and "13:30" or "11am" and "1:30pm"
+        min_minutes: only require this many minutes of the window (optional)
+        contiguous: "1" to require the min_minutes in one stretch
+        count_only: "1" to return only the count
+        
+    Returns:
+        JSON with the matching employee IDs and their count, or an error message
+    """
+    args = request.args
+    if not all(args.get(name) for name in ('day', 'start', 'end')):
+        return jsonify({'error': 'day, start and end are required'}), 400
+    try:
+        min_minutes = int(args['min_minutes']) if args.get('min_minutes') else None
+        query = (args['day'], args['start'], args['end'], min_minutes, args.get('contiguous') == '1')
+        if args.get('count_only') == '1':
+            employees = None
+            count = availability_index.count(*query)
+        else:
+            employees = availability_index.query(*query)
+            count = len(employees)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    body = {'count': count, 'roster_size': len(availability_index)}
+    if employees is not None:
+        body['employees'] = employees
+    return jsonify(body)
+
+#------------------------------------------------------- Roster Warmer ------------------------------------------------------#
+def warmer_stats():
+    """Returns the roster warmer counters exported at /metrics"""
+    report = roster_warmer.report()
+    return {
+        'roster_size': report['roster_size'],
+        'fresh': report['fresh'],
+        'stale': len(report['stale']),
+        'failing': len(report['failing']),
+        'passes': report['passes']
+    }
+
+
+@app.route('/warmer/report')
+def warmer_report():
+    """
+    Reports how fresh the warmed roster is
+    
+    Returns:
+        JSON with the stale IDs and their age, the failing IDs with their retry time, the last and next pass
+    """
+    return jsonify(roster_warmer.report())
+
+
+@app.route('/warmer/roster', methods=['POST'])
+def warmer_roster():
+    """
+    Replaces the warmed roster and starts the background passes
+    
+    Accepts JSON {"external_ids": [...]} (or {"csv": "CSV text"}) or a form upload with a CSV "file"
+    
+    Returns:
+        JSON with the roster size
+    """
+    if 'file' in request.files:
+        ids = read_ids(request.files['file'].read().decode('utf-8-sig'))
+    else:
+        options = request.get_json() or {}
+        ids = read_ids(options['csv']) if options.get('csv') else read_ids(options.get('external_ids', []))
+    
+    if not ids:
+        return jsonify({'error': 'At least one employee ID is required'}), 400
+    roster_warmer.set_roster(ids)
+    roster_warmer.start()
+    return jsonify({'success': True, 'roster_size': len(ids)})
+
+
+@app.route('/warmer/run', methods=['POST'])
+def warmer_run():
+    """
+    Runs a warming pass now, in the background job queue, whatever the off-peak window
+    
+    Returns:
+        202 with the job to poll at /jobs/<job_id>
+    """
+    job = job_queue.submit(lambda job: roster_warmer.run_once(), key='roster-warmer')
+    return job_json(job, 202)
+
+#------------------------------------------------------- Metrics ------------------------------------------------------#
+@app.route('/metrics')
+def metrics():
+    """
+    Exports the per-stage timings and the cache, store and job counters in the Prometheus text format
+    
+    Returns:
+        text/plain exposition: the grid_stage_seconds histogram (auth, availability_fetch, parse, template_load,
+        template_clone, clear_grid, fill, serialize) followed by one gauge per counter
+    """
+    gauges = {}
+    for prefix, help_text, stats in (
+            ('grid_availability_cache', 'Availability cache', availability_cache.stats()),
+            ('grid_store', 'Grid store', grid_store.stats()),
+            ('grid_renders', 'Incremental grid renders', grid_renderer.stats()),
+            ('grid_jobs', 'Grid job queue', job_queue.stats()),
+            ('grid_availability_index', 'Who-is-available index', availability_index.stats()),
+            ('grid_warmer', 'Roster warmer', warmer_stats()),
+            ('grid_availability_store', 'Availability store', availability_store.stats() if availability_store else {})):
+        for name, value in stats.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges[f'{prefix}_{name}'] = (f'{help_text}: {name}', value)
+    
+    return Response(get_timing_registry().render_prometheus(gauges), mimetype='text/plain; version=0.0.4')
+
+#------------------------------------------------------- Grid Store ------------------------------------------------------#
+@app.route('/grids/stats')
+def grid_store_stats():
+    """
+    Reports the grid store and incremental render counters
+    
+    Returns:
+        JSON with hits, misses, evictions, expirations, entries, bytes and the store limits,
+        and under "renders" how many generations reused, partially repainted or fully rendered a grid
+    """
+    stats = grid_store.stats()
+    stats['renders'] = grid_renderer.stats()
+    return jsonify(stats)
+
+#------------------------------------------------------- Availability Cache ------------------------------------------------------#
+@app.route('/cache/stats')
+def cache_stats():
+    """
+    Reports the availability cache counters
+    
+    Returns:
+        JSON with hits, disk_hits, misses, evictions, expirations and size
+    """
+    return jsonify(availability_cache.stats())
+
+
+@app.route('/store/stats')
+def store_stats():
+    """
+    Reports the availability store counters
+    
+    Returns:
+        JSON with the employees, days and ranges stored, the age of the oldest fetch and whether it is offline,
+        or a 404 when no store is configured
+    """
+    if availability_store is None:
+        return jsonify({'error': 'No availability store is configured'}), 404
+    return jsonify(availability_store.stats())
+
+
+@app.route('/cache/<external_id>', methods=['DELETE'])
+def invalidate_cache(external_id):
+    """
+    Drops one employee's cached availability so the next generation fetches it again
+    
+    Args:
+        external_id: ID of the employee to invalidate
+        
+    Returns:
+        JSON response telling whether an entry was removed
+    """
+    removed = availability_cache.invalidate(external_id)
+    return jsonify({'success': True, 'removed': removed, 'external_id': external_id})
+
 #------------------------------------------------------- Run App ------------------------------------------------------#  
 if __name__ == '__main__':
     app.run(debug=True)  # Enable development features when running directly
@@ -5,6 +5,9 @@
 // ==========================================================================
 
 document.addEventListener("DOMContentLoaded", function () {
+  // Delay between two job status requests
+  const POLL_INTERVAL_MS = 500;
+
   // Cache DOM Elements
   // Get references to frequently used DOM elements to avoid repeated queries
   const form = document.getElementById("gridForm");
@@ -35,6 +38,29 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
+  // Progress Display
+  // Shows the background job's current step and progress on the submit button
+  function setProgress(job) {
+    const percent = Math.round((job.progress || 0) * 100);
+    submitButton.innerHTML =
+      `<span class="spinner-border spinner-border-sm me-2"></span>${job.message} (${percent}%)`;
+  }
+
+  // Job Polling
+  // Polls /jobs/<id> until the background job has succeeded or failed
+  async function waitForJob(job) {
+    while (job.status === "queued" || job.status === "running") {
+      setProgress(job);
+      await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+      const response = await fetch(job.status_url);
+      job = await response.json();
+      if (!response.ok) {
+        return { status: "failed", error: job.error, error_status: response.status };
+      }
+    }
+    return job;
+  }
+
   // Button Factory Function
   // Creates consistent action buttons with specified properties
   function createActionButton(text, className, clickHandler) {
@@ -59,6 +85,7 @@ document.addEventListener("DOMContentLoaded", function () {
 
     // Get Form Data
     const externalId = document.getElementById("external_id").value;
+    const forceRefresh = document.getElementById("force_refresh").checked;
 
     setLoading(true); // Activate loading state
 
@@ -70,14 +97,23 @@ document.addEventListener("DOMContentLoaded", function () {
         headers: {
           "Content-Type": "application/json",
         },
-        body: JSON.stringify({ external_id: externalId }),
+        body: JSON.stringify({
+          external_id: externalId,
+          force_refresh: forceRefresh,
+        }),
       });
 
-      const data = await response.json();
+      // The grid is generated in the background; follow the job until it is done
+      let data = await response.json();
+      if (response.ok) {
+        data = await waitForJob(data);
+      }
+      const succeeded = response.ok && data.status === "succeeded";
+      const status = response.ok ? data.error_status : response.status;
 
       // Success Handler
       // Display success message and create download button
-      if (response.ok) {
+      if (succeeded) {
         successAlert.textContent = data.message;
         successAlert.style.display = "block";
         successAlert.className = "alert alert-success";
@@ -93,8 +129,32 @@ document.addEventListener("DOMContentLoaded", function () {
           () => (window.location.href = `/download/${data.external_id}`)
         );
 
+        // Printable copies are drawn straight from the availability on the server
+        const pdfButton = createActionButton(
+          "🖨️ PDF",
+          "btn-outline-secondary",
+          () => (window.location.href = `/download/${data.external_id}?format=pdf`)
+        );
+        const pngButton = createActionButton(
+          "🖼️ Image",
+          "btn-outline-secondary",
+          () => (window.location.href = `/download/${data.external_id}?format=png`)
+        );
+
         buttonContainer.appendChild(downloadButton);
+        buttonContainer.appendChild(pdfButton);
+        buttonContainer.appendChild(pngButton);
         successAlert.after(buttonContainer);
+
+        // Inline Preview
+        // The grid as an HTML table, so it can be checked without opening Excel
+        const previewResponse = await fetch(`/download/${data.external_id}?format=html`);
+        if (previewResponse.ok) {
+          const preview = document.createElement("div");
+          preview.className = "grid-preview-container mt-3";
+          preview.innerHTML = await previewResponse.text();
+          buttonContainer.appendChild(preview);
+        }
       }
       // Error Handler
       // Display appropriate error messages based on response status
@@ -103,7 +163,7 @@ document.addEventListener("DOMContentLoaded", function () {
         errorAlert.style.display = "block";
 
         // Special case for 404 (no schedule found)
-        if (response.status === 404) {
+        if (status === 404) {
           errorAlert.className = "alert alert-warning";
         } else {
           errorAlert.className = "alert alert-danger";